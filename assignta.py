@@ -4,14 +4,42 @@ File: assignta.py
 Description: core TA assignment logic, data prep, objectives
 """
 
+import threading
 import numpy as np
-import pandas as pd
-from evo import Evo
+from typing import TYPE_CHECKING
 from profiler import profile
+from sparse_assignment import SparseAssignment
+import problem_cache
 from collections import defaultdict
+from functools import reduce
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 class AssignTa:
+    # Preprocessed arrays that fully describe a problem (what the problem cache stores)
+    PROBLEM_ARRAYS = (
+        "unavail", "willing", "prefer", "max_assigned",
+        "min_ta", "lab_times", "lab_time_ids", "ta_names",
+    )
+
+    # Weights used by aggregate_objective (score = sum(weight * objective) / AGGREGATE_SCALE)
+    AGGREGATE_WEIGHTS = {
+        "overallocation": 10,  # Medium priority
+        "conflicts": 100,  # HARD constraint
+        "undersupport": 10,  # Medium priority
+        "unavailable": 1000,  # HARD constraint
+        "unpreferred": 1,  # Soft preference
+    }
+    AGGREGATE_SCALE = 100
+
+    # Values returned by score_all, in order
+    SCORE_NAMES = (
+        "overallocation", "conflicts", "undersupport",
+        "unavailable", "unpreferred", "aggregatescore",
+    )
+
     def __init__(self):
         self.ta = None
         self.lab = None
@@ -24,33 +52,222 @@ class AssignTa:
         self.max_assigned = None
         self.min_ta = None
         self.lab_times = None
-
-        # Conflict caching
-        self._conflict_cache = {}
+        self.lab_time_ids = None
+        self.num_timeslots = None
+        self.ta_names = None
+
+        # Allowed (non-"U") cell index, rebuilt when unavail changes (see feasibility_index)
+        self._feasible = None
+        # Preferred cell index, rebuilt when prefer changes (see preference_index)
+        self._preferred = None
+
+        # Per-thread scratch buffers for allocation-free dense scoring (see _scratch_buffers)
+        self._scratch = threading.local()
+
+        # Shared-memory copy of the problem arrays (see share_problem) and, in workers, attached blocks
+        self._shared = None
+        self._attached = None
+
+    def __getstate__(self):
+        # Scratch buffers are per-thread and per-process - rebuilt on first use after unpickling
+        state = self.__dict__.copy()
+        del state["_scratch"]
+        state["_attached"] = None
+        if self._shared is not None and self._shared.blocks:
+            # Ship the shared-memory handle instead of the arrays (and never the DataFrames)
+            for name in self.PROBLEM_ARRAYS:
+                del state[name]
+            state.update(ta=None, lab=None, _feasible=None, _preferred=None, _shared=self._shared.handle)
+        else:
+            state["_shared"] = None
+        return state
+
+    def __setstate__(self, state):
+        handle = state["_shared"]
+        self.__dict__.update(state)
+        self._scratch = threading.local()
+        self._shared = None
+        if handle is not None:
+            import shared_problem
+
+            arrays, self._attached = shared_problem.attach(handle)
+            self.set_problem_arrays(arrays)
 
     # ==== Initialization // Helpers
 
-    def _load_data(self, fp: str) -> pd.DataFrame:
+    def _load_data(self, fp: str) -> "pd.DataFrame":
+        # pandas is only needed to parse the CSVs, so keep it off the import path
+        import pandas as pd
+
         return pd.read_csv(fp)
 
     def assign_ta_df(self, fp: str):
         self.ta = self._load_data(fp)
         self.max_assigned = self.ta["max_assigned"].values
+        self.ta_names = self.ta["name"].values
         self.get_preference_masks()
 
     def assign_lab_df(self, fp: str):
         self.lab = self._load_data(fp)
         self.min_ta = self.lab["min_ta"].values
         self.lab_times = self.lab["daytime"].values
+        self.get_timeslot_ids()
+
+    def load_problem(self, ta_fp: str, lab_fp: str, cache_dir: str = problem_cache.DEFAULT_CACHE_DIR):
+        """
+        Load TA and lab data through the compiled problem cache
+
+        On a hit the preprocessed arrays are memory mapped straight from cache_dir and
+        the CSVs are never parsed (self.ta / self.lab stay None). On a miss the CSVs are
+        parsed as usual and the arrays are written back for the next process.
+        Pass cache_dir=None to bypass the cache.
+        """
+        if cache_dir is None:
+            self.assign_ta_df(ta_fp)
+            self.assign_lab_df(lab_fp)
+            return
+
+        key = problem_cache.source_hash(ta_fp, lab_fp)
+        arrays = problem_cache.load(cache_dir, key, self.PROBLEM_ARRAYS)
+        if arrays is None:
+            self.assign_ta_df(ta_fp)
+            self.assign_lab_df(lab_fp)
+            problem_cache.save(cache_dir, key, self.problem_arrays())
+            return
+
+        self.set_problem_arrays(arrays)
+
+    def problem_arrays(self) -> dict:
+        """
+        Preprocessed problem arrays by name (see PROBLEM_ARRAYS)
+        """
+        arrays = {name: getattr(self, name) for name in self.PROBLEM_ARRAYS}
+        arrays["lab_times"] = np.asarray(arrays["lab_times"], dtype=str)
+        arrays["ta_names"] = np.asarray(arrays["ta_names"], dtype=str)
+        return arrays
 
-    def zeros(self) -> np.array:
+    def set_problem_arrays(self, arrays: dict):
+        """
+        Install preprocessed problem arrays (e.g. from the cache) without any CSV parsing
+        """
+        for name in self.PROBLEM_ARRAYS:
+            setattr(self, name, arrays[name])
+        self.num_timeslots = int(self.lab_time_ids.max()) + 1 if len(self.lab_time_ids) else 0
+        # Masks and buffers built from the old arrays (in every thread) are stale now
+        self._scratch = threading.local()
+        self._feasible = None
+        self._preferred = None
+
+    def share_problem(self):
+        """
+        Publish the problem arrays to shared memory (multiprocessing.shared_memory)
+
+        From then on, pickled copies of this instance (e.g. bound objectives shipped to
+        worker processes) carry only a handle and attach to the published arrays as
+        read-only zero-copy views, so N workers do not hold N copies. Returns the
+        shared_problem.SharedProblem owner - close it once the workers are done.
+        """
+        import shared_problem
+
+        if self._shared is None:
+            self._shared = shared_problem.SharedProblem(self.problem_arrays())
+        return self._shared
+
+    def zeros(self, sparse: bool = False):
         """
         Create an initial assignment of num_tas, num_labs (all start as 0)
+        Use sparse=True for large problems where each TA only holds a few labs
         """
-        num_tas = len(self.ta)
-        num_labs = len(self.lab)
+        num_tas, num_labs = self.unavail.shape
+        if sparse:
+            return SparseAssignment.empty(num_tas, num_labs)
         return np.zeros((num_tas, num_labs), dtype=int)
 
+    def get_timeslot_ids(self):
+        """
+        Map each lab's daytime string to an integer timeslot id - helper for conflict checks
+        """
+        unique_times, self.lab_time_ids = np.unique(self.lab_times, return_inverse=True)
+        self.num_timeslots = len(unique_times)
+
+    def feasibility_index(self) -> dict:
+        """
+        Precomputed index of allowed (non-"U") cells - helper for the mask-aware agents
+
+        allowed: bool mask, allowed_cells: flat indices of allowed cells,
+        lab_tas[l]: TAs allowed in lab l (a TA's allowed labs are just allowed[t]).
+        Built once and reused until unavail is replaced.
+        """
+        if self._feasible is None or self._feasible["unavail"] is not self.unavail:
+            allowed = np.asarray(self.unavail) == 0
+            self._feasible = {
+                "unavail": self.unavail,
+                "allowed": allowed,
+                "allowed_cells": np.flatnonzero(allowed),
+                "lab_tas": [np.flatnonzero(col) for col in allowed.T],
+            }
+        return self._feasible
+
+    def preference_index(self) -> dict:
+        """
+        Precomputed index of preferred ("P") cells - helper for the sparse preference agent
+
+        cells: flat (ta * num_labs + lab) index of every preferred cell, in row-major order
+        (the CSR layout SparseAssignment uses, so it lines up with assigned cells).
+        Built once and reused until prefer is replaced.
+        """
+        if self._preferred is None or self._preferred["prefer"] is not self.prefer:
+            labs = SparseAssignment.from_dense(np.asarray(self.prefer) == 1)
+            self._preferred = {
+                "prefer": self.prefer,
+                "cells": labs.row_ids() * labs.shape[1] + labs.indices,
+            }
+        return self._preferred
+
+    def _scratch_buffers(self, shape: tuple) -> dict:
+        """
+        This thread's preallocated work arrays for scoring a dense assignment of the given shape
+
+        Objectives write their temporaries into these (out=...), so steady-state scoring
+        allocates no arrays. Everything derived from the problem is rebuilt when any of the
+        PROBLEM_ARRAYS is replaced (set_problem_arrays also drops every thread's buffers) -
+        replace problem arrays rather than editing them in place.
+        """
+        buffers = getattr(self._scratch, "buffers", None)
+        if (
+            buffers is None
+            or buffers["cells"].shape != shape
+            or any(getattr(self, name) is not source for name, source in zip(self.PROBLEM_ARRAYS, buffers["sources"]))
+        ):
+            num_tas, num_labs = shape
+            buffers = {
+                "sources": tuple(getattr(self, name) for name in self.PROBLEM_ARRAYS),
+                "unavail_mask": np.asarray(self.unavail) == 1,
+                "willing_mask": np.asarray(self.willing) == 1,
+                "slot_onehot": np.eye(self.num_timeslots, dtype=np.int64)[self.lab_time_ids],
+                "rows": np.empty(num_tas, dtype=np.int64),
+                "cols": np.empty(num_labs, dtype=np.int64),
+                "cells": np.empty(shape, dtype=bool),
+                "slots": np.empty((num_tas, self.num_timeslots), dtype=np.int64),
+                "slot_flags": np.empty((num_tas, self.num_timeslots), dtype=bool),
+                "ta_flags": np.empty(num_tas, dtype=bool),
+                "slot_stamp": np.empty(self.num_timeslots, dtype=np.int64),
+                # Plain-ndarray views of the (possibly memory-mapped) problem arrays for the JIT kernel
+                "kernel_arrays": tuple(np.asarray(getattr(self, name)) for name in
+                                       ("unavail", "willing", "max_assigned", "min_ta", "lab_time_ids")),
+            }
+            self._scratch.buffers = buffers
+        return buffers
+
+    @staticmethod
+    def _assigned_cells(assignment) -> tuple:
+        """
+        (ta_indices, lab_indices) of every assigned cell, for dense or sparse assignments
+        """
+        if isinstance(assignment, SparseAssignment):
+            return assignment.row_ids(), assignment.indices
+        return np.where(assignment == 1)
+
     def get_preference_masks(self):
         """
         returns preference masks - helper function for objectives
@@ -76,35 +293,25 @@ class AssignTa:
 
         Description
         -----------
-        Optimized version with caching that only counts TAs with conflicts without building the full conflict list.
+        Counts TAs with conflicts without building the full conflict list. Reentrant: no shared
+        cache (safe to call from several threads); dense work happens in this thread's scratch buffers.
         """
-        # Create hashable key from assignment
-        key = assignment.tobytes()
-
-        # Check cache first
-        if key in self._conflict_cache:
-            return self._conflict_cache[key]
-
-        # Calculate conflicts
-        ta_indices, lab_indices = np.where(assignment == 1)
-
-        if len(ta_indices) == 0:
-            self._conflict_cache[key] = 0
-            return 0
-
-        assigned_times = self.lab_times[lab_indices]
-        tas_with_conflicts = set()
-
-        for ta_idx in np.unique(ta_indices):
-            ta_mask = ta_indices == ta_idx
-            ta_times = assigned_times[ta_mask]
-
-            if len(ta_times) != len(np.unique(ta_times)):
-                tas_with_conflicts.add(ta_idx)
-
-        result = len(tas_with_conflicts)
-        self._conflict_cache[key] = result
-        return result
+        if isinstance(assignment, SparseAssignment):
+            ta_indices, lab_indices = self._assigned_cells(assignment)
+            if len(ta_indices) == 0:
+                return 0
+            # Sort (ta, timeslot) keys once - repeats mark TAs with conflicts, O(assigned cells)
+            slot_keys = np.sort(ta_indices * self.num_timeslots + self.lab_time_ids[lab_indices])
+            repeated = slot_keys[1:][slot_keys[1:] == slot_keys[:-1]]
+            return len(np.unique(repeated // self.num_timeslots))
+
+        # Labs per (TA, timeslot) with one matmul into scratch - no per-call arrays
+        scratch = self._scratch_buffers(assignment.shape)
+        # Float assignments are accepted too; int64 input is used as is (no copy)
+        np.matmul(assignment.astype(np.int64, copy=False), scratch["slot_onehot"], out=scratch["slots"])
+        np.greater(scratch["slots"], 1, out=scratch["slot_flags"])
+        np.any(scratch["slot_flags"], axis=1, out=scratch["ta_flags"])
+        return np.count_nonzero(scratch["ta_flags"])
 
     @profile
     def get_conflict_pairs(self, assignment: np.array) -> list:
@@ -123,7 +330,7 @@ class AssignTa:
         -----------
         Returns actual conflict locations. Only used by conflict_remover_agent where specific conflict pairs are needed.
         """
-        ta_indices, lab_indices = np.where(assignment == 1)
+        ta_indices, lab_indices = self._assigned_cells(assignment)
 
         if len(ta_indices) == 0:
             return []
@@ -174,9 +381,14 @@ class AssignTa:
         Compute the objective by summing the overallocation penalty over all TAs.
         There is no minimum allocation.
         """
-        per_ta_total_assignments = assignment.sum(axis=1)
-        penalty = np.maximum(per_ta_total_assignments - self.max_assigned, 0).sum()
-        return penalty
+        if isinstance(assignment, SparseAssignment):
+            per_ta_total_assignments = assignment.row_counts()
+            return np.maximum(per_ta_total_assignments - self.max_assigned, 0).sum()
+        rows = self._scratch_buffers(assignment.shape)["rows"]
+        np.sum(assignment, axis=1, out=rows)
+        np.subtract(rows, self.max_assigned, out=rows)
+        np.maximum(rows, 0, out=rows)
+        return rows.sum()
 
     @profile
     def conflicts(self, assignment: np.ndarray) -> int:
@@ -216,9 +428,14 @@ class AssignTa:
         If a section needs at least 3 TAs and you only assign 1, count that as 2 penalty points.
         Minimize the total penalty score across all sections. There is no penalty for assigning too many TAs.
         """
-        assigned_tas = assignment.sum(axis=0)
-        penalty = np.maximum(self.min_ta - assigned_tas, 0).sum()
-        return penalty
+        if isinstance(assignment, SparseAssignment):
+            assigned_tas = assignment.col_counts()
+            return np.maximum(self.min_ta - assigned_tas, 0).sum()
+        cols = self._scratch_buffers(assignment.shape)["cols"]
+        np.sum(assignment, axis=0, out=cols)
+        np.subtract(self.min_ta, cols, out=cols)
+        np.maximum(cols, 0, out=cols)
+        return cols.sum()
 
     @profile
     def unavailable(self, assignment: np.ndarray) -> int:
@@ -233,8 +450,9 @@ class AssignTa:
         int
             Total number of times TAs are assigned to sections they are unavailable for.
         """
-        penalty = np.sum((self.unavail == 1) & (assignment == 1))
-        return penalty
+        if isinstance(assignment, SparseAssignment):
+            return np.sum(self.unavail[assignment.row_ids(), assignment.indices] == 1)
+        return self._masked_count(assignment, "unavail_mask")
 
     @profile
     def unpreferred(self, assignment: np.ndarray) -> int:
@@ -255,8 +473,58 @@ class AssignTa:
         In effect, we are trying to assign TAs to sections that they prefer. But we want to frame every objective a minimization objective.
         So, if your solution score has unwilling=0 and unpreferred=0, then all TAs are assigned to sections they prefer!
         """
-        penalty = np.sum((self.willing == 1) & (assignment == 1))
-        return penalty
+        if isinstance(assignment, SparseAssignment):
+            return np.sum(self.willing[assignment.row_ids(), assignment.indices] == 1)
+        return self._masked_count(assignment, "willing_mask")
+
+    def _masked_count(self, assignment: np.ndarray, mask: str) -> int:
+        """
+        Number of assigned cells inside a precomputed problem mask, using the scratch cell buffer
+        """
+        scratch = self._scratch_buffers(assignment.shape)
+        cells = scratch["cells"]
+        np.equal(assignment, 1, out=cells)
+        np.logical_and(cells, scratch[mask], out=cells)
+        return np.count_nonzero(cells)
+
+    @profile
+    def fused_objectives(self, assignment: np.ndarray) -> tuple:
+        """
+        Parameters
+        ----------
+        assignment : np.ndarray
+            2D array where rows are TAs and columns are labs. A value of 1 indicates the TA is assigned to that lab, 0 otherwise.
+
+        Returns
+        -------
+        tuple
+            (overallocation, conflicts, undersupport, unavailable, unpreferred)
+
+        Description
+        -----------
+        All five objectives from one fused pass over the matrix (kernels.objectives - Numba
+        when installed, vectorized NumPy otherwise). Sparse assignments use the per-objective methods.
+        """
+        if isinstance(assignment, SparseAssignment):
+            return (
+                self.overallocation(assignment), self.conflicts(assignment), self.undersupport(assignment),
+                self.unavailable(assignment), self.unpreferred(assignment),
+            )
+        # Imported on first use so Numba's import/JIT cost stays off the startup path
+        import kernels
+
+        if not kernels.HAVE_NUMBA:
+            # The buffered objectives allocate nothing; the NumPy kernel would
+            return (
+                int(self.overallocation(assignment)), int(self.conflicts(assignment)),
+                int(self.undersupport(assignment)), int(self.unavailable(assignment)),
+                int(self.unpreferred(assignment)),
+            )
+        scratch = self._scratch_buffers(assignment.shape)
+        return kernels.objectives(
+            assignment, *scratch["kernel_arrays"], self.num_timeslots,
+            col_counts=scratch["cols"], slot_stamp=scratch["slot_stamp"],
+        )
 
     @profile
     def aggregate_objective(self, assignment: np.ndarray) -> float:
@@ -276,13 +544,138 @@ class AssignTa:
         Aggregate objective function with weighted penalties. Hard constraints heavily penalized.
         Lower scores are better - helps organize solutions list.
         """
+        return self._aggregate(self.fused_objectives(assignment))
+
+    def _aggregate(self, values) -> float:
+        """
+        Weighted sum (AGGREGATE_WEIGHTS / AGGREGATE_SCALE) of the five objective values, in SCORE_NAMES order
+        """
+        weights = self.AGGREGATE_WEIGHTS
+        return (
+            weights["overallocation"] * values[0]
+            + weights["conflicts"] * values[1]
+            + weights["undersupport"] * values[2]
+            + weights["unavailable"] * values[3]
+            + weights["unpreferred"] * values[4]
+        ) / self.AGGREGATE_SCALE
+
+    def objective_bounds(self) -> tuple:
+        """
+        Worst possible value of each of the five objectives, in SCORE_NAMES order
+
+        Reached by assigning every TA to every lab (undersupport: by assigning nobody), so
+        every assignment scores at or below these - a fixed hypervolume reference point.
+        """
+        num_tas, num_labs = self.unavail.shape
         return (
-            10 * self.overallocation(assignment)  # Medium priority
-            + 100 * self.conflicts(assignment)  # HARD constraint
-            + 10 * self.undersupport(assignment)  # Medium priority
-            + 1000 * self.unavailable(assignment)  # HARD constraint
-            + 1 * self.unpreferred(assignment)  # Soft preference
-        ) / 100
+            int(np.maximum(num_labs - np.asarray(self.max_assigned), 0).sum()),
+            num_tas if (np.bincount(self.lab_time_ids) > 1).any() else 0,
+            int(np.asarray(self.min_ta).sum()),
+            int(np.count_nonzero(np.asarray(self.unavail) == 1)),
+            int(np.count_nonzero(np.asarray(self.willing) == 1)),
+        )
+
+    @profile
+    def score_all(self, assignment: np.ndarray) -> tuple:
+        """
+        Parameters
+        ----------
+        assignment : np.ndarray
+            2D array where rows are TAs and columns are labs.
+
+        Returns
+        -------
+        tuple
+            (overallocation, conflicts, undersupport, unavailable, unpreferred, aggregatescore)
+
+        Description
+        -----------
+        Every objective plus the aggregate from one fused pass (row/column sums and masks computed once).
+        Register with Evo.add_objectives(SCORE_NAMES, a.score_all) so each solution costs one call.
+        """
+        values = self.fused_objectives(assignment)
+        return values + (self._aggregate(values),)
+
+    # ==== Seeding Functions
+    def greedy_assignment(self, randomize: bool = False, sparse: bool = False):
+        """
+        Parameters
+        ----------
+        randomize : bool
+            Shuffle the lab order and break TA ties randomly to get a different variant each call.
+        sparse : bool
+            Return a SparseAssignment instead of a dense matrix.
+
+        Returns
+        -------
+        np.ndarray or SparseAssignment
+            Warm-start assignment that never uses an unavailable cell, never creates a time conflict
+            and never exceeds a TA's max_assigned.
+
+        Description
+        -----------
+        Pass 1 covers min_ta for every lab, scarcest labs first (fewest available TAs per required TA),
+        taking preferred TAs before willing ones and TAs with more spare capacity first.
+        Pass 2 fills leftover capacity with preferred cells, which cost nothing on any objective.
+        """
+        num_tas, num_labs = self.unavail.shape
+        assignment = np.zeros((num_tas, num_labs), dtype=int)
+        load = np.zeros(num_tas, dtype=int)
+        busy = np.zeros((num_tas, self.num_timeslots), dtype=bool)
+        available = self.unavail == 0
+
+        # Pass 1: cover min_ta, scarcest labs first
+        scarcity = available.sum(axis=0) / np.maximum(self.min_ta, 1)
+        if randomize:
+            scarcity = scarcity * np.random.uniform(0.5, 1.5, size=num_labs)
+        for lab_idx in np.argsort(scarcity, kind="stable"):
+            slot = self.lab_time_ids[lab_idx]
+            eligible = available[:, lab_idx] & ~busy[:, slot] & (load < self.max_assigned)
+            candidates = np.where(eligible)[0]
+            if len(candidates) == 0:
+                continue
+
+            # Preferred first, then most spare capacity (random tie-breaks when randomizing)
+            rank = 10 * self.prefer[candidates, lab_idx] + (self.max_assigned - load)[candidates]
+            if randomize:
+                rank = rank + np.random.uniform(0, 1, size=len(candidates))
+            chosen = candidates[np.argsort(-rank, kind="stable")[: self.min_ta[lab_idx]]]
+
+            assignment[chosen, lab_idx] = 1
+            load[chosen] += 1
+            busy[chosen, slot] = True
+
+        # Pass 2: spend leftover capacity on free preferred cells
+        ta_idx, lab_idx = np.where((self.prefer == 1) & (assignment == 0))
+        order = np.random.permutation(len(ta_idx)) if randomize else np.arange(len(ta_idx))
+        for ta, lab in zip(ta_idx[order], lab_idx[order]):
+            slot = self.lab_time_ids[lab]
+            if load[ta] < self.max_assigned[ta] and not busy[ta, slot]:
+                assignment[ta, lab] = 1
+                load[ta] += 1
+                busy[ta, slot] = True
+
+        return SparseAssignment.from_dense(assignment) if sparse else assignment
+
+    def seed_population(self, size: int, sparse: bool = False) -> list:
+        """
+        Parameters
+        ----------
+        size : int
+            Number of seed solutions.
+        sparse : bool
+            Return SparseAssignment seeds.
+
+        Returns
+        -------
+        list
+            The deterministic greedy assignment followed by size - 1 randomized greedy variants.
+        """
+        if size <= 0:
+            return []
+        seeds = [self.greedy_assignment(sparse=sparse)]
+        seeds += [self.greedy_assignment(randomize=True, sparse=sparse) for _ in range(size - 1)]
+        return seeds
 
     # ==== Agent Functions
     @profile
@@ -302,9 +695,12 @@ class AssignTa:
         -----------
         Randomly select one TA-lab pair and flip its assignment value (0 to 1 or 1 to 0).
         """
-        new_assignment = assignment.copy()
         ta_idx = np.random.choice(assignment.shape[0])
         lab_idx = np.random.choice(assignment.shape[1])
+        if isinstance(assignment, SparseAssignment):
+            return assignment.flip(ta_idx, lab_idx)
+
+        new_assignment = assignment.copy()
         new_assignment[ta_idx, lab_idx] = 1 - new_assignment[ta_idx, lab_idx]
         return new_assignment
 
@@ -329,6 +725,25 @@ class AssignTa:
         new_assignment = assignment.copy()
         num_assignments = min(5, self.prefer.shape[0])
 
+        if isinstance(assignment, SparseAssignment):
+            # Candidates are the precomputed preferred cells minus the assigned ones (both sorted,
+            # row-major) - O(preferred + assigned cells), never touches the full matrix
+            num_labs = assignment.shape[1]
+            preferred_cells = self.preference_index()["cells"]
+            assigned_cells = assignment.row_ids() * num_labs + assignment.indices
+            available_cells = preferred_cells[~np.isin(preferred_cells, assigned_cells, assume_unique=True)]
+            num_new = min(num_assignments, len(available_cells))
+            if num_new == 0:
+                return new_assignment
+
+            chosen = np.random.choice(available_cells, size=num_new, replace=False)
+            ta_idx, lab_idx = np.divmod(chosen, num_labs)
+            return SparseAssignment.from_cells(
+                np.concatenate([assignment.row_ids(), ta_idx]),
+                np.concatenate([assignment.indices, lab_idx]),
+                assignment.shape,
+            )
+
         for _ in range(num_assignments):
             unassigned_preferred = (self.prefer == 1) & (new_assignment == 0)
             available_slots = np.argwhere(unassigned_preferred)
@@ -359,8 +774,92 @@ class AssignTa:
         -----------
         Randomly select two TAs and swap their entire schedules (swap two rows in the array).
         """
-        new_assignment = assignment.copy()
         ta_idx1, ta_idx2 = np.random.choice(assignment.shape[0], size=2, replace=False)
+        if isinstance(assignment, SparseAssignment):
+            return assignment.swap_rows(ta_idx1, ta_idx2)
+
+        new_assignment = assignment.copy()
+        new_assignment[[ta_idx1, ta_idx2]] = new_assignment[[ta_idx2, ta_idx1]]
+        return new_assignment
+
+    @profile
+    def masked_flip_agent(self, assignment: np.ndarray) -> np.ndarray:
+        """
+        Parameters
+        ----------
+        assignment : np.ndarray
+            2D array where rows are TAs and columns are labs. A value of 1 indicates the TA is assigned to that lab, 0 otherwise.
+
+        Returns
+        -------
+        np.ndarray
+            Modified assignment array with one allowed TA-lab pair flipped.
+
+        Description
+        -----------
+        Like random_flip_agent, but samples only cells the TA is available for (see feasibility_index),
+        so a flip never creates an unavailable assignment.
+        """
+        allowed_cells = self.feasibility_index()["allowed_cells"]
+        if len(allowed_cells) == 0:
+            return assignment.copy()
+        ta_idx, lab_idx = divmod(int(np.random.choice(allowed_cells)), assignment.shape[1])
+        if isinstance(assignment, SparseAssignment):
+            return assignment.flip(ta_idx, lab_idx)
+
+        new_assignment = assignment.copy()
+        new_assignment[ta_idx, lab_idx] = 1 - new_assignment[ta_idx, lab_idx]
+        return new_assignment
+
+    @profile
+    def compatible_swap_agent(self, assignment: np.ndarray) -> np.ndarray:
+        """
+        Parameters
+        ----------
+        assignment : np.ndarray
+            2D array where rows are TAs and columns are labs. A value of 1 indicates the TA is assigned to that lab, 0 otherwise.
+
+        Returns
+        -------
+        np.ndarray
+            Modified assignment array with two compatible TAs' schedules swapped (unchanged if none exist).
+
+        Description
+        -----------
+        Like schedule_swapping_agent, but only swaps a TA holding labs with a TA who is available for
+        all of those labs, can take that many (max_assigned), and whose own labs the first TA can take.
+        """
+        index = self.feasibility_index()
+        is_sparse = isinstance(assignment, SparseAssignment)
+        row_counts = assignment.row_counts() if is_sparse else assignment.sum(axis=1)
+        busy_tas = np.flatnonzero(row_counts)
+        if len(busy_tas) == 0:
+            return assignment.copy()
+
+        ta_idx1 = np.random.choice(busy_tas)
+        labs1 = assignment.row(ta_idx1) if is_sparse else np.flatnonzero(assignment[ta_idx1] == 1)
+
+        # TAs allowed in every lab of ta_idx1, with room for them
+        candidates = reduce(np.intersect1d, (index["lab_tas"][lab] for lab in labs1))
+        candidates = candidates[(candidates != ta_idx1) & (self.max_assigned[candidates] >= len(labs1))]
+        candidates = candidates[row_counts[candidates] <= self.max_assigned[ta_idx1]]
+
+        # ... whose own labs ta_idx1 is allowed in
+        blocked_labs = ~index["allowed"][ta_idx1]
+        if is_sparse:
+            blocked = np.zeros(assignment.shape[0], dtype=bool)
+            blocked[assignment.row_ids()[blocked_labs[assignment.indices]]] = True
+        else:
+            blocked = (assignment[:, blocked_labs] == 1).any(axis=1)
+        candidates = candidates[~blocked[candidates]]
+        if len(candidates) == 0:
+            return assignment.copy()
+
+        ta_idx2 = np.random.choice(candidates)
+        if is_sparse:
+            return assignment.swap_rows(ta_idx1, ta_idx2)
+
+        new_assignment = assignment.copy()
         new_assignment[[ta_idx1, ta_idx2]] = new_assignment[[ta_idx2, ta_idx1]]
         return new_assignment
 
@@ -404,10 +903,136 @@ class AssignTa:
                     keep_lab = np.random.choice(labs_at_time)
                     for lab_idx in labs_at_time:
                         if lab_idx != keep_lab:
-                            new_assignment[ta_idx, lab_idx] = 0
+                            new_assignment = self._unassign(new_assignment, ta_idx, lab_idx)
 
         return new_assignment
 
+    def move_deltas(self, assignment: np.ndarray, row_sums=None, col_sums=None, slot_counts=None) -> tuple:
+        """
+        Parameters
+        ----------
+        assignment : np.ndarray
+            2D array where rows are TAs and columns are labs. A value of 1 indicates the TA is assigned to that lab, 0 otherwise.
+        row_sums, col_sums, slot_counts : np.ndarray, optional
+            Cached labs per TA, TAs per lab and labs per (TA, timeslot). Computed when not given.
+
+        Returns
+        -------
+        tuple
+            (flip, remove, add) arrays shaped like assignment, in unscaled aggregate units
+            (multiply by 1 / AGGREGATE_SCALE for aggregatescore).
+            flip[t, l] is the change from toggling cell (t, l). remove / add are the parts of removing
+            an assigned / adding an unassigned cell that do not depend on the lab's coverage - moving lab l
+            from TA i to TA j changes the aggregate by remove[i, l] + add[j, l].
+
+        Description
+        -----------
+        Incremental move evaluation: every single-cell move is scored from the cached sums and the masks,
+        without rescoring any assignment.
+        """
+        w = self.AGGREGATE_WEIGHTS
+        if row_sums is None:
+            row_sums = assignment.sum(axis=1)
+        if col_sums is None:
+            col_sums = assignment.sum(axis=0)
+        if slot_counts is None:
+            slot_counts = assignment @ np.eye(self.num_timeslots, dtype=int)[self.lab_time_ids]
+
+        labs_in_slot = slot_counts[:, self.lab_time_ids]  # TA's labs sharing each lab's timeslot
+        conflicting_slots = (slot_counts > 1).sum(axis=1)
+        has_conflict = (conflicting_slots > 0)[:, np.newaxis]
+        cell_cost = w["unavailable"] * (self.unavail == 1) + w["unpreferred"] * (self.willing == 1)
+
+        add = (
+            w["overallocation"] * (row_sums >= self.max_assigned)[:, np.newaxis]
+            + w["conflicts"] * (~has_conflict & (labs_in_slot >= 1))
+            + cell_cost
+        )
+        remove = -(
+            w["overallocation"] * (row_sums > self.max_assigned)[:, np.newaxis]
+            + w["conflicts"] * (has_conflict & (conflicting_slots[:, np.newaxis] - (labs_in_slot == 2) == 0))
+            + cell_cost
+        )
+        flip = np.where(
+            assignment == 1,
+            remove + w["undersupport"] * (col_sums <= self.min_ta),
+            add - w["undersupport"] * (col_sums < self.min_ta),
+        )
+        return flip, remove, add
+
+    @profile
+    def local_search_agent(self, assignment: np.ndarray, max_moves: int = 10) -> np.ndarray:
+        """
+        Parameters
+        ----------
+        assignment : np.ndarray
+            2D array where rows are TAs and columns are labs. A value of 1 indicates the TA is assigned to that lab, 0 otherwise.
+        max_moves : int
+            Maximum number of improving moves to apply.
+
+        Returns
+        -------
+        np.ndarray
+            Modified assignment array after hill-climbing on the aggregate objective.
+
+        Description
+        -----------
+        Each step scores every single-cell flip and every TA-to-TA reassignment of a lab in one vectorized
+        pass (see move_deltas), then applies the best improving move. Row, column and timeslot sums are
+        updated incrementally. Stops at a local optimum or after max_moves moves.
+        Every step is O(num_tas x num_labs): a sparse assignment is expanded to dense, so run_optimization
+        does not register this agent in sparse mode.
+        """
+        is_sparse = isinstance(assignment, SparseAssignment)
+        new_assignment = assignment.to_dense() if is_sparse else assignment.copy()
+
+        row_sums = new_assignment.sum(axis=1)
+        col_sums = new_assignment.sum(axis=0)
+        slot_counts = new_assignment @ np.eye(self.num_timeslots, dtype=int)[self.lab_time_ids]
+        assigned = new_assignment == 1
+
+        for _ in range(max_moves):
+            flip, remove, add = self.move_deltas(new_assignment, row_sums, col_sums, slot_counts)
+
+            # Random tie-breaking keeps repeated calls from always taking the same move
+            flip = flip + np.random.uniform(0, 1e-6, size=flip.shape)
+            best_flip = np.unravel_index(np.argmin(flip), flip.shape)
+
+            remove = np.where(assigned, remove, np.inf)
+            add = np.where(assigned, np.inf, add)
+            from_ta, to_ta = remove.argmin(axis=0), add.argmin(axis=0)
+            reassign = remove.min(axis=0) + add.min(axis=0)
+            best_lab = np.argmin(reassign)
+
+            if min(flip[best_flip], reassign[best_lab]) >= 0:
+                break
+
+            if flip[best_flip] <= reassign[best_lab]:
+                ta_idx, lab_idx = best_flip
+                change = 1 - 2 * new_assignment[ta_idx, lab_idx]
+                moves = [(ta_idx, lab_idx, change)]
+            else:
+                moves = [(from_ta[best_lab], best_lab, -1), (to_ta[best_lab], best_lab, 1)]
+
+            for ta_idx, lab_idx, change in moves:
+                new_assignment[ta_idx, lab_idx] += change
+                assigned[ta_idx, lab_idx] = change > 0
+                row_sums[ta_idx] += change
+                col_sums[lab_idx] += change
+                slot_counts[ta_idx, self.lab_time_ids[lab_idx]] += change
+
+        return SparseAssignment.from_dense(new_assignment) if is_sparse else new_assignment
+
+    @staticmethod
+    def _unassign(assignment, ta_idx: int, lab_idx: int):
+        """
+        Clear one TA-lab cell in place (dense) or via a new assignment (sparse)
+        """
+        if isinstance(assignment, SparseAssignment):
+            return assignment.set(ta_idx, lab_idx, 0)
+        assignment[ta_idx, lab_idx] = 0
+        return assignment
+
     @profile
     def undersupport_agent(self, assignment: np.ndarray) -> np.ndarray:
         """
@@ -426,7 +1051,8 @@ class AssignTa:
         Assign an available, conflict-free TA to the most undersupported lab.
         """
         new_assignment = assignment.copy()
-        allocated_per_lab = assignment.sum(axis=0)
+        is_sparse = isinstance(assignment, SparseAssignment)
+        allocated_per_lab = assignment.col_counts() if is_sparse else assignment.sum(axis=0)
         undersupport = np.maximum(self.min_ta - allocated_per_lab, 0)
         max_undersupport = undersupport.max()
 
@@ -436,7 +1062,12 @@ class AssignTa:
         most_undersupported_labs = np.where(undersupport == max_undersupport)[0]
         lab_idx = np.random.choice(most_undersupported_labs)
 
-        available_tas = (self.unavail[:, lab_idx] == 0) & (assignment[:, lab_idx] == 0)
+        if is_sparse:
+            assigned_to_lab = np.zeros(assignment.shape[0], dtype=bool)
+            assigned_to_lab[assignment.row_ids()[assignment.indices == lab_idx]] = True
+        else:
+            assigned_to_lab = assignment[:, lab_idx] == 1
+        available_tas = (self.unavail[:, lab_idx] == 0) & ~assigned_to_lab
         available_ta_indices = np.where(available_tas)[0]
 
         if len(available_ta_indices) == 0:
@@ -446,7 +1077,7 @@ class AssignTa:
         conflict_free_tas = []
 
         for ta_idx in available_ta_indices:
-            assigned_labs = np.where(assignment[ta_idx] == 1)[0]
+            assigned_labs = assignment.row(ta_idx) if is_sparse else np.where(assignment[ta_idx] == 1)[0]
             assigned_times = self.lab_times[assigned_labs]
             if lab_time not in assigned_times:
                 conflict_free_tas.append(ta_idx)
@@ -455,6 +1086,373 @@ class AssignTa:
             return new_assignment
 
         ta_idx = np.random.choice(conflict_free_tas)
+        if is_sparse:
+            return assignment.set(ta_idx, lab_idx, 1)
         new_assignment[ta_idx, lab_idx] = 1
 
         return new_assignment
+
+    # ==== Crossover Functions
+    @staticmethod
+    def _as_batch(parents) -> np.ndarray:
+        """
+        Stack dense or sparse parents into a (batch, num_tas, num_labs) array (a single 2D parent becomes a batch of 1)
+        """
+        if isinstance(parents, SparseAssignment):
+            return parents.to_dense()[np.newaxis]
+        if isinstance(parents, np.ndarray):
+            return parents[np.newaxis] if parents.ndim == 2 else parents
+        return np.stack([p.to_dense() if isinstance(p, SparseAssignment) else p for p in parents])
+
+    @profile
+    def row_crossover(self, parents_a, parents_b) -> np.ndarray:
+        """
+        Parameters
+        ----------
+        parents_a, parents_b : np.ndarray
+            Batches of parent assignments shaped (batch, num_tas, num_labs), or single 2D assignments.
+
+        Returns
+        -------
+        np.ndarray
+            Batch of children; each TA's whole schedule (row) comes from either parent with equal probability.
+        """
+        a, b = self._as_batch(parents_a), self._as_batch(parents_b)
+        take_a = np.random.random_sample((a.shape[0], a.shape[1], 1)) < 0.5
+        return np.where(take_a, a, b)
+
+    @profile
+    def column_crossover(self, parents_a, parents_b) -> np.ndarray:
+        """
+        Parameters
+        ----------
+        parents_a, parents_b : np.ndarray
+            Batches of parent assignments shaped (batch, num_tas, num_labs), or single 2D assignments.
+
+        Returns
+        -------
+        np.ndarray
+            Batch of children; each lab's whole staffing (column) comes from either parent with equal probability.
+        """
+        a, b = self._as_batch(parents_a), self._as_batch(parents_b)
+        take_a = np.random.random_sample((a.shape[0], 1, a.shape[2])) < 0.5
+        return np.where(take_a, a, b)
+
+    def row_violations(self, batch: np.ndarray) -> np.ndarray:
+        """
+        Per-TA hard/medium violations for a batch: unavailable cells + overallocation + 1 if the TA has a conflict
+        """
+        slot_counts = batch @ np.eye(self.num_timeslots, dtype=int)[self.lab_time_ids]
+        return (
+            ((self.unavail == 1) & (batch == 1)).sum(axis=2)
+            + np.maximum(batch.sum(axis=2) - self.max_assigned, 0)
+            + (slot_counts > 1).any(axis=2)
+        )
+
+    @profile
+    def repair_crossover(self, parents_a, parents_b) -> np.ndarray:
+        """
+        Parameters
+        ----------
+        parents_a, parents_b : np.ndarray
+            Batches of parent assignments shaped (batch, num_tas, num_labs), or single 2D assignments.
+
+        Returns
+        -------
+        np.ndarray
+            Batch of children built from each TA's better row, with unavailable cells cleared.
+
+        Description
+        -----------
+        Constraint-repairing crossover: for every TA keep the parent row with fewer violations
+        (see row_violations, ties broken randomly), then drop any assignment the TA is unavailable for.
+        """
+        a, b = self._as_batch(parents_a), self._as_batch(parents_b)
+        violations_a, violations_b = self.row_violations(a), self.row_violations(b)
+        coin = np.random.random_sample(violations_a.shape) < 0.5
+        take_a = (violations_a < violations_b) | ((violations_a == violations_b) & coin)
+        child = np.where(take_a[:, :, np.newaxis], a, b)
+        child[:, self.unavail == 1] = 0
+        return child
+
+    def sparse_row_violations(self, assignment: SparseAssignment) -> np.ndarray:
+        """
+        Per-TA violations of one sparse assignment, as row_violations, from its assigned cells only
+        """
+        rows, labs = assignment.row_ids(), assignment.indices
+        num_tas = assignment.shape[0]
+        unavailable = np.bincount(rows[self.unavail[rows, labs] == 1], minlength=num_tas)
+        overallocation = np.maximum(assignment.row_counts() - self.max_assigned, 0)
+        slot_keys, counts = np.unique(rows * self.num_timeslots + self.lab_time_ids[labs], return_counts=True)
+        conflicted = np.zeros(num_tas, dtype=int)
+        conflicted[slot_keys[counts > 1] // self.num_timeslots] = 1
+        return unavailable + overallocation + conflicted
+
+    def _sparse_row_crossover(self, parent_a: SparseAssignment, parent_b: SparseAssignment) -> SparseAssignment:
+        """
+        row_crossover of two sparse parents, splicing their CSR rows
+        """
+        return parent_a.take_rows(parent_b, np.random.random_sample(parent_a.shape[0]) < 0.5)
+
+    def _sparse_column_crossover(self, parent_a: SparseAssignment, parent_b: SparseAssignment) -> SparseAssignment:
+        """
+        column_crossover of two sparse parents, filtering their assigned cells by lab
+        """
+        return parent_a.take_cols(parent_b, np.random.random_sample(parent_a.shape[1]) < 0.5)
+
+    def _sparse_repair_crossover(self, parent_a: SparseAssignment, parent_b: SparseAssignment) -> SparseAssignment:
+        """
+        repair_crossover of two sparse parents: better CSR row per TA, then unavailable cells dropped
+        """
+        violations_a, violations_b = self.sparse_row_violations(parent_a), self.sparse_row_violations(parent_b)
+        coin = np.random.random_sample(violations_a.shape) < 0.5
+        child = parent_a.take_rows(parent_b, (violations_a < violations_b) | ((violations_a == violations_b) & coin))
+        return child.drop_cells(self.unavail[child.row_ids(), child.indices] == 1)
+
+    def _crossover_agent(self, crossover, sparse_crossover, parents: list):
+        """
+        Recombine the first two parents, keeping the parents' representation
+
+        Evo hands each agent one parent set, so the agents recombine one pair per child; the batched
+        operators above serve callers that recombine many pairs at once. Sparse pairs are recombined
+        on their CSR structure, in O(assigned cells).
+        """
+        parent_a, parent_b = parents[0], parents[1]
+        if isinstance(parent_a, SparseAssignment) and isinstance(parent_b, SparseAssignment):
+            return sparse_crossover(parent_a, parent_b)
+        child = crossover(parent_a, parent_b)[0]
+        return SparseAssignment.from_dense(child) if isinstance(parent_a, SparseAssignment) else child
+
+    @profile
+    def row_crossover_agent(self, parents: list) -> np.ndarray:
+        """
+        Agent wrapper (k=2): uniform per-TA crossover of two parents
+        """
+        return self._crossover_agent(self.row_crossover, self._sparse_row_crossover, parents)
+
+    @profile
+    def column_crossover_agent(self, parents: list) -> np.ndarray:
+        """
+        Agent wrapper (k=2): uniform per-lab crossover of two parents
+        """
+        return self._crossover_agent(self.column_crossover, self._sparse_column_crossover, parents)
+
+    @profile
+    def repair_crossover_agent(self, parents: list) -> np.ndarray:
+        """
+        Agent wrapper (k=2): constraint-repairing per-TA crossover of two parents
+        """
+        return self._crossover_agent(self.repair_crossover, self._sparse_repair_crossover, parents)
+
+    # ==== Repair Functions
+    @profile
+    def repair(self, assignments) -> np.ndarray:
+        """
+        Parameters
+        ----------
+        assignments : np.ndarray
+            A single 2D assignment or a batch shaped (batch, num_tas, num_labs).
+
+        Returns
+        -------
+        np.ndarray
+            Repaired copy with the same shape: no unavailable cells, no time conflicts, no overallocation.
+
+        Description
+        -----------
+        Vectorized over the whole batch, and only ever removes assignments:
+        1. clear every cell where the TA is unavailable
+        2. in each (TA, timeslot) with several labs keep one of them
+        3. trim each TA down to max_assigned labs
+        Survivors in steps 2 and 3 are chosen at random, preferring preferred labs over willing ones.
+        """
+        single = assignments.ndim == 2
+        batch = assignments[np.newaxis] if single else assignments
+        assigned = (batch == 1) & (self.unavail == 0)
+
+        # Random keep-priority per assigned cell; preferred cells always outrank willing ones
+        priority = np.where(assigned, np.random.random_sample(batch.shape) + self.prefer, -1.0)
+
+        # Keep the highest-priority lab in each timeslot (labs grouped by slot for reduceat)
+        order = np.argsort(self.lab_time_ids, kind="stable")
+        slots = self.lab_time_ids[order]
+        starts = np.flatnonzero(np.r_[True, slots[1:] != slots[:-1]])
+        slot_best = np.maximum.reduceat(priority[:, :, order], starts, axis=2)
+        best = np.empty_like(priority)
+        best[:, :, order] = np.repeat(slot_best, np.diff(np.r_[starts, len(order)]), axis=2)
+        assigned &= priority == best
+
+        # Keep each TA's max_assigned highest-priority labs
+        priority[~assigned] = -1.0
+        rank = np.empty(batch.shape, dtype=int)
+        np.put_along_axis(rank, np.argsort(-priority, axis=2), np.arange(batch.shape[2]), axis=2)
+        assigned &= rank < np.asarray(self.max_assigned)[:, np.newaxis]
+
+        repaired = assigned.astype(batch.dtype)
+        return repaired[0] if single else repaired
+
+    @profile
+    def repair_sparse(self, assignments: list) -> list:
+        """
+        Parameters
+        ----------
+        assignments : list
+            Sparse assignments (SparseAssignment).
+
+        Returns
+        -------
+        list
+            Repaired sparse assignments, with the same guarantees as repair.
+
+        Description
+        -----------
+        repair on the CSR structure, in O(assigned cells log assigned cells) for the whole list: the assigned
+        cells of every assignment are pooled, with (assignment, TA) as the row, and the same three steps keep
+        the highest-priority cell per (row, timeslot) and the max_assigned highest-priority cells per row.
+        """
+        num_tas, num_labs = self.unavail.shape
+        nnz = np.array([sol.nnz for sol in assignments], dtype=np.int64)
+        tas = np.concatenate([sol.row_ids() for sol in assignments] + [np.empty(0, dtype=np.int64)])
+        labs = np.concatenate([sol.indices for sol in assignments] + [np.empty(0, dtype=np.int64)])
+        rows = np.repeat(np.arange(len(assignments)), nnz) * num_tas + tas
+
+        # 1. Unavailable cells never survive
+        keep = np.asarray(self.unavail)[tas, labs] == 0
+        priority = np.random.random_sample(len(labs)) + np.asarray(self.prefer)[tas, labs]
+
+        # 2. Highest-priority lab in each (row, timeslot)
+        slots = self.lab_time_ids[labs]
+        order = np.flatnonzero(keep)[np.lexsort((-priority[keep], slots[keep], rows[keep]))]
+        repeated = (rows[order][1:] == rows[order][:-1]) & (slots[order][1:] == slots[order][:-1])
+        keep[order[1:][repeated]] = False
+
+        # 3. Each row's max_assigned highest-priority labs
+        order = np.flatnonzero(keep)[np.lexsort((-priority[keep], rows[keep]))]
+        starts = np.flatnonzero(np.r_[True, rows[order][1:] != rows[order][:-1]])
+        rank = np.arange(len(order)) - np.repeat(starts, np.diff(np.r_[starts, len(order)]))
+        keep[order[rank >= np.asarray(self.max_assigned)[tas[order]]]] = False
+
+        # Surviving cells are still in row-major order, so each assignment is a slice
+        repaired = []
+        for start, end in zip(np.r_[0, np.cumsum(nnz)[:-1]], np.cumsum(nnz)):
+            kept = keep[start:end]
+            indptr = np.zeros(num_tas + 1, dtype=np.int64)
+            np.cumsum(np.bincount(tas[start:end][kept], minlength=num_tas), out=indptr[1:])
+            repaired.append(SparseAssignment(indptr, labs[start:end][kept], (num_tas, num_labs)))
+        return repaired
+
+    def repair_children(self, children: list) -> list:
+        """
+        Evo repair hook (Evo.set_repair): repair a list of dense or sparse children, keeping each child's
+        representation - dense children in one batch (repair), sparse ones on their CSR structure (repair_sparse)
+        """
+        is_sparse = [isinstance(child, SparseAssignment) for child in children]
+        dense = [child for child, sparse in zip(children, is_sparse) if not sparse]
+        dense = iter(self.repair(np.stack(dense)) if dense else [])
+        sparse = iter(self.repair_sparse([child for child, flag in zip(children, is_sparse) if flag]))
+        return [next(sparse) if flag else next(dense) for flag in is_sparse]
+
+    # ==== Delta Evaluation
+    def problem_changes(self, old: dict):
+        """
+        Parameters
+        ----------
+        old : dict
+            Problem arrays (problem_arrays()) the existing scores were computed against.
+
+        Returns
+        -------
+        dict or None
+            Index arrays of what changed: "rows" (TAs whose availability, preferences or max_assigned
+            changed), "cols" (sections whose min_ta changed) and "time_cols" (sections whose time changed).
+            None when the problems are not comparable (different TAs or sections).
+
+        Description
+        -----------
+        Diff of two versions of the same problem, used by delta_scores to rescore old solutions
+        after an edit to tas.csv / sections.csv.
+        """
+        new = self.problem_arrays()
+        if old["unavail"].shape != new["unavail"].shape or not np.array_equal(old["ta_names"], new["ta_names"]):
+            return None
+        rows = (
+            (old["unavail"] != new["unavail"]).any(axis=1)
+            | (old["willing"] != new["willing"]).any(axis=1)
+            | (old["max_assigned"] != new["max_assigned"])
+        )
+        return {
+            "rows": np.flatnonzero(rows),
+            "cols": np.flatnonzero(old["min_ta"] != new["min_ta"]),
+            "time_cols": np.flatnonzero(old["lab_times"] != new["lab_times"]),
+        }
+
+    @staticmethod
+    def _conflicting_rows(assigned: np.ndarray, lab_time_ids: np.ndarray) -> int:
+        """
+        Number of rows of a boolean assignment block holding two labs in one timeslot
+        """
+        onehot = np.eye(int(lab_time_ids.max()) + 1, dtype=np.int64)[lab_time_ids]
+        return int(((assigned.astype(np.int64) @ onehot) > 1).any(axis=1).sum())
+
+    def delta_scores(self, assignment: np.ndarray, scores: tuple, old: dict, changes: dict) -> tuple:
+        """
+        Parameters
+        ----------
+        assignment : np.ndarray
+            Dense or sparse assignment scored against the old problem.
+        scores : tuple
+            Its score_all values under the old problem.
+        old : dict
+            The old problem arrays.
+        changes : dict
+            problem_changes(old).
+
+        Returns
+        -------
+        tuple
+            score_all values under the current problem.
+
+        Description
+        -----------
+        Every objective is a sum of per-TA or per-cell terms (overallocation, unavailable, unpreferred),
+        per-section terms (undersupport) or per-TA conflict flags, so only the changed rows / columns
+        (and, for conflicts, the TAs holding a retimed section) are recomputed, old minus new.
+        """
+        dense = assignment.to_dense() if isinstance(assignment, SparseAssignment) else assignment
+        assigned = dense == 1
+        overallocation, conflicts, undersupport, unavailable, unpreferred = scores[:5]
+
+        rows = changes["rows"]
+        if len(rows):
+            block = assigned[rows]
+            counts = block.sum(axis=1)
+            overallocation += int(
+                np.maximum(counts - self.max_assigned[rows], 0).sum()
+                - np.maximum(counts - old["max_assigned"][rows], 0).sum()
+            )
+            unavailable += int(
+                np.count_nonzero(block & (self.unavail[rows] == 1)) - np.count_nonzero(block & (old["unavail"][rows] == 1))
+            )
+            unpreferred += int(
+                np.count_nonzero(block & (self.willing[rows] == 1)) - np.count_nonzero(block & (old["willing"][rows] == 1))
+            )
+
+        cols = changes["cols"]
+        if len(cols):
+            counts = assigned[:, cols].sum(axis=0)
+            undersupport += int(
+                np.maximum(self.min_ta[cols] - counts, 0).sum() - np.maximum(old["min_ta"][cols] - counts, 0).sum()
+            )
+
+        time_cols = changes["time_cols"]
+        if len(time_cols):
+            block = assigned[assigned[:, time_cols].any(axis=1)]
+            if len(block):
+                conflicts += self._conflicting_rows(block, self.lab_time_ids) - self._conflicting_rows(
+                    block, old["lab_time_ids"]
+                )
+
+        values = (
+            int(overallocation), int(conflicts), int(undersupport), int(unavailable), int(unpreferred),
+        )
+        return values + (self._aggregate(values),)
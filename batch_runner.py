@@ -0,0 +1,234 @@
+"""
+Authors: Cassandra Cinzori and Ian Solberg
+File: batch_runner.py
+Description: batch service - optimize many (tas.csv, sections.csv) problems concurrently from a manifest
+"""
+
+import argparse
+import contextlib
+import csv
+import json
+import os
+import random as rnd
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+# Manifest columns: name, tas, sections are required; the rest override the batch defaults per job
+MANIFEST_FIELDS = ("name", "tas", "sections", "time_limit", "iterations", "seed")
+
+# One row per job in batch_summary.csv
+SUMMARY_FIELDS = (
+    "name", "status", "seed", "seconds", "evaluations", "evals_per_sec",
+    "front_size", "best_aggregate", "conflicts", "unavailable", "output_dir", "error",
+)
+
+
+def load_manifest(path: str) -> list:
+    """
+    Read a CSV manifest into job dicts
+
+    Relative tas/sections paths are resolved against the manifest's directory.
+    """
+    base = os.path.dirname(os.path.abspath(path))
+    jobs = []
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            missing = [field for field in ("name", "tas", "sections") if not row.get(field)]
+            if missing:
+                raise ValueError(f"Manifest row {row} is missing {', '.join(missing)}")
+            job = {"name": row["name"].strip()}
+            for field in ("tas", "sections"):
+                job[field] = os.path.join(base, row[field].strip())
+            if row.get("time_limit"):
+                job["time_limit"] = float(row["time_limit"])
+            if row.get("iterations"):
+                job["iterations"] = int(row["iterations"])
+            if row.get("seed"):
+                job["seed"] = int(row["seed"])
+            jobs.append(job)
+
+    names = [job["name"] for job in jobs]
+    if len(set(names)) != len(names):
+        raise ValueError("Manifest job names must be unique (they name the output directories)")
+    return jobs
+
+
+def run_job(job: dict, output_root: str, defaults: dict) -> dict:
+    """
+    Optimize one problem inside a pool worker; outputs go to output_root/<name>/
+
+    Console output is captured in <name>/run.log so concurrent jobs do not interleave.
+    Failures are reported in the returned row rather than raised, so one bad
+    problem does not stop the batch.
+    """
+    # Imported here so the parent process stays light and each worker builds its own state
+    import run_optimization
+    from profiler import Profiler
+
+    settings = {**defaults, **job}
+    output_dir = os.path.join(output_root, job["name"])
+    os.makedirs(output_dir, exist_ok=True)
+    row = {"name": job["name"], "seed": settings.get("seed"), "output_dir": output_dir, "status": "ok", "error": ""}
+
+    if settings.get("seed") is not None:
+        np.random.seed(settings["seed"])
+        rnd.seed(settings["seed"])
+    Profiler.reset()
+    Profiler.enabled = settings["profile"]
+
+    start = time.monotonic()
+    with open(os.path.join(output_dir, "run.log"), "w") as log, contextlib.redirect_stdout(log):
+        try:
+            summary, evo, a = run_optimization.optimize_ta_assignment(
+                time_limit=settings["time_limit"],
+                ta_file=settings["tas"],
+                lab_file=settings["sections"],
+                n=settings.get("iterations"),
+                reserve=settings["reserve"],
+                dom=settings["dom"],
+                status=0,
+                init_pop=settings["init_pop"],
+                cache_dir=settings["cache_dir"],
+                group_name=settings["group"],
+            )
+            summary.to_csv(os.path.join(output_dir, f"{settings['group']}_summary.csv"), index=False)
+            run_optimization.save_best_solution(evo, a, output_dir=output_dir)
+            if Profiler.enabled:
+                Profiler.report(output_file=os.path.join(output_dir, f"{settings['group']}_profile.txt"))
+
+            best, _ = run_optimization.best_by_aggregate(evo)
+            row.update(
+                evaluations=evo.evaluations,
+                front_size=evo.size(),
+                best_aggregate=best["aggregatescore"],
+                conflicts=best["conflicts"],
+                unavailable=best["unavailable"],
+            )
+        except Exception as e:
+            traceback.print_exc(file=log)
+            row.update(status="failed", error=f"{type(e).__name__}: {e}", evaluations=0)
+
+    row["seconds"] = round(time.monotonic() - start, 3)
+    row["evals_per_sec"] = round(row["evaluations"] / row["seconds"], 1) if row["seconds"] > 0 else 0.0
+    return row
+
+
+def run_batch(jobs: list, output_root: str, processes: int = None, **defaults) -> dict:
+    """
+    Run every job across a process pool (one job per worker at a time)
+
+    defaults: time_limit, reserve, dom, init_pop, cache_dir, group, profile - overridable
+    per job by the manifest - and seed, the root from which jobs without their own seed
+    get independent ones (None: fresh entropy). Writes the per-job rows to
+    output_root/batch_summary.csv and the aggregate throughput stats to
+    output_root/batch_stats.json, and returns the stats.
+    """
+    settings = {
+        "time_limit": 60.0, "reserve": 0.5, "dom": "auto", "init_pop": 20,
+        "cache_dir": None, "group": "CassIan", "profile": True, "seed": None,
+    }
+    settings.update(defaults)
+    os.makedirs(output_root, exist_ok=True)
+
+    # Unseeded jobs get independent seeds; forked workers would otherwise share the parent's RNG state
+    seeds = np.random.SeedSequence(settings.get("seed")).spawn(len(jobs))
+    jobs = [job if job.get("seed") is not None else {**job, "seed": int(seq.generate_state(1)[0])}
+            for job, seq in zip(jobs, seeds)]
+
+    start = time.monotonic()
+    rows = []
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        futures = {pool.submit(run_job, job, output_root, settings): job for job in jobs}
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                row = future.result()
+            except Exception as e:
+                # The worker itself died (e.g. BrokenProcessPool) - record it and keep the finished rows
+                row = {
+                    "name": job["name"], "seed": job["seed"], "status": "failed",
+                    "error": f"{type(e).__name__}: {e}", "seconds": 0.0, "evaluations": 0,
+                    "evals_per_sec": 0.0, "output_dir": os.path.join(output_root, job["name"]),
+                }
+            rows.append(row)
+            print(f"[{len(rows)}/{len(jobs)}] {row['name']}: {row['status']} in {row['seconds']:.1f}s"
+                  f" | {row['evaluations']} evaluations" + (f" | {row['error']}" if row["error"] else ""))
+    wall = time.monotonic() - start
+
+    rows.sort(key=lambda row: [job["name"] for job in jobs].index(row["name"]))
+    with open(os.path.join(output_root, "batch_summary.csv"), "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS, restval="")
+        writer.writeheader()
+        writer.writerows(rows)
+
+    evaluations = sum(row["evaluations"] for row in rows)
+    job_seconds = sum(row["seconds"] for row in rows)
+    stats = {
+        "jobs": len(rows),
+        "failed": sum(row["status"] != "ok" for row in rows),
+        "wall_seconds": round(wall, 3),
+        "job_seconds": round(job_seconds, 3),
+        "parallel_speedup": round(job_seconds / wall, 2) if wall > 0 else 0.0,
+        "evaluations": evaluations,
+        "evals_per_sec": round(evaluations / wall, 1) if wall > 0 else 0.0,
+        "jobs_per_hour": round(len(rows) * 3600 / wall, 1) if wall > 0 else 0.0,
+        "processes": processes or os.cpu_count(),
+        "seed": settings["seed"],
+    }
+    with open(os.path.join(output_root, "batch_stats.json"), "w") as f:
+        json.dump(stats, f, indent=2)
+    return stats
+
+
+def parse_args(argv=None):
+    """Command-line options for a batch run"""
+    from run_optimization import prune_interval
+    import problem_cache
+
+    parser = argparse.ArgumentParser(description="Optimize many TA assignment problems from a manifest")
+    parser.add_argument("manifest", help=f"CSV with columns {', '.join(MANIFEST_FIELDS)} (last three optional)")
+    parser.add_argument("--processes", type=int, default=None, help="Concurrent jobs (default: CPU count)")
+    parser.add_argument("--time-limit", type=float, default=60, help="Default per-job wall time budget in seconds")
+    parser.add_argument("--reserve", type=float, default=0.5, help="Seconds of each budget held back for outputs")
+    parser.add_argument("--dom", type=prune_interval, default="auto", help='Prune interval or "auto"')
+    parser.add_argument("--init-pop", type=int, default=20, help="Seed solutions per job")
+    parser.add_argument("--cache-dir", default=problem_cache.DEFAULT_CACHE_DIR, help="Compiled problem cache")
+    parser.add_argument("--output-dir", default=os.path.join("outputs", "batch"), help="Root of per-job output dirs")
+    parser.add_argument("--group", default="CassIan", help="Group name used in the summaries")
+    parser.add_argument("--profile", choices=["on", "off"], default="on", help="Write a profile per job")
+    parser.add_argument("--seed", type=int, default=None, help="Root seed for jobs without their own (reproducible batch)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    jobs = load_manifest(args.manifest)
+    print(f"Running {len(jobs)} jobs from {args.manifest} -> {args.output_dir}/")
+    stats = run_batch(
+        jobs,
+        args.output_dir,
+        processes=args.processes,
+        time_limit=args.time_limit,
+        reserve=args.reserve,
+        dom=args.dom,
+        init_pop=args.init_pop,
+        cache_dir=args.cache_dir,
+        group=args.group,
+        profile=args.profile == "on",
+        seed=args.seed,
+    )
+
+    print("-" * 60)
+    print(f"Jobs: {stats['jobs']} ({stats['failed']} failed) | Wall time: {stats['wall_seconds']:.1f}s"
+          f" | Job time: {stats['job_seconds']:.1f}s (x{stats['parallel_speedup']} parallel)")
+    print(f"Evaluations: {stats['evaluations']} | {stats['evals_per_sec']:.0f}/s"
+          f" | {stats['jobs_per_hour']:.0f} jobs/hour")
+    print(f"✅ {os.path.join(args.output_dir, 'batch_summary.csv')}")
+    print(f"✅ {os.path.join(args.output_dir, 'batch_stats.json')}")
+
+
+if __name__ == "__main__":
+    main()
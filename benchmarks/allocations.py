@@ -0,0 +1,63 @@
+"""
+Authors: Cassandra Cinzori and Ian Solberg
+File: benchmarks/allocations.py
+Description: allocation benchmark - traced heap memory of steady-state objective scoring (tracemalloc)
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import kernels  # noqa: E402
+from assignta import AssignTa  # noqa: E402
+from profiler import Profiler  # noqa: E402
+
+
+def traced(f, assignment, calls: int) -> tuple:
+    """(peak traced bytes, retained bytes, seconds per call) over calls steady-state calls of f"""
+    f(assignment)  # warm up: scratch buffers, JIT compilation
+    start = time.perf_counter()
+    for _ in range(calls):
+        f(assignment)
+    elapsed = time.perf_counter() - start  # timed untraced - tracemalloc slows every allocation
+
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    for _ in range(calls):
+        f(assignment)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak - base, current - base, elapsed / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=10_000)
+    args = parser.parse_args()
+
+    Profiler.enabled = False  # measure the objectives, not the profiler's bookkeeping
+    a = AssignTa()
+    a.load_problem(os.path.join(ROOT, "assignta_data/tas.csv"), os.path.join(ROOT, "assignta_data/sections.csv"))
+    assignment = a.greedy_assignment()
+
+    cases = {name: getattr(a, name) for name in AssignTa.SCORE_NAMES[:5]}
+    cases["score_all"] = a.score_all
+    cases["numpy kernel (allocating)"] = lambda sol: kernels.objectives_numpy(
+        sol, a.unavail, a.willing, a.max_assigned, a.min_ta, a.lab_time_ids, a.num_timeslots
+    )
+
+    print(f"Assignment: {assignment.shape}, {assignment.nbytes} bytes | Numba: {kernels.HAVE_NUMBA}")
+    print(f"{'Case':28s} {'Peak B':>8s} {'Kept B':>8s} {'us/call':>9s}")
+    print("-" * 56)
+    for name, f in cases.items():
+        peak, kept, per_call = traced(f, assignment, args.calls)
+        print(f"{name:28s} {peak:8d} {kept:8d} {per_call * 1e6:9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Authors: Cassandra Cinzori and Ian Solberg
+File: benchmarks/parallel_eval.py
+Description: parallel scoring benchmark - serial vs thread pool vs process pool (Evo.score_batch)
+"""
+
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import kernels  # noqa: E402
+from assignta import AssignTa  # noqa: E402
+from evo import Evo  # noqa: E402
+from profiler import Profiler  # noqa: E402
+
+
+def throughput(evo, children, batch_size, workers, parallel) -> float:
+    """Solutions scored per second, batch by batch as evolve would (pool startup included)"""
+    start = time.perf_counter()
+    executor = evo.make_executor(workers, parallel)
+    try:
+        for j in range(0, len(children), batch_size):
+            evo.score_batch(children[j:j + batch_size], executor)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return len(children) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--solutions", type=int, default=20_000)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4])
+    args = parser.parse_args()
+
+    Profiler.enabled = False
+    a = AssignTa()
+    a.load_problem(os.path.join(ROOT, "assignta_data/tas.csv"), os.path.join(ROOT, "assignta_data/sections.csv"))
+    evo = Evo()
+    evo.add_objectives(AssignTa.SCORE_NAMES, a.score_all)
+    seeds = a.seed_population(16)
+    children = [a.random_flip_agent(seeds[j % len(seeds)]) for j in range(args.solutions)]
+    a.score_all(children[0])  # compile the kernel before timing
+
+    print(f"{args.solutions} solutions, batch {args.batch_size} | Numba: {kernels.HAVE_NUMBA}"
+          f" | GIL enabled: {getattr(sys, '_is_gil_enabled', lambda: True)()}")
+    print(f"{'Mode':22s} {'Solutions/s':>12s}")
+    print("-" * 36)
+    print(f"{'serial':22s} {throughput(evo, children, args.batch_size, 1, 'process'):12.0f}")
+    for workers in args.workers:
+        for parallel in ("thread", "process"):
+            rate = throughput(evo, children, args.batch_size, workers, parallel)
+            print(f"{f'{parallel} x{workers}':22s} {rate:12.0f}")
+
+
+if __name__ == "__main__":
+    main()
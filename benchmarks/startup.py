@@ -0,0 +1,64 @@
+"""
+Authors: Cassandra Cinzori and Ian Solberg
+File: benchmarks/startup.py
+Description: startup-time benchmark - cost of importing the optimizer in a fresh process
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Each case runs in a fresh interpreter, exactly like a scheduler-launched worker
+CASES = {
+    "python (baseline)": "pass",
+    "numpy": "import numpy",
+    "pandas": "import pandas",
+    "evo": "import evo",
+    "assignta": "import assignta",
+    "run_optimization": "import run_optimization",
+    "cached problem load": (
+        "from assignta import AssignTa; "
+        "AssignTa().load_problem('assignta_data/tas.csv', 'assignta_data/sections.csv')"
+    ),
+}
+
+
+def time_import(statement: str, repeats: int) -> list:
+    """Wall time (seconds) of a fresh interpreter running statement, repeated"""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", statement], cwd=ROOT, check=True)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def pandas_loaded(statement: str) -> bool:
+    """Does running statement pull pandas into sys.modules?"""
+    check = f"{statement}; import sys; print('pandas' in sys.modules)"
+    out = subprocess.run([sys.executable, "-c", check], cwd=ROOT, check=True, capture_output=True, text=True)
+    return out.stdout.strip() == "True"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeats", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'Case':25s} {'Median ms':>10s} {'Min ms':>10s}  pandas?")
+    print("-" * 60)
+    for name, statement in CASES.items():
+        timings = time_import(statement, args.repeats)
+        print(
+            f"{name:25s} {statistics.median(timings) * 1000:10.1f} {min(timings) * 1000:10.1f}"
+            f"  {'yes' if pandas_loaded(statement) else 'no'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -5,25 +5,310 @@ Description: evolutionary search framework
 """
 import time
 import copy
+import hashlib
+import os
+import multiprocessing
+import pickle
+import sys
 import numpy as np
-import pandas as pd
 import random as rnd
-from functools import reduce
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial, reduce
+from typing import TYPE_CHECKING
 
+if TYPE_CHECKING:
+    import pandas as pd
 
 
+# Scorers installed once per worker process (see Evo.make_executor)
+_worker_scorers = []
+
+
+def _score(scorers, sol):
+    """Score tuple from [(f, vector)] - vector-valued scorers contribute all their values"""
+    scores = []
+    for f, vector in scorers:
+        if vector:
+            scores.extend(f(sol))
+        else:
+            scores.append(f(sol))
+    return tuple(scores)
+
+
+def _component(f, j, sol):
+    """One value of a vector-valued objective (see Evo.add_objectives)"""
+    return f(sol)[j]
+
+
+def _init_worker(scorers):
+    """Process pool initializer - ship the objectives to each worker once"""
+    global _worker_scorers
+    _worker_scorers = scorers
+
+
+def _score_in_worker(sol):
+    """Score one solution inside a worker process"""
+    return _score(_worker_scorers, sol)
+
+
+class Deadline:
+    """Wall-clock budget on the monotonic clock with amortized clock checks.
+
+    expired() is called once per loop step but only reads the clock every
+    check_every steps; check_every is re-tuned at each read so that reads
+    happen roughly every check_interval seconds whatever the step cost."""
+
+    def __init__(self, time_limit, check_interval=0.01, max_check_every=10_000, clock=time.monotonic):
+        self.clock = clock
+        self.start = clock()
+        self.end = self.start + time_limit
+        self.check_interval = check_interval
+        self.max_check_every = max_check_every
+        self.check_every = 1
+        self.step_cost = 0.0  # measured seconds per step
+        self._countdown = 1
+        self._steps = 0
+        self._last_read = self.start
+
+    def elapsed(self):
+        return self.clock() - self.start
+
+    def expired(self, reserve=0.0):
+        """True once the remaining budget cannot cover the next unchecked
+        stretch of steps plus `reserve` seconds of cleanup
+
+        reserve may be a callable returning seconds; it is only evaluated
+        on the steps that read the clock"""
+        self._steps += 1
+        self._countdown -= 1
+        if self._countdown > 0:
+            return False
+
+        now = self.clock()
+        self.step_cost = (now - self._last_read) / self._steps
+        self.check_every = int(min(max(self.check_interval / max(self.step_cost, 1e-9), 1), self.max_check_every))
+        self._countdown = self.check_every
+        self._steps = 0
+        self._last_read = now
+        if callable(reserve):
+            reserve = reserve()
+        return now + self.step_cost * self.check_every + reserve >= self.end
+
+
+class PruneSchedule:
+    """Adaptive dominance-pruning schedule (evolve(dom="auto")).
+
+    Prunes whenever the population reaches a high-water mark set to
+    `growth` x the front size left by the previous prune. After every prune
+    the growth factor is re-tuned from the measured prune time versus the
+    search time since the previous prune, steering pruning towards
+    `time_fraction` of wall time. The clock is only read around prunes."""
+
+    def __init__(self, time_fraction=0.1, growth=2.0, min_growth=1.1, max_growth=64.0, min_high_water=32):
+        self.time_fraction = time_fraction
+        self.growth = growth
+        self.min_growth = min_growth
+        self.max_growth = max_growth
+        self.min_high_water = min_high_water
+        self.high_water = min_high_water
+        self.prunes = 0
+        self.prune_time = 0.0
+        self._last_prune_end = time.monotonic()
+
+    def due(self, size):
+        """Should the population be pruned at this size?"""
+        return size >= self.high_water
+
+    def prune(self, evo):
+        """Prune evo and re-tune the schedule from the measured costs"""
+        start = time.monotonic()
+        evo.remove_dominated()
+        end = time.monotonic()
+
+        cost, search = end - start, start - self._last_prune_end
+        fraction = cost / max(cost + search, 1e-9)
+        if fraction > self.time_fraction:
+            self.growth = min(self.growth * 1.5, self.max_growth)
+        elif fraction < self.time_fraction / 2:
+            self.growth = max(self.growth / 1.5, self.min_growth)
+
+        self.high_water = max(self.min_high_water, int(self.growth * evo.size()) + 1)
+        self.prunes += 1
+        self.prune_time += cost
+        self._last_prune_end = end
+
+
+class StopCondition(ABC):
+    """Convergence test for evolve(stop=...), checked right after each prune
+    (when the front can change). Combine conditions with | (any) and & (all)."""
+
+    def reset(self, evo):
+        """Called once at the start of evolve"""
+
+    @abstractmethod
+    def __call__(self, evo, iteration):
+        """True once evolution should stop"""
+
+    def __or__(self, other):
+        return AnyOf(self, other)
+
+    def __and__(self, other):
+        return AllOf(self, other)
+
+
+class AnyOf(StopCondition):
+    """Stop when any of the conditions holds"""
+
+    def __init__(self, *conditions):
+        self.conditions = conditions
+
+    def reset(self, evo):
+        for condition in self.conditions:
+            condition.reset(evo)
+
+    def __call__(self, evo, iteration):
+        # Evaluate every condition so stateful ones keep their history current
+        return any([condition(evo, iteration) for condition in self.conditions])
+
+    def __repr__(self):
+        return " | ".join(map(repr, self.conditions))
+
+
+class AllOf(AnyOf):
+    """Stop when all of the conditions hold"""
+
+    def __call__(self, evo, iteration):
+        return all([condition(evo, iteration) for condition in self.conditions])
+
+    def __repr__(self):
+        return " & ".join(map(repr, self.conditions))
+
+
+class Stagnation(StopCondition):
+    """No new member has survived into the front for `iterations` iterations
+    and/or `seconds` seconds (whichever is given; both must pass if both are)"""
+
+    def __init__(self, iterations=None, seconds=None):
+        if iterations is None and seconds is None:
+            raise ValueError("Stagnation needs iterations and/or seconds")
+        self.iterations = iterations
+        self.seconds = seconds
+
+    def reset(self, evo):
+        self._updates = evo.front_updates
+        self._since_iteration = 0
+        self._since_time = time.monotonic()
+
+    def __call__(self, evo, iteration):
+        now = time.monotonic()
+        if evo.front_updates != self._updates:
+            self._updates = evo.front_updates
+            self._since_iteration, self._since_time = iteration, now
+            return False
+        return ((self.iterations is None or iteration - self._since_iteration >= self.iterations)
+                and (self.seconds is None or now - self._since_time >= self.seconds))
+
+    def __repr__(self):
+        limits = [f"{self.iterations} iterations" if self.iterations is not None else "",
+                  f"{self.seconds}s" if self.seconds is not None else ""]
+        return f"front unchanged for {' / '.join(l for l in limits if l)}"
+
+
+class Plateau(StopCondition):
+    """A registered indicator (see Evo.add_indicator) has not improved by more
+    than `tolerance` (relative) over the last `iterations` iterations"""
+
+    def __init__(self, indicator="hypervolume", iterations=1000, tolerance=1e-3, maximize=True):
+        self.indicator = indicator
+        self.iterations = iterations
+        self.tolerance = tolerance
+        self.maximize = maximize
+
+    def reset(self, evo):
+        # First point where the registry is known - fail before the run rather than at the first prune
+        names = [name for name, _, _ in evo.indicators]
+        if self.indicator not in names:
+            raise ValueError(
+                f"Plateau needs a registered {self.indicator!r} indicator (registered: {names or 'none'})"
+            )
+        self._baseline = None
+        self._since = 0
+
+    def __call__(self, evo, iteration):
+        value = evo.indicator_values()[self.indicator]
+        if self._baseline is not None:
+            gain = value - self._baseline if self.maximize else self._baseline - value
+            if gain <= self.tolerance * max(abs(self._baseline), 1e-12):
+                return iteration - self._since >= self.iterations
+        self._baseline, self._since = value, iteration
+        return False
+
+    def __repr__(self):
+        return f"{self.indicator} plateau over {self.iterations} iterations"
+
+
+class HardConstraintsMet(StopCondition):
+    """Every hard-constraint objective has reached zero somewhere in the
+    population and the front has then stagnated (see Stagnation; 1000 iterations by default)"""
+
+    def __init__(self, objectives=("conflicts", "unavailable"), iterations=1000, seconds=None):
+        self.objectives = objectives
+        self.stagnation = Stagnation(iterations, seconds)
+
+    def reset(self, evo):
+        self.stagnation.reset(evo)
+
+    def __call__(self, evo, iteration):
+        stalled = self.stagnation(evo, iteration)
+        return stalled and all(evo.best(name)[0][evo.objective_names().index(name)] == 0
+                               for name in self.objectives)
+
+    def __repr__(self):
+        return f"{', '.join(self.objectives)} at zero and {self.stagnation!r}"
+
 
 class Evo:
 
-    def __init__(self):
-        """Population constructor"""
+    def __init__(self, dedupe=True, max_seen=1_000_000):
+        """Population constructor
+
+        dedupe: skip scoring/inserting solutions that were already seen
+        max_seen: cap on remembered fingerprints (reset to the current population when exceeded)"""
         self.pop = (
             {}
         )  # The solution population: Evaluation (s1, s2, ..., sn) -> solution
         self.objectives = []  # Registered objectives: [(n1, obj1), (n2, obj2), ....]
+        self.scorers = []  # What score() calls: [(f, vector)], one call per solution each
         self.agents = (
             []
         )  # Registered agents:  [(n1, func1, input1), (n2, func2, input2)....]
+        self.evaluations = 0  # Number of solutions scored so far
+        self.repair = None  # Optional hook: list of children -> list of repaired children
+        self.workers = 1  # Size of the scoring pool from make_executor (1 = score in this process)
+        self.checkpoint_metadata = {}  # Extra state saved with checkpoints (e.g. the problem the scores belong to)
+
+        # Duplicate detection: fingerprints of every solution seen so far
+        self.dedupe = dedupe
+        self.max_seen = max_seen
+        self.duplicates = 0  # Number of solutions skipped as duplicates
+        self._seen = set()
+
+        # Best-per-objective index: objective position -> population key with the lowest score
+        self._best = {}
+
+        # Front membership after the last prune, and how many prunes admitted new members
+        self._front = set()
+        self.front_updates = 0
+
+        # Front quality indicators kept in step with the population: [(name, tracker, objective positions)]
+        self.indicators = []
+
+        # Measured costs used to reserve time for end-of-run cleanup
+        self._prune_cost_per_pair = 0.0  # seconds per (solution x solution) comparison
+        self._summarize_cost_per_row = 5e-6  # seconds per summary row (updated by summarize)
+        self._checkpoint_cost = 0.0
+        self._pandas_import_cost = 0.5  # summarize imports pandas lazily on first use
 
     def size(self):
         """The size of the current population"""
@@ -34,6 +319,36 @@ class Evo:
         environment. Any solution added to the environment is scored
         according to this objective"""
         self.objectives.append((name, f))
+        self.scorers.append((f, False))
+
+    def add_objectives(self, names, f):
+        """Register a vector-valued objective: f(sol) returns one value per name
+        (in order), so shared work is done once per solution, e.g.
+        add_objectives(["overallocation", ..., "aggregatescore"], assignta.score_all)"""
+        for j, name in enumerate(names):
+            self.objectives.append((name, partial(_component, f, j)))
+        self.scorers.append((f, True))
+
+    def add_indicator(self, name, tracker, objectives=None):
+        """Register a quality indicator (e.g. indicators.HypervolumeTracker)
+        updated incrementally as solutions enter and leave the population.
+        objectives: names of the objectives it sees (default: all, in score order)"""
+        names = self.objective_names()
+        positions = [names.index(o) for o in objectives] if objectives is not None else list(range(len(names)))
+        for scores in self.pop:
+            tracker.add([scores[j] for j in positions])
+        self.indicators.append((name, tracker, positions))
+
+    def _track(self, keys, added=True):
+        """Feed population keys entering (or leaving) the population to the indicators"""
+        for _, tracker, positions in self.indicators:
+            update = tracker.add if added else tracker.remove
+            for scores in keys:
+                update([scores[j] for j in positions])
+
+    def indicator_values(self):
+        """Current value of every registered indicator"""
+        return {name: tracker.value() for name, tracker, _ in self.indicators}
 
     def add_agent(self, name, f, k=1):
         """Register a named agent with the population.
@@ -41,6 +356,12 @@ class Evo:
         k defines the number of solutions the agent operates on."""
         self.agents.append((name, f, k))
 
+    def set_repair(self, f):
+        """Register a repair stage applied to every agent child before it is
+        deduplicated and scored. f maps a list of children to a list of repaired
+        children, so batches (run_batch) are repaired in one call."""
+        self.repair = f
+
     def get_random_solutions(self, k=1):
         """Pick k random solutions from the population
         Return a list of solution copies (pre-mutated)
@@ -49,19 +370,211 @@ class Evo:
             return []
         else:
             solutions = tuple(self.pop.values())  # All solutions in the population
+            if k <= len(solutions):
+                # Distinct parents, so a k=2 crossover never mates a solution with itself
+                return [copy.deepcopy(sol) for sol in rnd.sample(solutions, k)]
             return [copy.deepcopy(rnd.choice(solutions)) for _ in range(k)]
 
+    def score(self, sol):
+        """Evaluate a solution against every registered objective"""
+        return _score(self.scorers, sol)
+
+    @staticmethod
+    def fingerprint(sol):
+        """Compact hash of a solution's packed bytes (blake2b, 128-bit)"""
+        if hasattr(sol, "tobytes"):
+            data = str(getattr(sol, "shape", "")).encode() + sol.tobytes()
+        else:
+            data = pickle.dumps(sol, protocol=pickle.HIGHEST_PROTOCOL)
+        return hashlib.blake2b(data, digest_size=16).digest()
+
+    def is_new(self, sol):
+        """Record sol as seen; False if it was seen before (always True when dedupe is off)"""
+        if not self.dedupe:
+            return True
+        key = self.fingerprint(sol)
+        if key in self._seen:
+            self.duplicates += 1
+            return False
+        if len(self._seen) >= self.max_seen:
+            self._seen = {self.fingerprint(s) for s in self.pop.values()}
+        self._seen.add(key)
+        return True
+
+    def duplicate_rate(self):
+        """Fraction of produced solutions that were skipped as duplicates"""
+        total = self.duplicates + self.evaluations
+        return self.duplicates / total if total else 0.0
+
     def add_solution(self, sol):
-        """Add a solution to the population"""
-        scores = tuple([f(sol) for _, f in self.objectives])
+        """Add a solution to the population (duplicates are skipped without scoring)"""
+        if self.is_new(sol):
+            self.add_scored(self.score(sol), sol)
+
+    def add_scored(self, scores, sol):
+        """Add a solution whose scores were already computed (e.g. by a worker)"""
+        self.evaluations += 1
+        self._insert(scores, sol)
+
+    def _insert(self, scores, sol):
+        """Key sol by its scores, updating the indicators and the best-per-objective index"""
+        if self.indicators and scores not in self.pop:
+            self._track([scores])
         self.pop[scores] = sol
+        for j, value in enumerate(scores):
+            best = self._best.get(j)
+            if best is None or value < best[j]:
+                self._best[j] = scores
+
+    def _reindex_best(self):
+        """Rebuild the best-per-objective index with one argmin over the score array"""
+        self._best = {}
+        if self.size() == 0:
+            return
+        keys = list(self.pop.keys())
+        for j, row in enumerate(np.argmin(self.score_array(), axis=0)):
+            self._best[j] = keys[row]
+
+    def best(self, objective):
+        """(scores, solution) with the lowest value of the named objective - O(1)"""
+        j = self.objective_names().index(objective)
+        key = self._best.get(j)
+        if key is None or key not in self.pop:
+            # Population was modified behind our back (or is empty) - rebuild
+            self._reindex_best()
+            key = self._best.get(j)
+            if key is None:
+                return None, None
+        return key, self.pop[key]
+
+    def best_scores(self):
+        """Lowest value reached on each objective by the current population"""
+        if self.size() == 0:
+            return ()
+        return tuple(self.best(name)[0][j] for j, name in enumerate(self.objective_names()))
+
+    def make_child(self):
+        """Invoke a random agent and return its (unscored) output"""
+        _, f, k = rnd.choice(self.agents)  # pick random agent unpack necessary info
+        sols = self.get_random_solutions(k)
+        return f(sols)
 
     def run_random_agent(self):
         """Invoke an agent against the population"""
-        _, f, k = rnd.choice(self.agents)  # pick random agent unpack necessary info
-        sols = self.get_random_solutions(k)
-        new_solution = f(sols)
-        self.add_solution(new_solution)
+        child = self.make_child()
+        if self.repair is not None:
+            child = self.repair([child])[0]
+        self.add_solution(child)
+
+    def run_batch(self, batch_size=1, executor=None):
+        """Invoke batch_size random agents, then score their children together
+
+        With an executor the batch is scored in parallel; children are still
+        produced from the population as it stood at the start of the batch."""
+        if executor is None and batch_size == 1:
+            self.run_random_agent()
+            return
+
+        children = [self.make_child() for _ in range(batch_size)]
+        if self.repair is not None:
+            children = self.repair(children)
+        children = [child for child in children if self.is_new(child)]
+        for scores, child in zip(self.score_batch(children, executor, self.workers), children):
+            self.add_scored(scores, child)
+
+    def score_many(self, sols):
+        """Scores for a list of solutions (one thread-pool task)"""
+        return [self.score(sol) for sol in sols]
+
+    def score_batch(self, sols, executor=None, workers=None):
+        """Scores for a list of solutions - here, or spread over a pool from make_executor
+
+        workers: number of threads in a thread pool executor (default: self.workers)"""
+        if executor is None:
+            return self.score_many(sols)
+        if isinstance(executor, ThreadPoolExecutor):
+            # One contiguous chunk per thread keeps per-task overhead below the scoring cost
+            step = -(-len(sols) // (workers or self.workers)) or 1
+            chunks = executor.map(self.score_many, [sols[j:j + step] for j in range(0, len(sols), step)])
+            return [scores for chunk in chunks for scores in chunk]
+        return list(executor.map(_score_in_worker, sols))
+
+    def make_executor(self, workers, parallel="process", start_method=None):
+        """Pool that scores children with this population's objectives
+
+        parallel="process": worker processes (objectives must be picklable - e.g.
+        bound methods, not lambdas); each child is pickled to its worker.
+        start_method: multiprocessing start method for the process pool (None = platform
+        default). Under "fork" workers inherit the objectives copy-on-write; "forkserver"
+        and "spawn" pickle them to each worker (e.g. as an AssignTa.share_problem handle).
+        parallel="thread": threads sharing this process - no pickling or startup,
+        but objectives must be reentrant, and only GIL-releasing work (e.g. the
+        Numba kernel behind AssignTa.score_all) runs truly in parallel.
+        The pool size is kept in self.workers for score_batch."""
+        self.workers = max(workers, 1)
+        if workers <= 1:
+            return None
+        if parallel == "thread":
+            return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="evo-score")
+        if parallel != "process":
+            raise ValueError(f"Unknown parallel mode: {parallel!r} (use 'process' or 'thread')")
+        context = multiprocessing.get_context(start_method) if start_method is not None else None
+        return ProcessPoolExecutor(
+            max_workers=workers, mp_context=context, initializer=_init_worker, initargs=(self.scorers,)
+        )
+
+    def save_checkpoint(self, path):
+        """Pickle the population (and objective names) so a later run can resume"""
+        start = time.perf_counter()
+        state = {
+            "objectives": [name for name, _ in self.objectives],
+            "pop": self.pop,
+            "metadata": self.checkpoint_metadata,
+        }
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+        self._checkpoint_cost = time.perf_counter() - start
+
+    def load_checkpoint(self, path):
+        """Merge a saved population into this one and return the checkpoint's metadata
+        The checkpoint must have been scored with the same objectives"""
+        with open(path, "rb") as f:
+            state = pickle.load(f)
+        names = [name for name, _ in self.objectives]
+        if state["objectives"] != names:
+            raise ValueError(
+                f"Checkpoint objectives {state['objectives']} do not match {names}"
+            )
+        if self.indicators:
+            self._track([scores for scores in state["pop"] if scores not in self.pop])
+        self.pop.update(state["pop"])
+        self._reindex_best()
+        if self.dedupe:
+            self._seen.update(self.fingerprint(sol) for sol in state["pop"].values())
+        return state.get("metadata", {})
+
+    def rescore(self, update=None):
+        """Re-key the population after the problem behind the objectives changed
+
+        update(scores, sol) -> new scores, e.g. a delta evaluation of the changed parts
+        (default: score every solution from scratch)
+
+        Rescored solutions re-enter like new children: ones that now share scores
+        collapse to a single key as in add_scored, and ones the changed problem
+        makes dominated are pruned."""
+        if update is None:
+            update = lambda scores, sol: self.score(sol)
+        old = self.pop
+        if self.indicators:
+            self._track(list(old), added=False)
+        self.pop = {}
+        self._best = {}
+        self._front = set()
+        for scores, sol in old.items():
+            self._insert(update(scores, sol), sol)
+        self.remove_dominated()
 
     @staticmethod
     def dominates(p, q):
@@ -76,70 +589,266 @@ class Evo:
 
     def remove_dominated(self):
         """Remove dominated solutions"""
+        start = time.perf_counter()
+        size = self.size()
         nds = reduce(Evo.reduce_nds, self.pop.keys(), self.pop.keys())
+        if self.indicators:
+            self._track([scores for scores in self.pop if scores not in nds], added=False)
         self.pop = {scores: self.pop[scores] for scores in nds}
-
-    def evolve(self, n=1, dom=100, time_limit=None, status=0):
+        if not self._front.issuperset(self.pop):
+            self.front_updates += 1
+        self._front = set(self.pop)
+        if any(key not in self.pop for key in self._best.values()):
+            self._reindex_best()
+        if size > 1:
+            self._prune_cost_per_pair = (time.perf_counter() - start) / size ** 2
+
+    def prune_cost(self):
+        """Estimated seconds for remove_dominated at the current population size"""
+        return self._prune_cost_per_pair * self.size() ** 2
+
+    def finish_cost(self, checkpoint=False):
+        """Estimated seconds for the final prune + summarize (+ checkpoint)
+        at the current population size"""
+        cost = self.prune_cost() + self._summarize_cost_per_row * self.size()
+        if "pandas" not in sys.modules:
+            cost += self._pandas_import_cost
+        return cost + (self._checkpoint_cost if checkpoint else 0.0)
+
+    def evolve(self, n=None, dom=100, time_limit=None, status=0,
+               batch_size=1, workers=1, checkpoint=None, checkpoint_interval=60,
+               reserve=0.0, clock_interval=0.01, observers=(), observe_interval=1.0, stop=None,
+               parallel="process", start_method=None):
         """Run n random agents (default=1)
 
-        n: number of generations (ignored if time_limit is set)
-        dom: defines how often we remove dominated (unfit) solutions
+        n: number of agent invocations (default 1 when there is no time_limit)
+        dom: defines how often we remove dominated (unfit) solutions - every dom
+             iterations, or "auto" / a PruneSchedule to prune adaptively from
+             population size and measured prune cost
         time_limit: maximum time to run in seconds (e.g., 300 for 5 minutes)
-                    If set, n is ignored and evolution runs until time limit
+                    If set, evolution runs until the time limit (or n, if also given)
         status: defines how often we display the current population (0=never)
+        batch_size: number of children produced and scored together
+        workers: number of processes (or threads) scoring children (1 = score in this process)
+        parallel: "process" or "thread" pool for workers > 1 (see make_executor)
+        start_method: multiprocessing start method for a process pool (see make_executor)
+        checkpoint: path to save the population to every checkpoint_interval seconds
+                    and at the end of the run
+        reserve: extra seconds of the time limit to leave for the caller (e.g. saving reports)
+        clock_interval: target seconds between clock reads; the number of iterations
+                        between reads adapts to the measured iteration cost
+        observers: callables receiving a metrics dict (see metrics()) about every
+                   observe_interval seconds and once at the end - e.g. the
+                   publishers in monitor.py. They run on the evolve thread, so
+                   they should hand off and return quickly.
+        stop: StopCondition (e.g. Stagnation(iterations=5000) | Plateau()) checked after
+              each prune, and every 32 iterations while nothing has entered the
+              population since the last prune (so a stalled run that never reaches
+              the next prune still stops); evolution ends early once it holds
+
+        With a time limit the loop stops early enough that the final prune, the
+        summary (and checkpoint) are estimated to finish within time_limit - reserve.
         """
+        if n is None and time_limit is None:
+            n = 1
+
+        deadline = Deadline(time_limit, clock_interval) if time_limit is not None else None
+        schedule = PruneSchedule() if dom == "auto" else dom if isinstance(dom, PruneSchedule) else None
+        last_checkpoint = time.monotonic()
+        run_start, evaluations_start = time.monotonic(), self.evaluations
+        next_observe = run_start
+        i = 0
+        if stop is not None:
+            stop.reset(self)
+        settled_size = self.size()  # population size after the last prune
 
         if time_limit is not None:
-            # Time-limited evo
-            start_time = time.time()
-            i = 0
-
             print(f"Starting evolution with {time_limit} seconds time limit...")
             print(f"Initial population size: {self.size()}")
             print("-" * 60)
 
-            while True:
-                # Check time limit
-                elapsed = time.time() - start_time
-                if elapsed >= time_limit:
-                    print(f"\nTime limit reached: {elapsed:.2f} seconds")
+        # Seconds to keep in hand - only evaluated when the deadline reads the clock
+        cleanup = lambda: reserve + self.finish_cost(checkpoint is not None) + self.prune_cost()
+
+        executor = self.make_executor(workers, parallel, start_method)
+        try:
+            while n is None or i < n:
+                # Check time limit, leaving room for the final cleanup and for a
+                # periodic prune landing in the next unchecked stretch
+                if deadline is not None and deadline.expired(cleanup):
+                    print(f"\nTime limit reached: {deadline.elapsed():.2f} seconds")
                     break
 
-                # Run agent
-                self.run_random_agent()
+                # Run agents (never past the iteration budget)
+                batch = batch_size if n is None else min(batch_size, n - i)
+                self.run_batch(batch, executor)
 
                 # Remove dominated solution periodically
-                if i % dom == 0:
-                    self.remove_dominated()
-                    if status > 0 and i % status == 0:
-                        print(f"Iteration: {i} | Time: {elapsed:.2f}s | Population: {self.size()}")
-                i += 1
-
-            # Final cleanup
-            self.remove_dominated()
+                if schedule is not None:
+                    pruned = schedule.due(self.size())
+                    if pruned:
+                        schedule.prune(self)
+                else:
+                    pruned = i % dom < batch
+                    if pruned:
+                        self.remove_dominated()
+                if pruned:
+                    settled_size = self.size()
+
+                if status > 0 and i % status < batch:
+                    if deadline is not None:
+                        print(f"Iteration: {i} | Time: {deadline.elapsed():.2f}s | Population: {self.size()}"
+                              f" | Best: ({', '.join(f'{v:g}' for v in self.best_scores())})"
+                              + "".join(f" | {name}: {value:.4g}" for name, value in self.indicator_values().items()))
+                    else:
+                        print("Iteration:", i)
+                        print("Population size:", self.size())
+                        if status > 1:
+                            print(self)
+
+                # Checkpoint right after a prune, when the population is smallest
+                if pruned and checkpoint is not None and time.monotonic() - last_checkpoint >= checkpoint_interval:
+                    self.save_checkpoint(checkpoint)
+                    last_checkpoint = time.monotonic()
+
+                # Stop early once converged: the front is known right after a prune, and
+                # cannot have changed while no child has entered the population since
+                stop_due = pruned or (i % 32 < batch and self.size() == settled_size)
+                if stop_due and stop is not None and stop(self, i + batch):
+                    i += batch
+                    if deadline is not None or status > 0:
+                        print(f"\nConverged at iteration {i}: {stop!r}")
+                    break
+
+                # Publish metrics (clock read at most every 32 iterations)
+                if observers and i % 32 < batch and time.monotonic() >= next_observe:
+                    self._notify(observers, self.metrics(i, run_start, evaluations_start))
+                    next_observe = time.monotonic() + observe_interval
+                i += batch
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        # Final cleanup
+        self.remove_dominated()
+        if checkpoint is not None:
+            self.save_checkpoint(checkpoint)
+        if observers:
+            self._notify(observers, self.metrics(i, run_start, evaluations_start, done=True))
+
+        if deadline is not None:
             print("-" * 60)
             print(f"Evolution complete!")
-            print(f"Total time: {elapsed:.2f} seconds")
+            print(f"Total time: {deadline.elapsed():.2f} seconds")
             print(f"Total iterations: {i}")
+            print(f"Evaluations: {self.evaluations} | Duplicates skipped: {self.duplicates} ({self.duplicate_rate():.1%})")
             print(f"Population size: {self.size()}")
+            if schedule is not None:
+                print(f"Adaptive pruning: {schedule.prunes} prunes, {schedule.prune_time:.2f}s")
             print("-" * 60)
 
-        else:
-            for i in range(n):
-                self.run_random_agent()
-                if i % dom == 0:
-                    self.remove_dominated()
-                    if status > 0 and i % status == 0:
-                        print("Iteration:", i)
-                        print("Population size:", self.size())
-                        if status > 1:
-                           print(self)
 
-            # Final cleanup
-            self.remove_dominated()
+    def metrics(self, iteration, run_start, evaluations_start=0, done=False):
+        """Snapshot of run progress for observers"""
+        elapsed = time.monotonic() - run_start
+        evaluations = self.evaluations - evaluations_start
+        return {
+            "iteration": iteration,
+            "elapsed": round(elapsed, 3),
+            "evaluations": evaluations,
+            "evals_per_sec": round(evaluations / elapsed, 1) if elapsed > 0 else 0.0,
+            "duplicate_rate": round(self.duplicate_rate(), 4),
+            "population": self.size(),
+            "best": dict(zip(self.objective_names(), self.best_scores())),
+            "indicators": self.indicator_values(),
+            "done": done,
+        }
 
+    @staticmethod
+    def _notify(observers, metrics):
+        for observer in observers:
+            observer(metrics)
+
+    def objective_names(self):
+        """Names of the registered objectives, in score order"""
+        return [name for name, _ in self.objectives]
+
+    def score_array(self):
+        """Population scores as a (size, num_objectives) float array, in pop order"""
+        return np.array(list(self.pop.keys()), dtype=float).reshape(self.size(), len(self.objectives))
+
+    def _integral_objectives(self):
+        """Which objectives produce integer scores (judged from one population member)"""
+        sample = next(iter(self.pop), ())
+        return [isinstance(v, (int, np.integer)) for v in sample] or [False] * len(self.objectives)
+
+    def export(self, path, include_solutions=True):
+        """Write the population's scores (and solutions) for downstream tools
+
+        path extension selects the format:
+          .npz              numpy archive: names, scores, solutions (stacked dense arrays)
+          .parquet/.arrow   Arrow table, one column per objective plus a fixed-size
+                            list column of flattened solutions (requires pyarrow)
+        Solutions with a to_dense() method (e.g. SparseAssignment) are densified."""
+        names = self.objective_names()
+        scores = self.score_array()
+        solutions = None
+        if include_solutions and self.size():
+            solutions = np.stack([
+                sol.to_dense() if hasattr(sol, "to_dense") else np.asarray(sol)
+                for sol in self.pop.values()
+            ])
+
+        ext = os.path.splitext(path)[1].lower()
+        if ext == ".npz":
+            arrays = {"names": np.array(names), "scores": scores}
+            if solutions is not None:
+                arrays["solutions"] = solutions
+            np.savez(path, **arrays)
+        elif ext in (".parquet", ".arrow", ".feather"):
+            import pyarrow as pa
+
+            columns = {name: pa.array(scores[:, j]) for j, name in enumerate(names)}
+            metadata = {}
+            if solutions is not None:
+                flat = solutions.reshape(len(solutions), -1)
+                columns["solution"] = pa.FixedSizeListArray.from_arrays(pa.array(flat.ravel()), flat.shape[1])
+                metadata["solution_shape"] = ",".join(map(str, solutions.shape[1:]))
+            table = pa.table(columns).replace_schema_metadata(metadata)
+            if ext == ".parquet":
+                import pyarrow.parquet as pq
+
+                pq.write_table(table, path)
+            else:
+                import pyarrow.feather as feather
+
+                feather.write_feather(table, path, compression="uncompressed")
+        else:
+            raise ValueError(f"Unsupported export format: {path} (use .npz, .parquet or .arrow)")
 
-    def summarize(self, group_name="Cass&Ian"):
+    @staticmethod
+    def load_front(path):
+        """Read an exported front: (names, scores, solutions or None)"""
+        ext = os.path.splitext(path)[1].lower()
+        if ext == ".npz":
+            with np.load(path) as data:
+                solutions = data["solutions"] if "solutions" in data else None
+                return [str(name) for name in data["names"]], data["scores"], solutions
+
+        import pyarrow.feather as feather
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(path) if ext == ".parquet" else feather.read_table(path, memory_map=True)
+        names = [name for name in table.column_names if name != "solution"]
+        scores = np.column_stack([table[name].to_numpy() for name in names]) if names else np.empty((0, 0))
+        solutions = None
+        if "solution" in table.column_names:
+            shape = tuple(int(d) for d in table.schema.metadata[b"solution_shape"].decode().split(","))
+            flat = table["solution"].combine_chunks().flatten().to_numpy()
+            solutions = flat.reshape((table.num_rows,) + shape)
+        return names, scores, solutions
+
+    def summarize(self, group_name="Cass&Ian") -> "pd.DataFrame":
         """
         Create a summary DataFrame of the current population (Pareto front)
 
@@ -155,29 +864,24 @@ class Evo:
             For TA assignment: groupname, overallocation, conflicts,
             undersupport, unavailable, unpreferred
         """
-
-        # Build summary data
-        summary_data = []
-
-        for scores, solution in self.pop.items():
-            row = {"groupname": group_name}
-
-            # Add objective scores
-            for i, (obj_name, _) in enumerate(self.objectives):
-                row[obj_name] = scores[i]
-
-            summary_data.append(row)
-
-        # Create df
-        df = pd.DataFrame(summary_data)
-
-        # Sort by total scores
-        objective_cols = [name for name, _ in self.objectives]
-        df["_total"] = df[objective_cols].sum(axis=1)
-        df = df.sort_values("_total")
-        df = df.drop(columns=["_total"])
-        df = df.reset_index(drop=True)
-
+        # Reporting only - keep pandas off the evolution import path
+        import pandas as pd
+
+        start = time.perf_counter()
+
+        # One DataFrame construction straight from the score array
+        names = self.objective_names()
+        scores = self.score_array()
+        order = np.argsort(scores.sum(axis=1), kind="stable")  # Sort by total scores
+        columns = {"groupname": np.full(len(order), group_name, dtype=object)}
+        integral = self._integral_objectives()
+        for j, name in enumerate(names):
+            column = scores[order, j]
+            columns[name] = column.astype(np.int64) if integral[j] else column
+        df = pd.DataFrame(columns)
+
+        if len(df):
+            self._summarize_cost_per_row = (time.perf_counter() - start) / len(df)
         return df
 
 
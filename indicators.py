@@ -0,0 +1,234 @@
+"""
+Authors: Cassandra Cinzori and Ian Solberg
+File: indicators.py
+Description: front quality indicators - hypervolume (exact WFG / Monte Carlo) and IGD, with incremental trackers
+"""
+
+from collections import Counter
+import numpy as np
+
+
+def nondominated(points: np.ndarray) -> np.ndarray:
+    """
+    Rows of points (minimization) not dominated by any other row, duplicates collapsed
+    """
+    points = np.unique(np.asarray(points, dtype=float), axis=0)
+    if len(points) <= 1:
+        return points
+    # dominated[i] if some j is <= everywhere and < somewhere
+    leq = (points[:, np.newaxis, :] <= points[np.newaxis, :, :]).all(axis=2)
+    lt = (points[:, np.newaxis, :] < points[np.newaxis, :, :]).any(axis=2)
+    dominated = (leq & lt).any(axis=0)
+    return points[~dominated]
+
+
+def hypervolume(points, ref) -> float:
+    """
+    Exact hypervolume dominated by points (minimization) and bounded by ref
+
+    WFG algorithm: the volume is the sum of each point's exclusive contribution,
+    computed recursively against the "limit set" of the points after it.
+    Exponential in the worst case - intended for small fronts (see hypervolume_mc).
+    """
+    ref = np.asarray(ref, dtype=float)
+    points = np.asarray(points, dtype=float).reshape(-1, len(ref))
+    points = nondominated(points[(points < ref).all(axis=1)])
+    # Sorting on one objective keeps limit sets small
+    return _wfg(points[np.argsort(points[:, 0])], ref)
+
+
+def _wfg(points: np.ndarray, ref: np.ndarray) -> float:
+    if len(points) == 0:
+        return 0.0
+    if len(points) == 1:
+        return float(np.prod(ref - points[0]))
+    total = 0.0
+    for i in range(len(points)):
+        inclusive = float(np.prod(ref - points[i]))
+        limited = np.maximum(points[i + 1:], points[i])
+        total += inclusive - _wfg(nondominated(limited), ref) if len(limited) else inclusive
+    return total
+
+
+def hypervolume_mc(points, ref, lower, samples: int = 100_000, rng=None) -> float:
+    """
+    Monte Carlo hypervolume estimate: fraction of uniform samples in the box [lower, ref]
+    dominated by some point, times the box volume. Scales to large fronts.
+    """
+    ref, lower = np.asarray(ref, dtype=float), np.asarray(lower, dtype=float)
+    points = np.asarray(points, dtype=float).reshape(-1, len(ref))
+    if len(points) == 0:
+        return 0.0
+    rng = np.random.default_rng() if rng is None else rng
+    covered = 0
+    for start in range(0, samples, 10_000):
+        batch = rng.uniform(lower, ref, size=(min(10_000, samples - start), len(ref)))
+        covered += (points[np.newaxis, :, :] <= batch[:, np.newaxis, :]).all(axis=2).any(axis=1).sum()
+    return float(np.prod(ref - lower)) * covered / samples
+
+
+def igd(front, reference) -> float:
+    """
+    Inverted generational distance: mean Euclidean distance from each reference point
+    to its nearest front point (lower is better, 0 when the front covers the reference)
+    """
+    front = np.asarray(front, dtype=float)
+    reference = np.asarray(reference, dtype=float)
+    if len(front) == 0:
+        return float("inf")
+    distances = np.linalg.norm(reference[:, np.newaxis, :] - front[np.newaxis, :, :], axis=2)
+    return float(distances.min(axis=1).mean())
+
+
+def _dominated_by(front: np.ndarray, point: np.ndarray) -> bool:
+    """True if some row of front dominates point (minimization)"""
+    return bool(len(front)) and bool(((front <= point).all(axis=1) & (front < point).any(axis=1)).any())
+
+
+class HypervolumeTracker:
+    """
+    Incrementally maintained hypervolume of a changing point set.
+
+    Holds a fixed set of Monte Carlo samples in [lower, ref] and, per sample,
+    the number of current points dominating it. add()/remove() only record the
+    change (O(1), so they can sit in the evolution hot loop); the pending changes
+    are folded into the sample counts in one vectorized pass the next time the
+    value is read, so the estimate costs O(changes x samples) per read, not per
+    insert. While the (non-dominated) set is at most exact_limit points, value()
+    returns the exact WFG hypervolume instead.
+    """
+
+    def __init__(self, ref, lower, samples: int = 20_000, exact_limit: int = 12, seed=None):
+        self.ref = np.asarray(ref, dtype=float)
+        self.lower = np.asarray(lower, dtype=float)
+        self.exact_limit = exact_limit
+        self.box_volume = float(np.prod(self.ref - self.lower))
+        self.samples = np.random.default_rng(seed).uniform(self.lower, self.ref, size=(samples, len(self.ref)))
+        self.counts = np.zeros(samples, dtype=np.int32)
+        self.points = Counter()
+        self._pending = Counter()  # point -> net multiplicity change not yet in counts
+        self._exact = None  # cached exact value, invalidated on change
+        self._exact_checked = False  # whether _exact is current (None then means "front too large")
+
+    def add(self, point):
+        point = tuple(float(v) for v in point)
+        self.points[point] += 1
+        self._pending[point] += 1
+        self._exact, self._exact_checked = None, False
+
+    def remove(self, point):
+        point = tuple(float(v) for v in point)
+        if self.points[point] == 0:
+            return
+        self.points[point] -= 1
+        if self.points[point] == 0:
+            del self.points[point]
+        self._pending[point] -= 1
+        self._exact, self._exact_checked = None, False
+
+    def _flush(self, chunk: int = 256):
+        """Fold pending changes into the sample counts (points outside the box cover nothing)"""
+        changed = [(point, delta) for point, delta in self._pending.items() if delta]
+        self._pending.clear()
+        points = np.array([point for point, _ in changed], dtype=float).reshape(-1, len(self.ref))
+        deltas = np.array([delta for _, delta in changed], dtype=np.int32)
+        inside = (points < self.ref).all(axis=1)
+        points, deltas = points[inside], deltas[inside]
+        for start in range(0, len(points), chunk):
+            covered = (points[start:start + chunk, np.newaxis, :] <= self.samples).all(axis=2)
+            self.counts += deltas[start:start + chunk] @ covered.astype(np.int32)
+
+    def estimate(self) -> float:
+        """Monte Carlo estimate from the maintained sample counts"""
+        if self._pending:
+            self._flush()
+        return self.box_volume * np.count_nonzero(self.counts) / len(self.counts)
+
+    def value(self) -> float:
+        """Exact hypervolume for small fronts, the Monte Carlo estimate otherwise"""
+        if not self._exact_checked and self.points:
+            inside = np.array(list(self.points))
+            inside = inside[(inside < self.ref).all(axis=1)]
+            # Only pay for the O(n^2) front filter when the front could be small
+            front = nondominated(inside) if len(inside) <= 64 * self.exact_limit else inside
+            if len(front) <= self.exact_limit:
+                self._exact = hypervolume(front, self.ref)
+            # A front too large for the exact value stays so until the next add/remove
+            self._exact_checked = True
+        if self._exact is not None:
+            return self._exact
+        return self.estimate() if self.points else 0.0
+
+
+class IgdTracker:
+    """
+    IGD of a changing point set against a fixed reference front.
+
+    Same add()/remove() interface as HypervolumeTracker, and changes are likewise
+    recorded in O(1) and applied when the value is read. The non-dominated set and
+    each member's distances to the reference points are maintained from those deltas:
+    an added point is checked against the current front only, and a removed front
+    member only re-admits the points it alone was dominating.
+    """
+
+    def __init__(self, reference):
+        self.reference = np.asarray(reference, dtype=float)
+        self.points = Counter()
+        self.front = {}  # non-dominated point -> distances to every reference point
+        self._pending = Counter()
+        self._value = None
+
+    def add(self, point):
+        point = tuple(float(v) for v in point)
+        self.points[point] += 1
+        self._pending[point] += 1
+        self._value = None
+
+    def remove(self, point):
+        point = tuple(float(v) for v in point)
+        if self.points[point] > 0:
+            self.points[point] -= 1
+            if self.points[point] == 0:
+                del self.points[point]
+            self._pending[point] -= 1
+            self._value = None
+
+    def _admit(self, point):
+        """Put point on the front unless a member dominates it, evicting members it dominates"""
+        members = list(self.front)
+        front = np.array(members, dtype=float).reshape(-1, self.reference.shape[1])
+        p = np.asarray(point)
+        if point in self.front or _dominated_by(front, p):
+            return
+        if len(front):
+            evicted = (p <= front).all(axis=1) & (p < front).any(axis=1)
+            for i in np.flatnonzero(evicted):
+                del self.front[members[i]]
+        self.front[point] = np.linalg.norm(self.reference - p, axis=1)
+
+    def _flush(self):
+        changed = [point for point, delta in self._pending.items() if delta]
+        self._pending.clear()
+        # Removals first: a vacated front slot may re-admit points that member was dominating
+        vacated = [point for point in changed if point not in self.points and point in self.front]
+        for point in vacated:
+            del self.front[point]
+        freed = []
+        others = [q for q in self.points if q not in self.front]
+        if vacated and others:
+            removed, rest = np.array(vacated, dtype=float), np.array(others, dtype=float)
+            mask = (removed[:, np.newaxis, :] <= rest[np.newaxis, :, :]).all(axis=2).any(axis=0)
+            freed = [others[i] for i in np.flatnonzero(mask)]
+        # Lexicographic order admits every dominator before the points it dominates
+        for point in sorted(set(freed) | {point for point in changed if point in self.points}):
+            self._admit(point)
+
+    def value(self) -> float:
+        if self._value is None:
+            if self._pending:
+                self._flush()
+            if not self.front:
+                self._value = float("inf")
+            else:
+                self._value = float(np.min(np.stack(list(self.front.values())), axis=0).mean())
+        return self._value
@@ -0,0 +1,96 @@
+"""
+Authors: Cassandra Cinzori and Ian Solberg
+File: kernels.py
+Description: fused objective kernel - one pass over the assignment for all five objectives (Numba JIT, NumPy fallback)
+"""
+
+import os
+import numpy as np
+
+# Numba is optional; set ASSIGNTA_NO_NUMBA=1 to force the NumPy path
+try:
+    if os.environ.get("ASSIGNTA_NO_NUMBA"):
+        raise ImportError("disabled by ASSIGNTA_NO_NUMBA")
+    import numba
+
+    HAVE_NUMBA = True
+except ImportError:
+    numba = None
+    HAVE_NUMBA = False
+
+
+def _objectives_loop(assignment, unavail, willing, max_assigned, min_ta, lab_time_ids, col_counts, slot_stamp):
+    """
+    (overallocation, conflicts, undersupport, unavailable, unpreferred) in a single loop over the cells
+
+    Written for the JIT: scalar accumulators, a per-lab count array and a
+    per-timeslot "last TA seen" stamp (so no per-TA reset is needed). Both
+    arrays are caller-owned work buffers (num_labs and num_timeslots long).
+    """
+    num_tas, num_labs = assignment.shape
+    col_counts[:] = 0
+    slot_stamp[:] = -1
+    overallocation = conflicts = unavailable = unpreferred = 0
+
+    for t in range(num_tas):
+        row_count = 0
+        has_conflict = False
+        for l in range(num_labs):
+            if assignment[t, l] == 1:
+                row_count += 1
+                col_counts[l] += 1
+                if unavail[t, l] == 1:
+                    unavailable += 1
+                if willing[t, l] == 1:
+                    unpreferred += 1
+                slot = lab_time_ids[l]
+                if slot_stamp[slot] == t:
+                    has_conflict = True
+                slot_stamp[slot] = t
+        if row_count > max_assigned[t]:
+            overallocation += row_count - max_assigned[t]
+        if has_conflict:
+            conflicts += 1
+
+    undersupport = 0
+    for l in range(num_labs):
+        if col_counts[l] < min_ta[l]:
+            undersupport += min_ta[l] - col_counts[l]
+
+    return overallocation, conflicts, undersupport, unavailable, unpreferred
+
+
+def objectives_numpy(assignment, unavail, willing, max_assigned, min_ta, lab_time_ids, num_timeslots,
+                     col_counts=None, slot_stamp=None):
+    """
+    Vectorized NumPy equivalent of the fused kernel (used when Numba is not installed;
+    the work buffers are only needed by the loop and are ignored here)
+    """
+    assigned = assignment == 1
+    slot_counts = assigned.astype(np.int64) @ np.eye(num_timeslots, dtype=np.int64)[lab_time_ids]
+    return (
+        int(np.maximum(assigned.sum(axis=1) - max_assigned, 0).sum()),
+        int((slot_counts > 1).any(axis=1).sum()),
+        int(np.maximum(min_ta - assigned.sum(axis=0), 0).sum()),
+        int(np.count_nonzero(assigned & (unavail == 1))),
+        int(np.count_nonzero(assigned & (willing == 1))),
+    )
+
+
+if HAVE_NUMBA:
+    objectives_jit = numba.njit(cache=True, nogil=True)(_objectives_loop)
+
+    def objectives(assignment, unavail, willing, max_assigned, min_ta, lab_time_ids, num_timeslots,
+                   col_counts=None, slot_stamp=None):
+        """Five objective values from the compiled kernel (compiled on first call, cached on disk)
+
+        Pass preallocated col_counts (num_labs) / slot_stamp (num_timeslots) int64
+        buffers to score without allocating."""
+        if col_counts is None:
+            col_counts = np.empty(assignment.shape[1], dtype=np.int64)
+        if slot_stamp is None:
+            slot_stamp = np.empty(num_timeslots, dtype=np.int64)
+        return objectives_jit(assignment, unavail, willing, max_assigned, min_ta, lab_time_ids, col_counts, slot_stamp)
+else:
+    objectives_jit = None
+    objectives = objectives_numpy
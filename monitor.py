@@ -0,0 +1,106 @@
+"""
+Authors: Cassandra Cinzori and Ian Solberg
+File: monitor.py
+Description: live metrics publishers for Evo.evolve observers (JSON-lines file, HTTP endpoint)
+"""
+
+import json
+import queue
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def to_json(metrics: dict) -> str:
+    """Serialize a metrics snapshot (numpy scalars become plain numbers)"""
+    return json.dumps(metrics, default=lambda v: v.item() if hasattr(v, "item") else str(v))
+
+
+class JsonLinesPublisher:
+    """
+    Observer that appends each metrics snapshot as one JSON line to a file.
+
+    Calls from the evolve loop only enqueue the snapshot (dropping it if the
+    queue is full); a background thread does the writing, so a slow disk
+    never stalls the search. Tail the file to follow a run.
+    """
+
+    def __init__(self, path: str, max_pending: int = 1000):
+        self.path = path
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._write_loop, name="metrics-jsonl", daemon=True)
+        self._thread.start()
+
+    def __call__(self, metrics: dict):
+        try:
+            self._queue.put_nowait(metrics)
+        except queue.Full:
+            self.dropped += 1
+
+    def _write_loop(self):
+        with open(self.path, "a") as f:
+            while True:
+                metrics = self._queue.get()
+                if metrics is None:
+                    return
+                f.write(to_json(metrics) + "\n")
+                f.flush()
+
+    def close(self):
+        """Flush pending snapshots and stop the writer thread"""
+        self._queue.put(None)
+        self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class HttpMetricsServer:
+    """
+    Observer that serves the latest metrics snapshot over HTTP.
+
+    GET /metrics (or /) returns the most recent snapshot as JSON. The server
+    runs on a daemon thread; observer calls just swap a reference.
+    Use port=0 to pick a free port (see .port).
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8765):
+        self._latest = {}
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = to_json(server._latest).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # keep request logs out of the optimizer output
+
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self.host, self.port = self._httpd.server_address[:2]
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="metrics-http", daemon=True)
+        self._thread.start()
+
+    def __call__(self, metrics: dict):
+        self._latest = metrics
+
+    def close(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
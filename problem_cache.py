@@ -0,0 +1,68 @@
+"""
+Authors: Cassandra Cinzori and Ian Solberg
+File: problem_cache.py
+Description: compiled problem cache - preprocessed AssignTa arrays keyed by source file hash
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+import numpy as np
+
+# Bump whenever the set or meaning of cached arrays changes
+CACHE_VERSION = 1
+
+DEFAULT_CACHE_DIR = ".assignta_cache"
+
+
+def source_hash(*paths: str) -> str:
+    """
+    Hash the raw bytes of the source CSVs (plus the cache version) into a cache key
+    """
+    digest = hashlib.sha256(f"v{CACHE_VERSION}".encode())
+    for fp in paths:
+        with open(fp, "rb") as f:
+            digest.update(f.read())
+        digest.update(b"\0")
+    return digest.hexdigest()[:32]
+
+
+def cache_path(cache_dir: str, key: str) -> str:
+    return os.path.join(cache_dir, key)
+
+
+def load(cache_dir: str, key: str, names: tuple) -> dict:
+    """
+    Load cached arrays as read-only memory maps
+
+    Returns None on a cache miss (or an incomplete entry)
+    """
+    entry = cache_path(cache_dir, key)
+    files = {name: os.path.join(entry, f"{name}.npy") for name in names}
+    if not all(os.path.exists(fp) for fp in files.values()):
+        return None
+    return {name: np.load(fp, mmap_mode="r") for name, fp in files.items()}
+
+
+def save(cache_dir: str, key: str, arrays: dict):
+    """
+    Write arrays as one .npy per array under cache_dir/key
+
+    Plain .npy (rather than .npz) so entries can be memory mapped. The entry is
+    built in a temp dir and renamed into place, so concurrent workers never
+    see a partial entry.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    entry = cache_path(cache_dir, key)
+    if os.path.exists(entry):
+        return
+
+    tmp = tempfile.mkdtemp(dir=cache_dir, prefix=f".{key}-")
+    try:
+        for name, values in arrays.items():
+            np.save(os.path.join(tmp, f"{name}.npy"), np.asarray(values))
+        os.rename(tmp, entry)
+    except OSError:
+        # Another process won the race - keep theirs
+        shutil.rmtree(tmp, ignore_errors=True)
@@ -8,6 +8,8 @@ Description: A profiler calss that demonstrates use of decorates, static variabl
 
 """
 from collections import defaultdict
+import functools
+import threading
 import time
 
 
@@ -20,22 +22,26 @@ def profile(f):
 class Profiler:
 
     # class (shared) variables
+    enabled = True  # set False to run functions without timing overhead
     calls = defaultdict(int)  # function name --> # of calls (default 0)
     time = defaultdict(float) # function name --> total elapsed time (default 0.0)
+    lock = threading.Lock()  # profiled functions may run on several threads (Evo thread pool)
 
     @staticmethod
     def profile(f):
+        @functools.wraps(f)
         def wrapper(*args, **kwargs):
+            if not Profiler.enabled:
+                return f(*args, **kwargs)
             start = time.time_ns()
             val = f(*args, **kwargs)
             elapsed = (time.time_ns() - start) / 10**9   # converting nanosec to sec
 
             fname = str(f).split()[1] # extracting the function name
-            Profiler.calls[fname] += 1  # increment the call count
-            # D[key] += value
-            # D[key] = D[key] + value  (key error in standard dictionaries)
-
-            Profiler.time[fname] += elapsed # accumulate the total elapsed time
+            # D[key] += value is a read-modify-write - guard it against concurrent callers
+            with Profiler.lock:
+                Profiler.calls[fname] += 1  # increment the call count
+                Profiler.time[fname] += elapsed # accumulate the total elapsed time
             return val
 
         return wrapper
@@ -60,9 +66,13 @@ class Profiler:
         lines.append("=" * 80)
         lines.append("")
 
+        # Consistent snapshot, even if profiled functions are still running on other threads
+        with Profiler.lock:
+            calls, times = dict(Profiler.calls), dict(Profiler.time)
+
         # Calculate totals
-        total_time = sum(Profiler.time.values())
-        total_calls = sum(Profiler.calls.values())
+        total_time = sum(times.values())
+        total_calls = sum(calls.values())
 
         lines.append(f"Total Runtime: {total_time:.6f} seconds")
         lines.append(f"Total Function Calls: {total_calls}")
@@ -73,12 +83,12 @@ class Profiler:
         lines.append("-" * 60)
 
         # One row output per fucntion
-        sorted_func = sorted(Profiler.calls.items(),
-                             key=lambda x: Profiler.time[x[0]],
+        sorted_func = sorted(calls.items(),
+                             key=lambda x: times[x[0]],
                              reverse=True)
 
         for name, num in sorted_func:
-            sec = Profiler.time[name]
+            sec = times[name]
             lines.append(f'{name:20s} {num:6d} {sec:10.6f} {sec / num:10.6f}')
 
         lines.append("-" * 60)
@@ -110,8 +120,9 @@ class Profiler:
         """
         Clear all profiling data
         """
-        Profiler.calls.clear()
-        Profiler.time.clear()
+        with Profiler.lock:
+            Profiler.calls.clear()
+            Profiler.time.clear()
 
 
 
@@ -4,22 +4,34 @@ File: run_optimization.py
 Description: Main script to run TA assignment optimization
 """
 
-from evo import Evo
+from evo import Evo, Stagnation, Plateau, HardConstraintsMet
 from profiler import profile, Profiler
 from assignta import AssignTa
+from sparse_assignment import SparseAssignment
+import problem_cache
+import indicators
+import argparse
+import multiprocessing
 import numpy as np
 import os
+import random as rnd
+import time
 from datetime import datetime
 
-# Output directory
+# Defaults (all overridable from the command line)
 OUTPUT_DIR = "outputs"
+TA_FILE = "assignta_data/tas.csv"
+LAB_FILE = "assignta_data/sections.csv"
+GROUP_NAME = "CassIan"
+TIME_LIMIT = 300
+REOPTIMIZE_TIME_LIMIT = 30  # A warm-started run after a small edit needs far less time
 
 
-def ensure_output_dir():
+def ensure_output_dir(output_dir=OUTPUT_DIR):
     """Create outputs directory if it doesn't exist"""
-    if not os.path.exists(OUTPUT_DIR):
-        os.makedirs(OUTPUT_DIR)
-        print(f"📁 Created directory: {OUTPUT_DIR}/")
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+        print(f"📁 Created directory: {output_dir}/")
 
 
 def save_readable_assignment(assignment, assignta, filepath):
@@ -38,8 +50,8 @@ def save_readable_assignment(assignment, assignta, filepath):
     import pandas as pd
 
     # Get TA names and lab sections
-    ta_names = assignta.ta["name"].values
-    lab_sections = assignta.lab["daytime"].values
+    ta_names = assignta.ta_names
+    lab_sections = assignta.lab_times
 
     # Create list of assignments
     assignments = []
@@ -62,7 +74,30 @@ def save_readable_assignment(assignment, assignta, filepath):
 
 
 @profile
-def optimize_ta_assignment(time_limit=300):
+def optimize_ta_assignment(
+    time_limit=300,
+    ta_file=TA_FILE,
+    lab_file=LAB_FILE,
+    n=None,
+    reserve=0.0,
+    dom=100,
+    status=100,
+    workers=1,
+    parallel="process",
+    batch_size=1,
+    init_pop=20,
+    seeding="greedy",
+    exact_seed=False,
+    sparse=False,
+    checkpoint=None,
+    cache_dir=problem_cache.DEFAULT_CACHE_DIR,
+    group_name=GROUP_NAME,
+    observers=(),
+    hv_samples=4096,
+    stop=None,
+    repair=False,
+    reoptimize=False,
+):
     """
     Run TA assignment optimization
 
@@ -70,6 +105,47 @@ def optimize_ta_assignment(time_limit=300):
     ----------
     time_limit : int
         Time limit in seconds (default: 300 = 5 minutes)
+    ta_file, lab_file : str
+        TA and section CSVs
+    n : int, optional
+        Iteration (agent invocation) budget - evolution stops at whichever budget runs out first
+    reserve : float
+        Seconds of the time limit held back for saving reports after evolution
+    dom : int or str
+        Remove dominated solutions every dom iterations, or "auto" for adaptive pruning
+    status : int
+        How often to print progress
+    workers : int
+        Processes used to score children (1 = score in this process)
+    parallel : str
+        "process" or "thread" pool for workers > 1
+    batch_size : int
+        Children produced and scored per step
+    init_pop : int
+        Number of seed solutions added to the initial population
+    seeding : str
+        "greedy" for feasible greedy warm starts (and randomized variants), "random" for random matrices
+    exact_seed : bool
+        Also seed with an exact (MILP) reference front - requires scipy
+    sparse : bool
+        Use the sparse assignment representation (the dense-only local search agent is not registered)
+    checkpoint : str, optional
+        Resume from this population file if it exists, and save to it during/after the run
+    cache_dir : str, optional
+        Compiled problem cache directory (None disables the cache)
+    group_name : str
+        Group name for the summary table
+    observers : list
+        Metrics observers passed to Evo.evolve (see monitor.py)
+    hv_samples : int
+        Monte Carlo samples for the hypervolume indicator (0 disables indicators)
+    stop : StopCondition, optional
+        Convergence condition that ends evolution early (see build_stop_condition)
+    repair : bool
+        Repair every child (unavailable cells, conflicts, overallocation) before scoring
+    reoptimize : bool
+        Warm start from checkpoint after an edit to the CSVs: rescore the saved front for the
+        changed TAs/sections only and skip the seed population
 
     Returns
     -------
@@ -79,49 +155,161 @@ def optimize_ta_assignment(time_limit=300):
     # Initialize
     print("Loading data...")
     a = AssignTa()
-    a.assign_ta_df("assignta_data/tas.csv")
-    a.assign_lab_df("assignta_data/sections.csv")
+    a.load_problem(ta_file, lab_file, cache_dir=cache_dir)
 
     evo = Evo()
 
-    # Add objectives
+    # Add objectives - one fused call scores all six (a bound method, so it can be shipped to workers)
     print("Adding objectives...")
-    evo.add_objective("overallocation", lambda sol: a.overallocation(sol))
-    evo.add_objective("conflicts", lambda sol: a.conflicts(sol))
-    evo.add_objective("undersupport", lambda sol: a.undersupport(sol))
-    evo.add_objective("unavailable", lambda sol: a.unavailable(sol))
-    evo.add_objective("unpreferred", lambda sol: a.unpreferred(sol))
-    evo.add_objective("aggregatescore", lambda sol: a.aggregate_objective(sol))
+    evo.add_objectives(AssignTa.SCORE_NAMES, a.score_all)
 
     # Add agents
     print("Adding agents...")
-    evo.add_agent("random_flip", lambda sols: a.random_flip_agent(sols[0]))
+    # Mask-aware flip/swap: never create an assignment to an unavailable TA
+    evo.add_agent("masked_flip", lambda sols: a.masked_flip_agent(sols[0]))
     evo.add_agent("preference", lambda sols: a.preference_agent(sols[0]))
-    evo.add_agent("schedule_swap", lambda sols: a.schedule_swapping_agent(sols[0]))
+    evo.add_agent("compatible_swap", lambda sols: a.compatible_swap_agent(sols[0]))
     evo.add_agent("conflict_remover", lambda sols: a.conflict_remover_agent(sols[0]))
     evo.add_agent("undersupport", lambda sols: a.undersupport_agent(sols[0]))
+    if not sparse:
+        # Scores every cell's move each step - O(TAs x labs) - so it would undo the sparse representation
+        evo.add_agent("local_search", lambda sols: a.local_search_agent(sols[0]))
+    evo.add_agent("row_crossover", a.row_crossover_agent, k=2)
+    evo.add_agent("column_crossover", a.column_crossover_agent, k=2)
+    evo.add_agent("repair_crossover", a.repair_crossover_agent, k=2)
+    if repair:
+        evo.set_repair(a.repair_children)
 
     # Create initial population
     print("Creating initial population...")
-    evo.add_solution(a.zeros())  # Start with empty assignment
-    for _ in range(20):
-        evo.add_solution(np.random.randint(0, 2, size=(40, 17)))
+    if reoptimize and (checkpoint is None or not os.path.exists(checkpoint)):
+        raise FileNotFoundError(f"Re-optimization needs an existing checkpoint (got {checkpoint})")
+    if checkpoint is not None and os.path.exists(checkpoint):
+        metadata = evo.load_checkpoint(checkpoint)
+        print(f"Resumed {evo.size()} solutions from {checkpoint}")
+        rescore_checkpoint(evo, a, metadata.get("problem"), full=reoptimize)
+    if checkpoint is not None:
+        # Saved with every checkpoint so a later run can tell what changed in the CSVs
+        evo.checkpoint_metadata["problem"] = {name: np.array(values) for name, values in a.problem_arrays().items()}
+    evo.add_solution(a.zeros(sparse=sparse))  # Start with empty assignment
+    if reoptimize:
+        init_pop = 0  # The rescored front is the warm start
+    if seeding == "greedy":
+        for sol in a.seed_population(init_pop, sparse=sparse):
+            evo.add_solution(sol)
+    else:
+        for _ in range(init_pop):
+            sol = np.random.randint(0, 2, size=a.zeros().shape)
+            evo.add_solution(SparseAssignment.from_dense(sol) if sparse else sol)
+    reference = []
+    if exact_seed:
+        import solver
+
+        reference = solver.reference_front(a)
+        print(f"Exact solver contributed {len(reference)} reference solutions")
+        for sol in reference:
+            evo.add_solution(SparseAssignment.from_dense(sol) if sparse else sol)
+
+    # Convergence indicators on the five objectives: hypervolume against a fixed reference
+    # point just past the worst possible scores (so every solution counts and values stay
+    # comparable across runs of one problem), and IGD to the exact front when we have one
+    if hv_samples > 0:
+        names = evo.objective_names()[:5]
+        evo.add_indicator(
+            "hypervolume",
+            indicators.HypervolumeTracker(np.array(a.objective_bounds()) + 1, np.zeros(5), samples=hv_samples),
+            objectives=names,
+        )
+        if reference:
+            evo.add_indicator(
+                "igd",
+                indicators.IgdTracker([[getattr(a, name)(sol) for name in names] for sol in reference]),
+                objectives=names,
+            )
+
+    # Worker processes attach to one shared copy of the problem arrays instead of unpickling their own.
+    # Fork would hand workers a copy-on-write copy without pickling, so start them from a fork server.
+    shared, start_method = None, None
+    if workers > 1 and parallel == "process":
+        shared = a.share_problem()
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            start_method = "forkserver"
 
     # Run optimization
     print(f"\n🚀 Starting {time_limit}-second optimization...\n")
-    evo.evolve(time_limit=time_limit, dom=100, status=100)
+    try:
+        evo.evolve(
+            n=n,
+            time_limit=time_limit,
+            reserve=reserve,
+            dom=dom,
+            status=status,
+            batch_size=batch_size,
+            workers=workers,
+            parallel=parallel,
+            start_method=start_method,
+            checkpoint=checkpoint,
+            observers=observers,
+            stop=stop,
+        )
+    finally:
+        if shared is not None:
+            shared.close()
+
+    return evo.summarize(group_name=group_name), evo, a
+
+
+def rescore_checkpoint(evo, a, old_problem, full=False):
+    """
+    Bring a resumed population's scores up to date with the current CSVs
 
-    return evo.summarize(group_name="CassIan"), evo, a
+    With the problem saved in the checkpoint, only the TAs and sections that changed are
+    rescored (AssignTa.delta_scores). Checkpoints without it are rescored from scratch
+    when full is set, and trusted as-is otherwise.
+    """
+    start = time.perf_counter()
+    if old_problem is None:
+        if not full:
+            return
+        evo.rescore()
+        print(f"Rescored {evo.size()} solutions from scratch in {time.perf_counter() - start:.3f}s")
+        return
+
+    changes = a.problem_changes(old_problem)
+    if changes is None:
+        raise ValueError("Checkpoint was saved for a different set of TAs/sections - rerun from scratch")
+    if not any(len(index) for index in changes.values()):
+        print("Problem unchanged since the checkpoint")
+        return
+    evo.rescore(lambda scores, sol: a.delta_scores(sol, scores, old_problem, changes))
+    print(
+        f"Problem changed ({len(changes['rows'])} TAs, {len(changes['cols'])} section minimums,"
+        f" {len(changes['time_cols'])} section times): delta-rescored {evo.size()} solutions"
+        f" in {time.perf_counter() - start:.3f}s"
+    )
+
+
+def best_by_aggregate(evo):
+    """
+    Best solution by aggregate score, straight from Evo's best-solution index
+
+    Returns
+    -------
+    tuple
+        (dict of objective name -> score, solution)
+    """
+    best_key, best_solution = evo.best("aggregatescore")
+    if best_key is None:
+        return None, None
+    return dict(zip(evo.objective_names(), best_key)), best_solution
 
 
-def save_best_solution(summary, evo, assignta, output_dir=OUTPUT_DIR):
+def save_best_solution(evo, assignta, output_dir=OUTPUT_DIR):
     """
     Save the best solution in a readable format
 
     Parameters
     ----------
-    summary : pd.DataFrame
-        Summary DataFrame from optimization
     evo : Evo
         Evo object containing solutions
     assignta : AssignTa
@@ -129,20 +317,12 @@ def save_best_solution(summary, evo, assignta, output_dir=OUTPUT_DIR):
     output_dir : str
         Directory to save output files
     """
-    best_row = summary.iloc[0]
-
-    # Get the best solution from the population dictionary
-    # The keys are tuples of objective values, find the one matching best_row
-    best_key = tuple(
-        best_row[obj] for obj, _ in evo.objectives if obj != "aggregatescore"
-    )
-    best_solution = evo.pop.get(best_key)
-
-    # If not found, try getting any solution from pop as fallback
-    if best_solution is None and len(evo.pop) > 0:
-        best_solution = next(iter(evo.pop.values()))
+    best_row, best_solution = best_by_aggregate(evo)
 
     if best_solution is not None:
+        if isinstance(best_solution, SparseAssignment):
+            best_solution = best_solution.to_dense()
+
         # Save the raw assignment matrix as CSV
         matrix_path = os.path.join(output_dir, "best_assignment_matrix.csv")
         np.savetxt(matrix_path, best_solution, delimiter=",", fmt="%d")
@@ -220,26 +400,174 @@ def save_best_solution(summary, evo, assignta, output_dir=OUTPUT_DIR):
     print(f"✅ {filepath}")
 
 
-def main():
+def prune_interval(value):
+    """argparse type for --dom: a positive int or 'auto'"""
+    if value == "auto":
+        return value
+    interval = int(value)
+    if interval < 1:
+        raise argparse.ArgumentTypeError("--dom must be a positive integer or 'auto'")
+    return interval
+
+
+def build_stop_condition(args):
+    """Combine the --stall-* / --hv-plateau / --feasible-stall options (any one stops the run)"""
+    conditions = []
+    if args.stall_iterations is not None or args.stall_seconds is not None:
+        conditions.append(Stagnation(args.stall_iterations, args.stall_seconds))
+    if args.hv_plateau is not None:
+        conditions.append(Plateau("hypervolume", iterations=args.hv_plateau))
+    if args.feasible_stall is not None:
+        conditions.append(HardConstraintsMet(iterations=args.feasible_stall))
+    if not conditions:
+        return None
+    stop = conditions[0]
+    for condition in conditions[1:]:
+        stop = stop | condition
+    return stop
+
+
+def parse_args(argv=None):
+    """Command-line options for an optimization run"""
+    parser = argparse.ArgumentParser(description="Optimize TA to lab assignments with evolutionary search")
+
+    data = parser.add_argument_group("inputs")
+    data.add_argument("--tas", default=TA_FILE, help="TA availability/preferences CSV")
+    data.add_argument("--sections", default=LAB_FILE, help="Lab sections CSV")
+    data.add_argument("--cache-dir", default=problem_cache.DEFAULT_CACHE_DIR,
+                      help="Compiled problem cache directory")
+    data.add_argument("--no-cache", action="store_true", help="Always parse the CSVs")
+
+    budget = parser.add_argument_group("budget")
+    budget.add_argument("--time-limit", type=float, default=None,
+                        help=f"Wall time budget in seconds (default: {TIME_LIMIT}, or {REOPTIMIZE_TIME_LIMIT} with --reoptimize)")
+    budget.add_argument("--iterations", type=int, default=None,
+                        help="Agent invocation budget (stops at whichever budget runs out first)")
+    budget.add_argument("--reserve", type=float, default=0.5,
+                        help="Seconds of the time limit held back for writing outputs")
+
+    search = parser.add_argument_group("search")
+    search.add_argument("--workers", type=int, default=1, help="Processes (or threads) scoring children")
+    search.add_argument("--parallel", choices=["process", "thread"], default="process",
+                        help="Score children in a process pool or a thread pool (no pickling)")
+    search.add_argument("--batch-size", type=int, default=1, help="Children produced and scored per step")
+    search.add_argument("--dom", type=prune_interval, default="auto",
+                        help='Remove dominated solutions every N iterations, or "auto" to adapt to prune cost')
+    search.add_argument("--status", type=int, default=100, help="Print progress every N iterations (0=never)")
+    search.add_argument("--init-pop", type=int, default=20, help="Seed solutions in the initial population")
+    search.add_argument("--seeding", choices=["greedy", "random"], default="greedy",
+                        help="Greedy feasible warm starts or random matrices")
+    search.add_argument("--exact-seed", action="store_true",
+                        help="Also seed with an exact MILP reference front (requires scipy)")
+    search.add_argument("--sparse", action="store_true", help="Use the sparse assignment representation")
+    search.add_argument("--repair", action="store_true",
+                        help="Clear unavailable cells, conflicts and overallocation in every child before scoring")
+    search.add_argument("--seed", type=int, default=None, help="Random seed for reproducible runs")
+    search.add_argument("--checkpoint", default=None,
+                        help="Population file to resume from and save to")
+    search.add_argument("--reoptimize", action="store_true",
+                        help="After editing the CSVs: delta-rescore the --checkpoint front and run a short warm-started search")
+
+    stopping = parser.add_argument_group("early stopping")
+    stopping.add_argument("--stall-iterations", type=int, default=None,
+                          help="Stop when the front gains no new member for N iterations")
+    stopping.add_argument("--stall-seconds", type=float, default=None,
+                          help="Stop when the front gains no new member for S seconds")
+    stopping.add_argument("--hv-plateau", type=int, default=None,
+                          help="Stop when hypervolume has not improved over N iterations")
+    stopping.add_argument("--feasible-stall", type=int, default=None,
+                          help="Stop once conflicts and unavailable reach zero and the front then stalls for N iterations")
+
+    output = parser.add_argument_group("output")
+    output.add_argument("--output-dir", default=OUTPUT_DIR, help="Directory for reports")
+    output.add_argument("--front-file", default=None,
+                        help="Also export the front with solutions (.npz, .parquet or .arrow) into the output dir")
+    output.add_argument("--metrics-file", default=None,
+                        help="Append live metrics as JSON lines to this file (tail it to watch the run)")
+    output.add_argument("--metrics-port", type=int, default=None,
+                        help="Serve live metrics as JSON on http://127.0.0.1:PORT/metrics")
+    output.add_argument("--group", default=GROUP_NAME, help="Group name used in the summary and file names")
+    output.add_argument("--profile", choices=["on", "off"], default="on",
+                        help="Time objectives/agents with the profiler and write a report")
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
     """Main execution function"""
+    args = parse_args(argv)
+    if args.reoptimize and args.checkpoint is None:
+        raise SystemExit("--reoptimize needs --checkpoint (the population saved by the previous run)")
+    if args.time_limit is None:
+        args.time_limit = REOPTIMIZE_TIME_LIMIT if args.reoptimize else TIME_LIMIT
+    output_dir = args.output_dir
+    group = args.group
+
+    if args.seed is not None:
+        np.random.seed(args.seed)
+        rnd.seed(args.seed)
+    Profiler.enabled = args.profile == "on"
+
     # Ensure output directory exists
-    ensure_output_dir()
+    ensure_output_dir(output_dir)
 
     # Header
     print("=" * 80)
-    print("TA ASSIGNMENT OPTIMIZATION - CassIan")
+    print(f"TA ASSIGNMENT OPTIMIZATION - {group}")
     print("=" * 80)
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     print(f"Run started: {timestamp}")
     print()
 
-    # Run optimization
-    summary, evo, assignta = optimize_ta_assignment(time_limit=300)
+    # Live metrics publishers, closed even if the run fails
+    # (monitor pulls in http.server, so it is only imported when asked for)
+    observers = []
+    try:
+        if args.metrics_file:
+            import monitor
+
+            observers.append(monitor.JsonLinesPublisher(args.metrics_file))
+        if args.metrics_port is not None:
+            import monitor
+
+            observers.append(monitor.HttpMetricsServer(port=args.metrics_port))
+
+        # Run optimization
+        summary, evo, assignta = optimize_ta_assignment(
+            time_limit=args.time_limit,
+            ta_file=args.tas,
+            lab_file=args.sections,
+            n=args.iterations,
+            reserve=args.reserve,
+            dom=args.dom,
+            status=args.status,
+            workers=args.workers,
+            parallel=args.parallel,
+            batch_size=args.batch_size,
+            init_pop=args.init_pop,
+            seeding=args.seeding,
+            exact_seed=args.exact_seed,
+            sparse=args.sparse,
+            checkpoint=args.checkpoint,
+            cache_dir=None if args.no_cache else args.cache_dir,
+            group_name=group,
+            observers=observers,
+            stop=build_stop_condition(args),
+            repair=args.repair,
+            reoptimize=args.reoptimize,
+        )
+    finally:
+        for observer in observers:
+            observer.close()
 
     # Save summary CSV
-    summary_path = os.path.join(OUTPUT_DIR, "CassIan_summary.csv")
+    summary_path = os.path.join(output_dir, f"{group}_summary.csv")
     summary.to_csv(summary_path, index=False)
     print(f"\n✅ {summary_path} ({len(summary)} solutions)")
+    if args.front_file:
+        front_path = os.path.join(output_dir, args.front_file)
+        evo.export(front_path)
+        print(f"✅ {front_path}")
 
     # Display top solutions
     print("\n" + "=" * 80)
@@ -251,30 +579,33 @@ def main():
     print("\n" + "=" * 80)
     print("SAVING BEST SOLUTION")
     print("=" * 80)
-    save_best_solution(summary, evo, assignta)
+    save_best_solution(evo, assignta, output_dir=output_dir)
 
     # Generate profiling report
-    print("\n" + "=" * 80)
-    print("GENERATING PROFILING REPORT")
-    print("=" * 80)
-    profile_path = os.path.join(OUTPUT_DIR, "CassIan_profile.txt")
-    Profiler.report(output_file=profile_path)
-    print(f"✅ {profile_path}")
+    if Profiler.enabled:
+        print("\n" + "=" * 80)
+        print("GENERATING PROFILING REPORT")
+        print("=" * 80)
+        profile_path = os.path.join(output_dir, f"{group}_profile.txt")
+        Profiler.report(output_file=profile_path)
+        print(f"✅ {profile_path}")
 
     # Final summary
+    num_tas, num_labs = assignta.zeros().shape
     print("\n" + "=" * 80)
     print("OPTIMIZATION COMPLETE!")
     print("=" * 80)
-    print(f"\n📁 All outputs saved to: {OUTPUT_DIR}/")
+    print(f"\n📁 All outputs saved to: {output_dir}/")
     print("\nGenerated files:")
-    print(f"  ✅ CassIan_summary.csv           - All {len(summary)} solutions")
-    print("  ✅ CassIan_profile.txt           - Performance profiling data")
+    print(f"  ✅ {group}_summary.csv".ljust(34) + f"- All {len(summary)} solutions")
+    if Profiler.enabled:
+        print(f"  ✅ {group}_profile.txt".ljust(34) + "- Performance profiling data")
     print("  ✅ best_solution.txt             - Detailed metrics report")
-    print("  ✅ best_assignment_matrix.csv    - Raw assignment matrix (40x17)")
+    print(f"  ✅ best_assignment_matrix.csv    - Raw assignment matrix ({num_tas}x{num_labs})")
     print("  ✅ best_assignment_readable.csv  - Human-readable assignments")
 
     # Show best solution summary
-    best = summary.iloc[0]
+    best, _ = best_by_aggregate(evo)
     print("\n🏆 Best Solution:")
     print(f"   Aggregate Score: {best['aggregatescore']:.2f}")
     print(f"   Conflicts: {best['conflicts']} | Unavailable: {best['unavailable']}")
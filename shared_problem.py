@@ -0,0 +1,103 @@
+"""
+Authors: Cassandra Cinzori and Ian Solberg
+File: shared_problem.py
+Description: problem arrays published once in shared memory, attached zero-copy by worker processes
+"""
+
+import sys
+import threading
+from multiprocessing import shared_memory
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+
+# Guards the resource-tracker swap in _open_untracked (Python < 3.13)
+_ATTACH_LOCK = threading.Lock()
+
+
+class _Untracked:
+    """Stand-in for multiprocessing.resource_tracker while attaching: registers nothing"""
+
+    @staticmethod
+    def register(name, rtype):
+        pass
+
+    @staticmethod
+    def unregister(name, rtype):
+        pass
+
+
+class SharedProblem:
+    """
+    Owner of a set of arrays copied once into shared memory blocks.
+
+    `handle` is a small picklable description ({name: (block name, shape, dtype)})
+    that workers pass to attach(). The owner must outlive every attached worker;
+    close() (or leaving the with-block) releases and unlinks the blocks.
+    """
+
+    def __init__(self, arrays: dict):
+        self.blocks = {}
+        self.handle = {}
+        try:
+            for name, values in arrays.items():
+                values = np.ascontiguousarray(values)
+                block = SharedMemory(create=True, size=max(values.nbytes, 1))
+                np.ndarray(values.shape, values.dtype, buffer=block.buf)[...] = values
+                self.blocks[name] = block
+                self.handle[name] = (block.name, values.shape, values.dtype.str)
+        except Exception:
+            self.close()
+            raise
+
+    def nbytes(self) -> int:
+        return sum(block.size for block in self.blocks.values())
+
+    def close(self):
+        """Release and unlink every block (workers must be done with them)"""
+        for block in self.blocks.values():
+            block.close()
+            block.unlink()
+        self.blocks = {}
+        self.handle = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _open_untracked(block_name: str) -> SharedMemory:
+    """
+    Attach to an existing block without registering it with this process's resource tracker
+
+    Before Python 3.13 every SharedMemory(name=...) registers the block, so a process with its
+    own tracker would warn about a "leak" and unlink the owner's block when it exits. Pool
+    workers share the owner's tracker instead, where unregistering afterwards would drop the
+    owner's entry - so registration is skipped altogether, like track=False on 3.13+.
+    """
+    if sys.version_info >= (3, 13):
+        return SharedMemory(name=block_name, track=False)
+    with _ATTACH_LOCK:
+        tracker, shared_memory.resource_tracker = shared_memory.resource_tracker, _Untracked
+        try:
+            return SharedMemory(name=block_name)
+        finally:
+            shared_memory.resource_tracker = tracker
+
+
+def attach(handle: dict) -> tuple:
+    """
+    Read-only array views onto published blocks: (arrays by name, blocks)
+
+    Keep the returned blocks referenced for as long as the arrays are used. The owner
+    is responsible for unlinking; attached blocks are never tracked in this process.
+    """
+    arrays, blocks = {}, []
+    for name, (block_name, shape, dtype) in handle.items():
+        block = _open_untracked(block_name)
+        view = np.ndarray(shape, np.dtype(dtype), buffer=block.buf)
+        view.flags.writeable = False
+        arrays[name] = view
+        blocks.append(block)
+    return arrays, blocks
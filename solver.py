@@ -0,0 +1,169 @@
+"""
+Authors: Cassandra Cinzori and Ian Solberg
+File: solver.py
+Description: exact integer-programming backend (scipy.optimize.milp) for reference fronts and Evo seeds
+"""
+
+import numpy as np
+from assignta import AssignTa
+from profiler import profile
+
+OBJECTIVES = ("overallocation", "conflicts", "undersupport", "unavailable", "unpreferred")
+
+
+class TaAssignmentMilp:
+    """
+    The TA assignment problem as a mixed integer program.
+
+    Variables (in order):
+      x[t, l]   binary    TA t assigned to lab l
+      over[t]   integer   overallocation of TA t       (>= row sum - max_assigned)
+      under[l]  integer   undersupport of lab l        (>= min_ta - column sum)
+      c[t]      binary    TA t has a time conflict     (forced on by >1 lab in any timeslot)
+
+    Every objective is then linear, so weighted-sum and epsilon-constraint
+    scalarizations can be solved exactly.
+    """
+
+    def __init__(self, a: AssignTa):
+        self.a = a
+        self.num_tas, self.num_labs = a.unavail.shape
+        self.num_x = self.num_tas * self.num_labs
+
+        # Variable offsets
+        self.over_start = self.num_x
+        self.under_start = self.over_start + self.num_tas
+        self.conflict_start = self.under_start + self.num_labs
+        self.num_vars = self.conflict_start + self.num_tas
+
+    def objective_rows(self) -> dict:
+        """
+        Linear coefficient vector for each of the five objectives
+        """
+        rows = {name: np.zeros(self.num_vars) for name in OBJECTIVES}
+        rows["overallocation"][self.over_start:self.under_start] = 1
+        rows["undersupport"][self.under_start:self.conflict_start] = 1
+        rows["conflicts"][self.conflict_start:] = 1
+        rows["unavailable"][:self.num_x] = np.asarray(self.a.unavail).ravel() == 1
+        rows["unpreferred"][:self.num_x] = np.asarray(self.a.willing).ravel() == 1
+        return rows
+
+    def constraints(self):
+        """
+        (A, lower, upper) linking the penalty variables to x
+        """
+        from scipy.sparse import lil_matrix
+
+        a = self.a
+        slot_labs = [np.where(a.lab_time_ids == s)[0] for s in range(a.num_timeslots)]
+        slot_labs = [labs for labs in slot_labs if len(labs) > 1]
+
+        num_rows = self.num_tas + self.num_labs + self.num_tas * len(slot_labs)
+        A = lil_matrix((num_rows, self.num_vars))
+        lower = np.full(num_rows, -np.inf)
+        upper = np.zeros(num_rows)
+
+        row = 0
+        # sum_l x[t, l] - over[t] <= max_assigned[t]
+        for t in range(self.num_tas):
+            A[row, t * self.num_labs:(t + 1) * self.num_labs] = 1
+            A[row, self.over_start + t] = -1
+            upper[row] = a.max_assigned[t]
+            row += 1
+
+        # sum_t x[t, l] + under[l] >= min_ta[l]
+        for l in range(self.num_labs):
+            A[row, np.arange(self.num_tas) * self.num_labs + l] = 1
+            A[row, self.under_start + l] = 1
+            lower[row], upper[row] = a.min_ta[l], np.inf
+            row += 1
+
+        # sum_{l in slot} x[t, l] - (k - 1) c[t] <= 1 for every TA and shared timeslot
+        for labs in slot_labs:
+            for t in range(self.num_tas):
+                A[row, t * self.num_labs + labs] = 1
+                A[row, self.conflict_start + t] = -(len(labs) - 1)
+                upper[row] = 1
+                row += 1
+
+        return A.tocsr(), lower, upper
+
+    @profile
+    def solve(self, weights: dict = None, epsilon: dict = None, time_limit: float = None):
+        """
+        Parameters
+        ----------
+        weights : dict, optional
+            Objective name -> weight. Defaults to AssignTa.AGGREGATE_WEIGHTS (the aggregatescore ranking).
+        epsilon : dict, optional
+            Objective name -> upper bound, for epsilon-constraint scalarization.
+        time_limit : float, optional
+            Solver time limit in seconds (best incumbent is returned if it runs out).
+
+        Returns
+        -------
+        np.ndarray or None
+            Dense 0/1 assignment, or None if no feasible solution was found.
+        """
+        from scipy.optimize import Bounds, LinearConstraint, milp
+
+        weights = AssignTa.AGGREGATE_WEIGHTS if weights is None else weights
+        rows = self.objective_rows()
+        cost = sum(weights.get(name, 0) * rows[name] for name in OBJECTIVES)
+
+        A, lower, upper = self.constraints()
+        constraints = [LinearConstraint(A, lower, upper)]
+        for name, bound in (epsilon or {}).items():
+            constraints.append(LinearConstraint(rows[name][np.newaxis, :], -np.inf, bound))
+
+        upper_bounds = np.full(self.num_vars, np.inf)
+        upper_bounds[:self.num_x] = 1
+        upper_bounds[self.conflict_start:] = 1
+
+        options = {} if time_limit is None else {"time_limit": time_limit}
+        result = milp(
+            cost,
+            constraints=constraints,
+            integrality=np.ones(self.num_vars),
+            bounds=Bounds(np.zeros(self.num_vars), upper_bounds),
+            options=options,
+        )
+        if result.x is None:
+            return None
+        return np.rint(result.x[:self.num_x]).astype(int).reshape(self.num_tas, self.num_labs)
+
+
+def solve_weighted(a: AssignTa, weights: dict = None, time_limit: float = None):
+    """
+    Exact minimizer of a weighted sum of the objectives (default: the aggregatescore weights)
+    """
+    return TaAssignmentMilp(a).solve(weights=weights, time_limit=time_limit)
+
+
+def reference_front(a: AssignTa, objective: str = "unpreferred", bounds=None,
+                    weights: dict = None, time_limit: float = None) -> list:
+    """
+    Epsilon-constraint sweep: minimize the weighted objectives with `objective` capped at each bound
+
+    Hard constraints (conflicts, unavailable) are pinned at zero. By default the cap runs from 0
+    up to the value `objective` takes at the weighted optimum, tracing how the other objectives
+    degrade as it is pushed down. Returns one solution per distinct score vector.
+    """
+    model = TaAssignmentMilp(a)
+    if bounds is None:
+        anchor = model.solve(weights=weights, time_limit=time_limit)
+        if anchor is None:
+            return []
+        bounds = range(int(getattr(a, objective)(anchor)) + 1)
+
+    solutions, seen = [], set()
+    for bound in bounds:
+        epsilon = {"conflicts": 0, "unavailable": 0, objective: bound}
+        sol = model.solve(weights=weights, epsilon=epsilon, time_limit=time_limit)
+        if sol is None:
+            continue
+        scores = tuple(int(getattr(a, name)(sol)) for name in OBJECTIVES)
+        if scores not in seen:
+            seen.add(scores)
+            solutions.append(sol)
+    return solutions
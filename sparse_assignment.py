@@ -0,0 +1,170 @@
+"""
+Authors: Cassandra Cinzori and Ian Solberg
+File: sparse_assignment.py
+Description: sparse (CSR) TA x section assignment for large problems
+"""
+
+import numpy as np
+
+
+class SparseAssignment:
+    """
+    Row-compressed assignment: for each TA, the sorted lab indices they are assigned to.
+
+    indptr[t]:indptr[t + 1] slices indices to give TA t's labs, so memory and
+    scoring scale with the number of assigned cells instead of num_tas x num_labs.
+    Instances are treated as immutable - edit methods return a new assignment.
+    """
+
+    __slots__ = ("indptr", "indices", "shape")
+
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray, shape: tuple):
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.shape = (int(shape[0]), int(shape[1]))
+
+    # ==== Construction // Conversion
+
+    @classmethod
+    def empty(cls, num_tas: int, num_labs: int) -> "SparseAssignment":
+        """Assignment with no TAs assigned to any lab"""
+        return cls(np.zeros(num_tas + 1, dtype=np.int64), np.empty(0, dtype=np.int64), (num_tas, num_labs))
+
+    @classmethod
+    def from_cells(cls, ta_idx: np.ndarray, lab_idx: np.ndarray, shape: tuple) -> "SparseAssignment":
+        """Build from (ta, lab) coordinate arrays - duplicates are collapsed"""
+        ta_idx = np.asarray(ta_idx, dtype=np.int64)
+        lab_idx = np.asarray(lab_idx, dtype=np.int64)
+        flat = np.unique(ta_idx * shape[1] + lab_idx)
+        rows, cols = np.divmod(flat, shape[1])
+        indptr = np.zeros(shape[0] + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=shape[0]), out=indptr[1:])
+        return cls(indptr, cols, shape)
+
+    @classmethod
+    def from_dense(cls, assignment: np.ndarray) -> "SparseAssignment":
+        """Convert a dense 0/1 assignment matrix"""
+        ta_idx, lab_idx = np.nonzero(assignment)
+        return cls.from_cells(ta_idx, lab_idx, assignment.shape)
+
+    def to_dense(self) -> np.ndarray:
+        """Expand to a dense 0/1 int matrix"""
+        dense = np.zeros(self.shape, dtype=int)
+        dense[self.row_ids(), self.indices] = 1
+        return dense
+
+    def copy(self) -> "SparseAssignment":
+        return SparseAssignment(self.indptr.copy(), self.indices.copy(), self.shape)
+
+    def tobytes(self) -> bytes:
+        """Byte representation (mirrors np.ndarray.tobytes for hashing/caching)"""
+        return b"csr" + self.indptr.tobytes() + self.indices.tobytes()
+
+    # ==== Queries
+
+    @property
+    def nnz(self) -> int:
+        """Number of assigned cells"""
+        return len(self.indices)
+
+    def row_counts(self) -> np.ndarray:
+        """Number of labs assigned to each TA"""
+        return np.diff(self.indptr)
+
+    def col_counts(self) -> np.ndarray:
+        """Number of TAs assigned to each lab"""
+        return np.bincount(self.indices, minlength=self.shape[1])
+
+    def row_ids(self) -> np.ndarray:
+        """TA index of every assigned cell (parallel to indices)"""
+        return np.repeat(np.arange(self.shape[0]), self.row_counts())
+
+    def row(self, ta_idx: int) -> np.ndarray:
+        """Sorted lab indices assigned to one TA"""
+        return self.indices[self.indptr[ta_idx]:self.indptr[ta_idx + 1]]
+
+    def contains(self, ta_idx: int, lab_idx: int) -> bool:
+        labs = self.row(ta_idx)
+        pos = np.searchsorted(labs, lab_idx)
+        return pos < len(labs) and labs[pos] == lab_idx
+
+    # ==== Edits (return new assignments)
+
+    def set(self, ta_idx: int, lab_idx: int, value: int) -> "SparseAssignment":
+        """Assign (value=1) or unassign (value=0) a single TA-lab cell"""
+        start, end = self.indptr[ta_idx], self.indptr[ta_idx + 1]
+        pos = start + np.searchsorted(self.indices[start:end], lab_idx)
+        present = pos < end and self.indices[pos] == lab_idx
+
+        indptr = self.indptr.copy()
+        if value and not present:
+            indices = np.insert(self.indices, pos, lab_idx)
+            indptr[ta_idx + 1:] += 1
+        elif not value and present:
+            indices = np.delete(self.indices, pos)
+            indptr[ta_idx + 1:] -= 1
+        else:
+            return self.copy()
+        return SparseAssignment(indptr, indices, self.shape)
+
+    def flip(self, ta_idx: int, lab_idx: int) -> "SparseAssignment":
+        """Toggle a single TA-lab cell"""
+        return self.set(ta_idx, lab_idx, 0 if self.contains(ta_idx, lab_idx) else 1)
+
+    def swap_rows(self, ta_idx1: int, ta_idx2: int) -> "SparseAssignment":
+        """Swap the schedules of two TAs (only the slices between the two rows move)"""
+        if ta_idx1 == ta_idx2:
+            return self.copy()
+        lo, hi = sorted((ta_idx1, ta_idx2))
+        lo_start, lo_end = self.indptr[lo], self.indptr[lo + 1]
+        hi_start, hi_end = self.indptr[hi], self.indptr[hi + 1]
+        indices = np.concatenate([
+            self.indices[:lo_start],
+            self.indices[hi_start:hi_end],
+            self.indices[lo_end:hi_start],
+            self.indices[lo_start:lo_end],
+            self.indices[hi_end:],
+        ])
+        indptr = self.indptr.copy()
+        indptr[lo + 1:hi + 1] += (hi_end - hi_start) - (lo_end - lo_start)
+        return SparseAssignment(indptr, indices, self.shape)
+
+    def take_rows(self, other: "SparseAssignment", mask: np.ndarray) -> "SparseAssignment":
+        """TA t's schedule from self where mask[t] is True, from other elsewhere (row crossover)"""
+        mask = np.asarray(mask, dtype=bool)
+        counts = np.where(mask, self.row_counts(), other.row_counts())
+        indptr = np.zeros(self.shape[0] + 1, dtype=np.int64)
+        np.cumsum(counts, out=indptr[1:])
+        # Each chosen row is a contiguous run of self.indices or (offset by nnz) other.indices
+        starts = np.where(mask, self.indptr[:-1], other.indptr[:-1] + self.nnz)
+        positions = np.repeat(starts - indptr[:-1], counts) + np.arange(indptr[-1])
+        return SparseAssignment(indptr, np.concatenate([self.indices, other.indices])[positions], self.shape)
+
+    def take_cols(self, other: "SparseAssignment", mask: np.ndarray) -> "SparseAssignment":
+        """Lab l's staffing from self where mask[l] is True, from other elsewhere (column crossover)"""
+        mask = np.asarray(mask, dtype=bool)
+        mine, theirs = mask[self.indices], ~mask[other.indices]
+        return SparseAssignment.from_cells(
+            np.concatenate([self.row_ids()[mine], other.row_ids()[theirs]]),
+            np.concatenate([self.indices[mine], other.indices[theirs]]),
+            self.shape,
+        )
+
+    def drop_cells(self, mask: np.ndarray) -> "SparseAssignment":
+        """Unassign the cells where mask (parallel to indices) is True"""
+        keep = ~np.asarray(mask, dtype=bool)
+        return SparseAssignment.from_cells(self.row_ids()[keep], self.indices[keep], self.shape)
+
+    def __eq__(self, other):
+        if not isinstance(other, SparseAssignment):
+            return NotImplemented
+        return (
+            self.shape == other.shape
+            and np.array_equal(self.indptr, other.indptr)
+            and np.array_equal(self.indices, other.indices)
+        )
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"SparseAssignment(shape={self.shape}, nnz={self.nnz})"
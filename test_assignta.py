@@ -6,6 +6,7 @@ Description: unit tests for each objective
 import pandas as pd
 import numpy as np
 from assignta import AssignTa
+from sparse_assignment import SparseAssignment
 import pytest
 
 
@@ -180,6 +181,484 @@ def test_unpreferred():
     result3 = state3.unpreferred(state3.assignment)
     assert result3 == 17, f"Test3 unpreferred: expected 17, got {result3}"
 
+# ==== Fused Kernel Tests
+@profile
+def test_fused_objectives():
+    """
+    The fused kernel (JIT or NumPy fallback) and the plain loop match the per-objective methods
+    """
+    import kernels
+
+    state1, state2, state3 = get_test_states()
+    problem = (state1.unavail, state1.willing, state1.max_assigned,
+               state1.min_ta, state1.lab_time_ids, state1.num_timeslots)
+    assignments = [state.assignment for state in (state1, state2, state3)]
+    assignments += [np.random.randint(0, 2, size=state1.assignment.shape) for _ in range(20)]
+    for assignment in assignments:
+        expected = tuple(int(getattr(state1, name)(assignment)) for name in
+                         ("overallocation", "conflicts", "undersupport", "unavailable", "unpreferred"))
+        assert state1.fused_objectives(assignment) == expected, "Fused objectives differ"
+        assert kernels.objectives_numpy(assignment, *problem) == expected, "NumPy kernel differs"
+        buffers = (np.empty(assignment.shape[1], dtype=np.int64), np.empty(state1.num_timeslots, dtype=np.int64))
+        assert tuple(kernels._objectives_loop(assignment, *problem[:-1], *buffers)) == expected, "Loop kernel differs"
+    sparse = SparseAssignment.from_dense(state2.assignment)
+    assert state1.fused_objectives(sparse) == state1.fused_objectives(state2.assignment)
+
+
+@profile
+def test_score_all():
+    """
+    score_all returns the five objectives and the aggregate in SCORE_NAMES order
+    """
+    state1, state2, state3 = get_test_states()
+    for state in (state1, state2, state3):
+        scores = state1.score_all(state.assignment)
+        expected = [getattr(state1, name)(state.assignment) for name in AssignTa.SCORE_NAMES[:5]]
+        expected.append(state1.aggregate_objective(state.assignment))
+        assert len(scores) == len(AssignTa.SCORE_NAMES)
+        assert list(scores) == expected, f"score_all {scores} != {expected}"
+
+
+def test_scoring_allocations():
+    """
+    Steady-state dense scoring works in scratch buffers - no assignment-sized temporaries, nothing retained
+    """
+    import tracemalloc
+    from profiler import Profiler
+
+    state1, state2, state3 = get_test_states()
+    assignment = np.ascontiguousarray(state2.assignment)  # CSV loads are Fortran-ordered; children are C-ordered
+    objectives = [getattr(state1, name) for name in AssignTa.SCORE_NAMES[:5]] + [state1.score_all]
+    enabled, Profiler.enabled = Profiler.enabled, False
+    try:
+        for f in objectives:
+            f(assignment)  # warm up scratch buffers
+            tracemalloc.start()
+            base = tracemalloc.get_traced_memory()[0]
+            for _ in range(200):
+                f(assignment)
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            assert peak - base < assignment.nbytes, f"{f.__name__} allocated {peak - base} bytes"
+            assert current - base < 256, f"{f.__name__} retained {current - base} bytes"
+    finally:
+        Profiler.enabled = enabled
+
+
+def test_scratch_follows_problem_edits():
+    """
+    Scratch masks and kernel arrays are rebuilt when problem arrays change, and float input still scores
+    """
+    state1, state2, state3 = get_test_states()
+    assignment = np.ascontiguousarray(state2.assignment)
+    state1.score_all(assignment)  # build scratch for the original problem
+
+    state1.min_ta = state1.min_ta + 1
+    state1.willing = 1 - state1.unavail
+    state1.set_problem_arrays({**state1.problem_arrays(), "max_assigned": state1.max_assigned * 0})
+    fresh = AssignTa()
+    fresh.set_problem_arrays(state1.problem_arrays())
+    assert state1.score_all(assignment) == fresh.score_all(assignment), "Stale scratch after replacing problem arrays"
+    for name in AssignTa.SCORE_NAMES[:5]:
+        assert getattr(state1, name)(assignment) == getattr(fresh, name)(assignment), f"Stale {name}"
+
+    assert state1.conflicts(assignment.astype(float)) == state1.conflicts(assignment), "Float input should score"
+
+
+# ==== Sparse Representation Tests
+@profile
+def test_sparse_objectives():
+    """
+    Sparse assignments must score identically to their dense equivalents
+    """
+    objectives = ["overallocation", "conflicts", "undersupport", "unavailable", "unpreferred"]
+    for i, state in enumerate(get_test_states(), start=1):
+        sparse = SparseAssignment.from_dense(state.assignment)
+        assert np.array_equal(sparse.to_dense(), state.assignment), f"Test{i}: round trip changed assignment"
+        for name in objectives:
+            dense_score = getattr(state, name)(state.assignment)
+            sparse_score = getattr(state, name)(sparse)
+            assert sparse_score == dense_score, f"Test{i} sparse {name}: expected {dense_score}, got {sparse_score}"
+
+
+@profile
+def test_sparse_agents():
+    """
+    Agents keep sparse solutions sparse and agree with the dense objectives afterwards
+    """
+    state = test1()
+    sol = SparseAssignment.from_dense(state.assignment)
+    agents = [
+        state.random_flip_agent,
+        state.preference_agent,
+        state.schedule_swapping_agent,
+        state.conflict_remover_agent,
+        state.undersupport_agent,
+    ]
+    for _ in range(50):
+        for agent in agents:
+            sol = agent(sol)
+            assert isinstance(sol, SparseAssignment), f"{agent.__name__} returned {type(sol)}"
+    assert state.conflicts(sol) == state.conflicts(sol.to_dense())
+    assert state.unavailable(sol) == state.unavailable(sol.to_dense())
+
+
+@profile
+def test_sparse_edits():
+    """
+    Row swaps match the dense swap, and the sparse preference agent only adds unassigned preferred cells
+    """
+    state = test1()
+    dense = state.assignment
+    sparse = SparseAssignment.from_dense(dense)
+    for t1, t2 in [(0, 1), (3, 3), (5, 2), (0, dense.shape[0] - 1)]:
+        expected = dense.copy()
+        expected[[t1, t2]] = expected[[t2, t1]]
+        assert np.array_equal(sparse.swap_rows(t1, t2).to_dense(), expected), f"swap_rows({t1}, {t2}) differs"
+
+    for _ in range(20):
+        added = state.preference_agent(sparse).to_dense() - dense
+        assert (added >= 0).all(), "Preference agent removed an assignment"
+        assert (state.prefer[added == 1] == 1).all(), "Preference agent added a non-preferred cell"
+        assert 0 < added.sum() <= 5
+    assert state.preference_index() is state.preference_index(), "Index was rebuilt without a problem change"
+
+
+# ==== Feasibility Mask Tests
+@profile
+def test_mask_aware_agents():
+    """
+    Masked flips and compatible swaps never create unavailable assignments, dense or sparse
+    """
+    state1, state2, state3 = get_test_states()
+    index = state1.feasibility_index()
+    assert (index["allowed"].ravel()[index["allowed_cells"]]).all()
+    assert all((state1.unavail[tas, lab] == 0).all() for lab, tas in enumerate(index["lab_tas"]))
+    assert state1.feasibility_index() is index, "Index was rebuilt without a problem change"
+
+    seed = state1.greedy_assignment()
+    for assignment in (seed, SparseAssignment.from_dense(seed)):
+        for _ in range(50):
+            flipped = state1.masked_flip_agent(assignment)
+            assert state1.unavailable(flipped) == 0, "Masked flip created an unavailable assignment"
+            swapped = state1.compatible_swap_agent(assignment)
+            assert state1.unavailable(swapped) == 0, "Swap moved a TA into an unavailable lab"
+            assert state1.overallocation(swapped) == 0, "Swap overallocated a TA"
+
+
+# ==== Local Search Tests
+@profile
+def test_move_deltas():
+    """
+    Incremental flip deltas match rescoring every flipped assignment from scratch
+    """
+    for state in get_test_states():
+        flip, _, _ = state.move_deltas(state.assignment)
+        base = state.aggregate_objective(state.assignment)
+        for ta_idx, lab_idx in np.ndindex(state.assignment.shape):
+            flipped = state.assignment.copy()
+            flipped[ta_idx, lab_idx] = 1 - flipped[ta_idx, lab_idx]
+            expected = (state.aggregate_objective(flipped) - base) * state.AGGREGATE_SCALE
+            assert flip[ta_idx, lab_idx] == pytest.approx(expected), f"Flip delta wrong at {(ta_idx, lab_idx)}"
+
+
+@profile
+def test_local_search_agent():
+    """
+    Local search never makes the aggregate score worse
+    """
+    for state in get_test_states():
+        improved = state.local_search_agent(state.assignment, max_moves=20)
+        before = state.aggregate_objective(state.assignment)
+        after = state.aggregate_objective(improved)
+        assert after < before, f"Local search did not improve: {before} -> {after}"
+
+
+# ==== Crossover Tests
+@profile
+def test_crossovers():
+    """
+    Batched crossovers take whole rows/columns from a parent; repair crossover clears unavailable cells
+    """
+    state1, state2, state3 = get_test_states()
+    parents_a = np.stack([state1.assignment, state2.assignment, state3.assignment])
+    parents_b = parents_a[::-1]
+
+    rows = state1.row_crossover(parents_a, parents_b)
+    assert rows.shape == parents_a.shape
+    from_a = (rows == parents_a).all(axis=2)
+    from_b = (rows == parents_b).all(axis=2)
+    assert (from_a | from_b).all(), "Row crossover mixed cells within a TA's schedule"
+
+    cols = state1.column_crossover(parents_a, parents_b)
+    from_a = (cols == parents_a).all(axis=1)
+    from_b = (cols == parents_b).all(axis=1)
+    assert (from_a | from_b).all(), "Column crossover mixed cells within a lab's staffing"
+
+    repaired = state1.repair_crossover(parents_a, parents_b)
+    for child in repaired:
+        assert state1.unavailable(child) == 0, "Repair crossover kept an unavailable assignment"
+
+    child = state1.row_crossover_agent([state1.assignment, state2.assignment])
+    assert child.shape == state1.assignment.shape
+
+
+@profile
+def test_sparse_crossovers():
+    """
+    Sparse parents recombine on their CSR rows/columns and match the dense operators' guarantees
+    """
+    state1, state2, state3 = get_test_states()
+    dense_a, dense_b = state1.assignment, state3.assignment
+    parent_a, parent_b = SparseAssignment.from_dense(dense_a), SparseAssignment.from_dense(dense_b)
+    for parent in (parent_a, parent_b):
+        assert np.array_equal(state1.sparse_row_violations(parent), state1.row_violations(parent.to_dense()[np.newaxis])[0])
+
+    take = np.arange(dense_a.shape[0]) % 2 == 0
+    assert np.array_equal(parent_a.take_rows(parent_b, take).to_dense(), np.where(take[:, np.newaxis], dense_a, dense_b))
+    take = np.arange(dense_a.shape[1]) % 3 == 0
+    assert np.array_equal(parent_a.take_cols(parent_b, take).to_dense(), np.where(take, dense_a, dense_b))
+
+    for _ in range(20):
+        rows = state1.row_crossover_agent([parent_a, parent_b])
+        assert isinstance(rows, SparseAssignment), "Sparse parents should give a sparse child"
+        dense = rows.to_dense()
+        assert ((dense == dense_a).all(axis=1) | (dense == dense_b).all(axis=1)).all(), "Row crossover mixed a TA's schedule"
+        dense = state1.column_crossover_agent([parent_a, parent_b]).to_dense()
+        assert ((dense == dense_a).all(axis=0) | (dense == dense_b).all(axis=0)).all(), "Column crossover mixed a lab's staffing"
+        repaired = state1.repair_crossover_agent([parent_a, parent_b])
+        assert state1.unavailable(repaired) == 0, "Sparse repair crossover kept an unavailable assignment"
+
+
+# ==== Repair Tests
+@profile
+def test_repair():
+    """
+    Batched repair removes unavailable cells, conflicts and overallocation without adding assignments
+    """
+    state1, state2, state3 = get_test_states()
+    batch = np.random.randint(0, 2, size=(20,) + state1.assignment.shape)
+    repaired = state1.repair(batch)
+    assert repaired.shape == batch.shape
+    assert (repaired <= batch).all(), "Repair added an assignment"
+    for child in repaired:
+        assert state1.unavailable(child) == 0, "Repair kept an unavailable assignment"
+        assert state1.conflicts(child) == 0, "Repair kept a time conflict"
+        assert state1.overallocation(child) == 0, "Repair kept an overallocated TA"
+
+    single = state1.repair(state2.assignment)
+    assert single.shape == state2.assignment.shape
+    children = state1.repair_children([state1.assignment, SparseAssignment.from_dense(state3.assignment)])
+    assert isinstance(children[1], SparseAssignment)
+    assert state1.unavailable(children[1]) == 0
+
+
+@profile
+def test_sparse_repair():
+    """
+    Sparse repair works on the CSR cells and keeps as much as the dense repair: one lab per timeslot,
+    max_assigned labs per TA, nothing unavailable, nothing added
+    """
+    state1, _, _ = get_test_states()
+    batch = np.random.randint(0, 2, size=(20,) + state1.assignment.shape)
+    repaired = state1.repair_sparse([SparseAssignment.from_dense(sol) for sol in batch] + [SparseAssignment.empty(*batch.shape[1:])])
+    assert repaired[-1].nnz == 0, "Empty assignment should stay empty"
+    dense_repaired = state1.repair(batch)
+    for sol, fixed, dense_fixed in zip(batch, repaired, dense_repaired):
+        fixed = fixed.to_dense()
+        assert (fixed <= sol).all(), "Repair added an assignment"
+        assert state1.unavailable(fixed) == 0 and state1.conflicts(fixed) == 0 and state1.overallocation(fixed) == 0
+        assert (fixed.sum(axis=1) == dense_fixed.sum(axis=1)).all(), "Sparse repair dropped more than the dense one"
+
+
+# ==== Seeding Tests
+@profile
+def test_greedy_seeding():
+    """
+    Greedy seeds (and their randomized variants) never break the hard constraints or max_assigned
+    """
+    state = test1()
+    seeds = state.seed_population(10)
+    assert len(seeds) == 10
+    for i, seed in enumerate(seeds):
+        assert state.unavailable(seed) == 0, f"Seed {i} assigns an unavailable TA"
+        assert state.conflicts(seed) == 0, f"Seed {i} has a time conflict"
+        assert state.overallocation(seed) == 0, f"Seed {i} overallocates a TA"
+    assert state.undersupport(seeds[0]) < state.undersupport(state.zeros())
+
+
+# ==== Problem Cache Tests
+@profile
+def test_problem_cache(tmp_path):
+    """
+    A warm cache load skips CSV parsing and reproduces the cold-load arrays and scores
+    """
+    cold = AssignTa()
+    cold.load_problem("assignta_data/tas.csv", "assignta_data/sections.csv", cache_dir=str(tmp_path))
+    assert cold.ta is not None, "First load should parse the CSVs"
+
+    warm = AssignTa()
+    warm.load_problem("assignta_data/tas.csv", "assignta_data/sections.csv", cache_dir=str(tmp_path))
+    assert warm.ta is None and warm.lab is None, "Cached load should not parse the CSVs"
+
+    for name, values in cold.problem_arrays().items():
+        assert np.array_equal(getattr(warm, name), values), f"Cached {name} differs from CSV load"
+    assert warm.num_timeslots == cold.num_timeslots
+
+    assignment = test1().assignment
+    assert warm.aggregate_objective(assignment) == cold.aggregate_objective(assignment)
+    assert warm.zeros().shape == cold.zeros().shape
+
+
+# ==== Shared Memory Tests
+def test_shared_problem():
+    """
+    Pickled instances carry a shared-memory handle and score identically in a spawned worker
+    """
+    import multiprocessing
+    import pickle
+    from concurrent.futures import ProcessPoolExecutor
+
+    a = AssignTa()
+    a.load_problem("assignta_data/tas.csv", "assignta_data/sections.csv", cache_dir=None)
+    assignment = a.greedy_assignment()
+    copied = len(pickle.dumps(a))
+    with a.share_problem():
+        data = pickle.dumps(a)
+        assert len(data) < copied / 10, f"Shared pickle is {len(data)} bytes (copy: {copied})"
+        worker_side = pickle.loads(data)
+        assert not worker_side.unavail.flags.writeable, "Attached arrays should be read-only views"
+        assert worker_side.score_all(assignment) == a.score_all(assignment)
+        del worker_side
+
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+            assert pool.submit(a.score_all, assignment).result() == a.score_all(assignment)
+
+    assert len(pickle.dumps(a)) == copied, "Closed share should fall back to copying the arrays"
+
+
+def test_shared_problem_pool():
+    """
+    A forkserver pool pickles the objectives, so workers score through the shared-memory handle
+    """
+    from evo import Evo
+
+    a = AssignTa()
+    a.load_problem("assignta_data/tas.csv", "assignta_data/sections.csv", cache_dir=None)
+    evo = Evo()
+    evo.add_objectives(AssignTa.SCORE_NAMES, a.score_all)
+    sols = a.seed_population(6)
+    with a.share_problem():
+        executor = evo.make_executor(2, start_method="forkserver")
+        try:
+            assert executor.submit(is_attached, a).result(), "Workers should attach through the handle"
+            assert evo.score_batch(sols, executor) == evo.score_many(sols), "Pool scores differ from local scores"
+        finally:
+            executor.shutdown()
+
+
+def is_attached(a):
+    """
+    Helper run in a worker: whether the unpickled instance attached to shared memory
+    """
+    return a._attached is not None and not a.unavail.flags.writeable
+
+
+def test_attach_from_independent_process():
+    """
+    A process with its own resource tracker can attach and exit without unlinking the owner's blocks
+    """
+    import subprocess
+    import sys
+    import shared_problem
+
+    with shared_problem.SharedProblem({"x": np.arange(10)}) as owner:
+        script = (
+            "import shared_problem; "
+            f"arrays, blocks = shared_problem.attach({owner.handle!r}); print(int(arrays['x'].sum()))"
+        )
+        out = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+        assert out.stdout.strip() == "45" and "leaked" not in out.stderr, f"Attach warned: {out.stderr}"
+        arrays, blocks = shared_problem.attach(owner.handle)
+        assert arrays["x"].sum() == 45, "Owner's block was unlinked by the attaching process"
+        for block in blocks:
+            block.close()
+
+
+# ==== Delta Evaluation Tests
+@profile
+def test_delta_scores():
+    """
+    Rescoring old solutions for the changed TAs/sections matches scoring them from scratch
+    """
+    a = AssignTa()
+    a.load_problem("assignta_data/tas.csv", "assignta_data/sections.csv", cache_dir=None)
+    old = {name: np.array(values) for name, values in a.problem_arrays().items()}
+    sols = [a.greedy_assignment(randomize=True) for _ in range(5)] + [np.random.randint(0, 2, a.unavail.shape) for _ in range(5)]
+    scores = [a.score_all(sol) for sol in sols]
+
+    # One TA's availability and max_assigned, one section's min_ta and another's time
+    edited = {name: values.copy() for name, values in old.items()}
+    edited["unavail"][0] = 1 - edited["unavail"][0]
+    edited["max_assigned"][0] += 1
+    edited["min_ta"][3] += 2
+    edited["lab_times"][2] = edited["lab_times"][7]
+    _, edited["lab_time_ids"] = np.unique(edited["lab_times"], return_inverse=True)
+    a.set_problem_arrays(edited)
+
+    changes = a.problem_changes(old)
+    assert list(changes["rows"]) == [0] and list(changes["cols"]) == [3] and list(changes["time_cols"]) == [2]
+    for sol, old_scores in zip(sols, scores):
+        expected = a.score_all(sol)
+        assert a.delta_scores(sol, old_scores, old, changes) == expected, "Delta scores differ from a full rescore"
+        assert a.delta_scores(SparseAssignment.from_dense(sol), old_scores, old, changes) == expected
+
+    other = {**old, "ta_names": old["ta_names"][::-1]}
+    assert a.problem_changes(other) is None, "Different TAs should not be comparable"
+
+
+def test_delta_scores_reused_problem():
+    """
+    Delta scores match score_all when min_ta/willing are edited on an AssignTa that already scored
+    (its scratch buffers were built for the old problem)
+    """
+    a = AssignTa()
+    a.load_problem("assignta_data/tas.csv", "assignta_data/sections.csv", cache_dir=None)
+    old = {name: np.array(values) for name, values in a.problem_arrays().items()}
+    sols = [a.greedy_assignment(randomize=True) for _ in range(3)] + [np.random.randint(0, 2, a.unavail.shape) for _ in range(3)]
+    scores = [a.score_all(sol) for sol in sols]
+
+    min_ta = a.min_ta.copy()
+    min_ta[[1, 5]] += 1
+    willing = a.willing.copy()
+    willing[2] = 1 - willing[2]
+    a.min_ta, a.willing = min_ta, willing
+
+    fresh = AssignTa()
+    fresh.set_problem_arrays(a.problem_arrays())
+    changes = a.problem_changes(old)
+    assert list(changes["rows"]) == [2] and list(changes["cols"]) == [1, 5], f"Unexpected changes: {changes}"
+    for sol, old_scores in zip(sols, scores):
+        expected = a.score_all(sol)
+        assert expected == fresh.score_all(sol), "Reused AssignTa scored with stale buffers"
+        assert a.delta_scores(sol, old_scores, old, changes) == expected, "Delta scores differ from score_all"
+
+
+# ==== Startup Tests
+def test_core_imports_skip_pandas():
+    """
+    Importing the scoring/evolution path must not import pandas (it is loaded lazily for I/O)
+    """
+    import subprocess
+    import sys
+
+    check = "import run_optimization, sys; print('pandas' in sys.modules, 'http.server' in sys.modules)"
+    out = subprocess.run([sys.executable, "-c", check], capture_output=True, text=True, check=True)
+    pandas, http = out.stdout.split()
+    assert pandas == "False", "pandas was imported at module import time"
+    assert http == "False", "monitor (http.server) should only be imported when a metrics observer is requested"
+
+
 # ==== Main Function
 def main():
     print("Running manual tests...")
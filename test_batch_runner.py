@@ -0,0 +1,105 @@
+"""
+Authors: Cassandra Cinzori and Ian Solberg
+File: test_batch_runner.py
+Description: unit tests for the manifest-driven batch runner
+"""
+import csv
+import json
+import os
+import pytest
+import batch_runner
+
+
+DATA_DIR = os.path.abspath("assignta_data")
+
+
+def write_manifest(tmp_path, rows):
+    """
+    Helper function to write a manifest CSV next to the test outputs
+    """
+    path = tmp_path / "manifest.csv"
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=batch_runner.MANIFEST_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    return str(path)
+
+
+# ==== Manifest Tests
+def test_load_manifest(tmp_path):
+    """
+    Manifest rows become jobs: per-job overrides parsed, relative paths resolved, names unique
+    """
+    path = write_manifest(tmp_path, [
+        {"name": "ds3500", "tas": os.path.join(DATA_DIR, "tas.csv"),
+         "sections": os.path.join(DATA_DIR, "sections.csv"), "time_limit": "5", "seed": "1"},
+        {"name": "relative", "tas": "tas.csv", "sections": "sections.csv"},
+    ])
+    jobs = batch_runner.load_manifest(path)
+    assert jobs[0]["time_limit"] == 5.0 and jobs[0]["seed"] == 1, f"Per-job overrides not parsed: {jobs[0]}"
+    assert "iterations" not in jobs[0], "Blank manifest cells should fall back to the batch defaults"
+    assert jobs[1]["tas"] == str(tmp_path / "tas.csv"), "Relative paths should resolve against the manifest"
+
+    duplicate = write_manifest(tmp_path, [{"name": "x", "tas": "a", "sections": "b"}] * 2)
+    with pytest.raises(ValueError):
+        batch_runner.load_manifest(duplicate)
+
+
+# ==== Batch Tests
+def test_run_batch(tmp_path):
+    """
+    Every job writes its own outputs, a failing job is recorded, and the summary keeps manifest order
+    """
+    data = {"tas": os.path.join(DATA_DIR, "tas.csv"), "sections": os.path.join(DATA_DIR, "sections.csv")}
+    jobs = [
+        {"name": "course_a", **data, "iterations": 200, "seed": 1},
+        {"name": "course_b", **data, "iterations": 200, "seed": 2},
+        {"name": "broken", "tas": str(tmp_path / "missing.csv"), "sections": data["sections"]},
+    ]
+    output_root = str(tmp_path / "out")
+    stats = batch_runner.run_batch(jobs, output_root, processes=2, time_limit=20, init_pop=5, dom=50)
+
+    assert stats["jobs"] == 3 and stats["failed"] == 1, f"Expected one failed job: {stats}"
+    assert stats["evaluations"] > 0 and stats["evals_per_sec"] > 0, f"Missing throughput stats: {stats}"
+    with open(os.path.join(output_root, "batch_stats.json")) as f:
+        assert json.load(f) == stats, "Aggregate stats should be saved next to the summary"
+    for name in ("course_a", "course_b"):
+        files = os.listdir(os.path.join(output_root, name))
+        for expected in ("run.log", "CassIan_summary.csv", "CassIan_profile.txt", "best_solution.txt"):
+            assert expected in files, f"{name} is missing {expected}: {files}"
+
+    with open(os.path.join(output_root, "batch_summary.csv"), newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert [row["name"] for row in rows] == ["course_a", "course_b", "broken"], "Summary should keep manifest order"
+    assert rows[2]["status"] == "failed" and rows[2]["error"], f"Failure not recorded: {rows[2]}"
+    assert int(rows[0]["evaluations"]) > 0 and rows[0]["best_aggregate"], f"Job stats missing: {rows[0]}"
+    assert rows[0]["seed"] == "1", "Manifest seeds should be kept"
+    assert rows[2]["seed"] and rows[2]["seed"] not in ("1", "2"), "Unseeded jobs should get their own seed"
+
+
+def test_crashed_worker(tmp_path, monkeypatch):
+    """
+    A job that kills its worker process is recorded as failed without losing finished jobs
+    """
+    import run_optimization
+
+    optimize = run_optimization.optimize_ta_assignment
+
+    def crash_on_request(*args, **kwargs):
+        if "crash" in kwargs["ta_file"]:
+            os._exit(1)
+        return optimize(*args, **kwargs)
+
+    # Pool workers are forked after the patch, so they inherit it
+    monkeypatch.setattr(run_optimization, "optimize_ta_assignment", crash_on_request)
+    data = {"tas": os.path.join(DATA_DIR, "tas.csv"), "sections": os.path.join(DATA_DIR, "sections.csv")}
+    jobs = [
+        {"name": "course_a", **data, "iterations": 50},
+        {"name": "crash", "tas": "crash.csv", "sections": data["sections"]},
+    ]
+    stats = batch_runner.run_batch(jobs, str(tmp_path), processes=1, time_limit=20, init_pop=2, seed=7)
+    with open(tmp_path / "batch_summary.csv", newline="") as f:
+        rows = {row["name"]: row for row in csv.DictReader(f)}
+    assert rows["course_a"]["status"] == "ok", f"Finished job lost: {rows['course_a']}"
+    assert rows["crash"]["status"] == "failed" and "BrokenProcessPool" in rows["crash"]["error"]
+    assert stats["jobs"] == 2 and stats["failed"] == 1
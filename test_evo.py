@@ -0,0 +1,508 @@
+"""
+Authors: Cassandra Cinzori and Ian Solberg
+File: test_evo.py
+Description: unit tests for the evo framework on the TA assignment problem
+"""
+import time
+import numpy as np
+from assignta import AssignTa
+from evo import Evo, Deadline, PruneSchedule, StopCondition, Stagnation, Plateau, HardConstraintsMet
+import pytest
+
+
+OBJECTIVES = ["overallocation", "conflicts", "undersupport", "unavailable", "unpreferred"]
+
+
+def make_problem():
+    """
+    Helper function to load the TA problem
+    """
+    a = AssignTa()
+    a.assign_ta_df("assignta_data/tas.csv")
+    a.assign_lab_df("assignta_data/sections.csv")
+    return a
+
+
+def make_evo(a):
+    """
+    Helper function to build an Evo with the five objectives and a couple of agents
+    """
+    evo = Evo()
+    for name in OBJECTIVES:
+        evo.add_objective(name, getattr(a, name))
+    evo.add_agent("random_flip", lambda sols: a.random_flip_agent(sols[0]))
+    evo.add_agent("conflict_remover", lambda sols: a.conflict_remover_agent(sols[0]))
+    evo.add_solution(a.zeros())
+    return evo
+
+
+# ==== Budget Tests
+def test_iteration_budget():
+    """
+    evolve stops at n agent invocations, also when batching
+    """
+    a = make_problem()
+    evo = make_evo(a)
+    evo.evolve(n=50, batch_size=8)
+    produced = evo.evaluations + evo.duplicates
+    assert produced == 1 + 50, f"Expected 51 solutions, got {produced}"
+
+
+def test_process_workers():
+    """
+    Scores computed in worker processes match scores computed locally
+    """
+    a = make_problem()
+    evo = make_evo(a)
+    evo.evolve(n=40, batch_size=10, workers=2)
+    for scores, sol in evo.pop.items():
+        assert scores == evo.score(sol), "Worker scores differ from local scores"
+
+
+def test_thread_workers(monkeypatch):
+    """
+    Thread-pool scoring matches serial scoring, and the profiler counts every concurrent call
+    """
+    from collections import defaultdict
+    from concurrent.futures import ThreadPoolExecutor
+    from profiler import Profiler
+
+    a = make_problem()
+    evo = Evo()
+    evo.add_objectives(AssignTa.SCORE_NAMES, a.score_all)
+    evo.add_agent("random_flip", lambda sols: a.random_flip_agent(sols[0]))
+    evo.add_solution(a.zeros())
+    evo.evolve(n=200, batch_size=16, workers=4, parallel="thread")
+    for scores, sol in evo.pop.items():
+        assert scores == evo.score(sol), "Thread scores differ from serial scores"
+
+    children = [a.random_flip_agent(sol) for sol in a.seed_population(8) for _ in range(25)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        assert evo.score_batch(children, pool, workers=8) == evo.score_batch(children)
+
+    # Count into fresh tables so the global profile of the session is left untouched
+    monkeypatch.setattr(Profiler, "calls", defaultdict(int))
+    monkeypatch.setattr(Profiler, "time", defaultdict(float))
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(a.conflicts, children * 10))
+    assert Profiler.calls["AssignTa.conflicts"] == len(children) * 10, "Profiler lost concurrent calls"
+
+    with pytest.raises(ValueError):
+        evo.make_executor(2, parallel="fiber")
+
+
+def test_time_budget_includes_cleanup():
+    """
+    The deadline leaves room for the next unchecked stretch plus the cleanup reserve,
+    evaluates the reserve only when it reads the clock, and amortizes clock reads
+    """
+    now = [0.0]
+    deadline = Deadline(1.0, check_interval=0.01, clock=lambda: now[0])
+    calls = []
+
+    def reserve():
+        calls.append(now[0])
+        return 0.2
+
+    steps = 0
+    while True:
+        now[0] += 0.001  # each step costs 1 ms
+        steps += 1
+        if deadline.expired(reserve):
+            break
+    assert 9 <= deadline.check_every <= 10, f"Expected a clock read every ~10 steps, got {deadline.check_every}"
+    assert len(calls) < steps / 5, f"Reserve evaluated {len(calls)} times over {steps} steps"
+    # Stops once now + the next 10 ms stretch + 0.2 s reserve reaches the 1 s budget
+    assert 0.78 <= now[0] <= 0.8 + 1e-9, f"Stopped at {now[0]:.3f}s"
+
+    a = make_problem()
+    evo = make_evo(a)
+    evo.evolve(time_limit=0.2, dom=50)
+    assert evo.evaluations > 1, "evolve should run until the deadline"
+
+
+def test_vector_objective():
+    """
+    A vector-valued objective is called once per solution and scores like the separate objectives
+    """
+    a = make_problem()
+    calls = []
+    evo = Evo()
+    evo.add_objectives(AssignTa.SCORE_NAMES, lambda sol: calls.append(1) or a.score_all(sol))
+    evo.add_solution(a.zeros())
+    assert evo.objective_names() == list(AssignTa.SCORE_NAMES)
+    assert len(calls) == 1, "Vector objective was called per value"
+
+    reference = make_evo(a)
+    reference.add_objective("aggregatescore", a.aggregate_objective)
+    for sol in a.seed_population(5):
+        assert evo.score(sol) == reference.score(sol)
+        assert evo.objectives[2][1](sol) == a.undersupport(sol), "Per-name objective view is wrong"
+
+    workers = Evo()
+    workers.add_objectives(AssignTa.SCORE_NAMES, a.score_all)
+    workers.add_solution(a.zeros())
+    workers.add_agent("random_flip", lambda sols: a.random_flip_agent(sols[0]))
+    workers.evolve(n=20, batch_size=10, workers=2)
+    for scores, sol in workers.pop.items():
+        assert scores == workers.score(sol), "Worker scores differ from local scores"
+
+
+# ==== Pruning Tests
+def test_adaptive_pruning():
+    """
+    The adaptive schedule prunes at its high-water mark and re-arms relative to the surviving front
+    """
+    a = make_problem()
+    evo = make_evo(a)
+    evo.add_agent("preference", lambda sols: a.preference_agent(sols[0]))
+    schedule = PruneSchedule(min_high_water=10)
+    evo.evolve(n=500, dom=schedule)
+    assert schedule.prunes > 0, "Adaptive schedule never pruned"
+    assert schedule.high_water >= schedule.min_high_water
+    assert not schedule.due(schedule.high_water - 1) and schedule.due(schedule.high_water)
+
+    auto = make_evo(a)
+    auto.evolve(n=200, dom="auto")
+    assert auto.size() > 0
+
+
+# ==== Stop Condition Tests
+def test_stop_conditions():
+    """
+    Stagnation ends a stalled run early (also when adaptive pruning never fires); conditions compose with | and &
+    """
+    import indicators
+
+    a = make_problem()
+
+    def stalled_evo():
+        evo = Evo()
+        evo.add_objective("overallocation", a.overallocation)
+        evo.add_agent("identity", lambda sols: sols[0])
+        evo.add_solution(a.zeros())
+        return evo
+
+    evo = stalled_evo()
+    evo.evolve(n=10_000, dom=10, stop=Stagnation(iterations=50))
+    assert evo.duplicates <= 60, f"Stalled run kept going for {evo.duplicates} iterations"
+
+    # Adaptive pruning never prunes a population that stopped growing - the check must not wait for it
+    evo = stalled_evo()
+    evo.evolve(n=100_000, dom="auto", stop=Stagnation(iterations=50))
+    assert evo.duplicates <= 100, f"Stalled run with dom='auto' kept going for {evo.duplicates} iterations"
+
+    evo = Evo()
+    evo.add_objectives(["conflicts", "unavailable"], lambda sol: (a.conflicts(sol), a.unavailable(sol)))
+    evo.add_agent("identity", lambda sols: sols[0])
+    evo.add_solution(a.zeros())
+    evo.evolve(n=100_000, dom="auto", stop=HardConstraintsMet())
+    assert evo.duplicates <= 1100, f"Default HardConstraintsMet did not stop a feasible stalled run: {evo.duplicates}"
+
+    evo = stalled_evo()
+    evo.evolve(n=500, dom=10, stop=Stagnation(iterations=50) & Stagnation(iterations=10 ** 9))
+    assert evo.duplicates == 500, "& stopped before both conditions held"
+
+    evo = stalled_evo()
+    evo.evolve(n=10_000, dom=10, stop=Stagnation(iterations=10 ** 9) | Stagnation(seconds=0))
+    assert evo.duplicates <= 20, "| did not stop on the first condition"
+
+    with pytest.raises(ValueError):
+        Stagnation()
+    with pytest.raises(TypeError):
+        StopCondition()
+    with pytest.raises(ValueError, match="hypervolume"):
+        stalled_evo().evolve(n=10, stop=Plateau())  # no hypervolume indicator registered
+
+    evo = make_evo(a)
+    for sol in a.seed_population(5):
+        evo.add_solution(sol)
+    ref = evo.score_array().max(axis=0) + 1
+    evo.add_indicator("hypervolume", indicators.HypervolumeTracker(ref, np.zeros(len(ref))))
+    evo.evolve(n=20_000, dom=20, stop=Plateau(iterations=200) | HardConstraintsMet(iterations=200))
+    assert evo.evaluations + evo.duplicates < 20_000, "Converged run did not stop early"
+
+
+# ==== Repair Tests
+def test_repair_hook():
+    """
+    With a repair hook every child is repaired before scoring, also in batches
+    """
+    a = make_problem()
+    for batch_size in (1, 8):
+        evo = make_evo(a)
+        evo.set_repair(a.repair_children)
+        evo.evolve(n=200, dom=10_000, batch_size=batch_size)
+        children = [key for key in evo.pop if key != evo.score(a.zeros())]
+        assert children, "No repaired children were added"
+        for scores in children:
+            overallocation, conflicts, _, unavailable, _ = scores
+            assert overallocation == conflicts == unavailable == 0, f"Unrepaired child {scores}"
+
+
+# ==== Duplicate Detection Tests
+def test_duplicates_skip_scoring():
+    """
+    An agent that returns its parent unchanged never triggers another evaluation
+    """
+    a = make_problem()
+    calls = []
+    evo = Evo()
+    evo.add_objective("overallocation", lambda sol: calls.append(1) or a.overallocation(sol))
+    evo.add_agent("identity", lambda sols: sols[0])
+    evo.add_solution(a.zeros())
+    evo.evolve(n=20)
+    assert len(calls) == 1, f"Duplicates were scored {len(calls) - 1} times"
+    assert evo.duplicates == 20
+    assert evo.duplicate_rate() == pytest.approx(20 / 21)
+
+    no_dedupe = Evo(dedupe=False)
+    no_dedupe.add_objective("overallocation", a.overallocation)
+    no_dedupe.add_solution(a.zeros())
+    no_dedupe.add_solution(a.zeros())
+    assert no_dedupe.evaluations == 2
+
+
+def test_distinct_parents():
+    """
+    Multi-parent agents get distinct parents whenever the population is large enough
+    """
+    a = make_problem()
+    evo = make_evo(a)
+    evo.add_solution(a.greedy_assignment())
+    assert evo.size() == 2
+    for _ in range(50):
+        first, second = evo.get_random_solutions(2)
+        assert not np.array_equal(first, second), "A parent was drawn twice"
+    assert len(evo.get_random_solutions(3)) == 3, "k larger than the population still returns k parents"
+
+
+# ==== Best Solution Tests
+def test_best_index():
+    """
+    The live best-per-objective index agrees with a full scan, before and after pruning
+    """
+    a = make_problem()
+    evo = Evo()
+    for name in OBJECTIVES:
+        evo.add_objective(name, getattr(a, name))
+    evo.add_objective("aggregatescore", a.aggregate_objective)
+    evo.add_agent("random_flip", lambda sols: a.random_flip_agent(sols[0]))
+    evo.add_agent("undersupport", lambda sols: a.undersupport_agent(sols[0]))
+    evo.add_solution(a.zeros())
+    for _ in range(3):
+        evo.evolve(n=100, dom=10_000)
+        for j, name in enumerate(evo.objective_names()):
+            scores, sol = evo.best(name)
+            assert scores[j] == min(key[j] for key in evo.pop), f"Best {name} is not the minimum"
+            assert evo.pop[scores] is sol
+        evo.remove_dominated()
+
+    scores, sol = evo.best("aggregatescore")
+    assert scores[-1] == a.aggregate_objective(sol)
+
+
+# ==== Observer Tests
+def test_observers_and_publishers(tmp_path):
+    """
+    Observers get a final snapshot; the JSON-lines and HTTP publishers expose it
+    """
+    import json
+    import urllib.request
+    import monitor
+
+    a = make_problem()
+    evo = make_evo(a)
+    snapshots = []
+    path = str(tmp_path / "metrics.jsonl")
+    with monitor.JsonLinesPublisher(path) as jsonl, monitor.HttpMetricsServer(port=0) as http:
+        evo.evolve(n=200, observers=[snapshots.append, jsonl, http], observe_interval=0)
+        with urllib.request.urlopen(f"http://{http.host}:{http.port}/metrics") as response:
+            served = json.load(response)
+
+    assert snapshots and snapshots[-1]["done"], "No final snapshot"
+    assert snapshots[-1]["population"] == evo.size()
+    assert set(snapshots[-1]["best"]) == set(OBJECTIVES)
+    assert served["done"] and served["evaluations"] == snapshots[-1]["evaluations"]
+    with open(path) as f:
+        lines = [json.loads(line) for line in f]
+    assert len(lines) == len(snapshots)
+
+
+# ==== Indicator Tests
+def test_hypervolume_indicators():
+    """
+    Exact and Monte Carlo hypervolume agree, and the tracker follows the population through pruning
+    """
+    import indicators
+
+    rng = np.random.default_rng(0)
+    points = rng.random((30, 4))
+    exact = indicators.hypervolume(points, np.ones(4))
+    estimate = indicators.hypervolume_mc(points, np.ones(4), np.zeros(4), samples=200_000, rng=rng)
+    assert estimate == pytest.approx(exact, abs=0.01), f"MC {estimate} vs exact {exact}"
+    assert indicators.igd(points, points[:5]) == 0
+
+    a = make_problem()
+    evo = make_evo(a)
+    ref = evo.score_array().max(axis=0) + 1
+    tracker = indicators.HypervolumeTracker(ref, np.zeros(len(ref)), exact_limit=10_000)
+    evo.add_indicator("hypervolume", tracker)
+    evo.evolve(n=300, dom=50)
+    assert sum(tracker.points.values()) == evo.size(), "Tracker lost sync with the population"
+    assert tracker.value() == pytest.approx(indicators.hypervolume(evo.score_array(), ref))
+    assert evo.metrics(0, time.monotonic())["indicators"]["hypervolume"] == tracker.value()
+
+    # Problem bounds make a reference point every solution lies inside
+    bounds = np.array(a.objective_bounds())
+    assert (evo.score_array() <= bounds).all(), f"A solution scored past the bounds {bounds}"
+    assert (a.score_all(np.ones_like(a.unavail))[:5] <= bounds).all()
+
+
+def test_large_front_value_cached(monkeypatch):
+    """
+    A front too large for the exact hypervolume is filtered once, not on every value() read
+    """
+    import indicators
+
+    tracker = indicators.HypervolumeTracker(np.ones(2), np.zeros(2), samples=1000, exact_limit=3, seed=0)
+    for x in np.linspace(0.1, 0.9, 10):
+        tracker.add((x, 1 - x))
+    filters = []
+    nondominated = indicators.nondominated
+    monkeypatch.setattr(indicators, "nondominated", lambda points: filters.append(len(points)) or nondominated(points))
+    first = tracker.value()
+    assert tracker.value() == tracker.value() == first and len(filters) == 1, f"Front refiltered: {filters}"
+
+    tracker.remove((0.1, 0.9))
+    tracker.value()
+    assert len(filters) == 2, "A change should invalidate the cached front check"
+
+
+def test_incremental_trackers():
+    """
+    Deferred tracker updates match recomputing hypervolume counts and IGD from scratch
+    """
+    import indicators
+
+    rng = np.random.default_rng(1)
+    reference = rng.integers(0, 6, size=(15, 3)).astype(float)
+    igd = indicators.IgdTracker(reference)
+    hv = indicators.HypervolumeTracker([7, 7, 7], np.zeros(3), samples=2000, exact_limit=0, seed=1)
+    live = []
+    for step in range(1500):
+        if live and rng.random() < 0.45:
+            point = live.pop(rng.integers(len(live)))
+            igd.remove(point)
+            hv.remove(point)
+        else:
+            point = tuple(rng.integers(0, 8, size=3).astype(float))
+            live.append(point)
+            igd.add(point)
+            hv.add(point)
+        if step % 50 == 0:
+            front = indicators.nondominated(np.array(live))
+            assert igd.value() == pytest.approx(indicators.igd(front, reference)), f"IGD drifted at step {step}"
+            inside = np.array(live)[(np.array(live) < 7).all(axis=1)]
+            covered = (inside[:, np.newaxis, :] <= hv.samples).all(axis=2).sum(axis=0)
+            hv.estimate()
+            assert np.array_equal(hv.counts, covered), f"Hypervolume counts drifted at step {step}"
+
+
+# ==== Summary // Export Tests
+def test_summarize_format():
+    """
+    Summary has groupname + objective columns, integer objectives stay integers, sorted by total
+    """
+    a = make_problem()
+    evo = make_evo(a)
+    evo.evolve(n=200)
+    df = evo.summarize(group_name="CassIan")
+    assert list(df.columns) == ["groupname"] + OBJECTIVES
+    assert (df["groupname"] == "CassIan").all()
+    assert len(df) == evo.size()
+    for name in OBJECTIVES:
+        assert df[name].dtype == np.int64, f"{name} column is {df[name].dtype}"
+    totals = df[OBJECTIVES].sum(axis=1)
+    assert totals.is_monotonic_increasing
+
+
+@pytest.mark.parametrize("ext", [".npz", ".parquet"])
+def test_export_round_trip(tmp_path, ext):
+    """
+    Exported fronts load back with the same scores and solutions
+    """
+    if ext == ".parquet":
+        pytest.importorskip("pyarrow")
+    a = make_problem()
+    evo = make_evo(a)
+    evo.evolve(n=200)
+    path = str(tmp_path / f"front{ext}")
+    evo.export(path)
+    names, scores, solutions = Evo.load_front(path)
+    assert names == OBJECTIVES
+    assert np.array_equal(scores, evo.score_array())
+    assert np.array_equal(solutions, np.stack(list(evo.pop.values())))
+
+
+# ==== Checkpoint Tests
+def test_checkpoint_round_trip(tmp_path):
+    """
+    A saved population resumes into a fresh Evo with the same objectives
+    """
+    a = make_problem()
+    evo = make_evo(a)
+    evo.evolve(n=100)
+    path = str(tmp_path / "pop.ckpt")
+    evo.save_checkpoint(path)
+
+    resumed = make_evo(a)
+    resumed.pop.clear()
+    resumed.load_checkpoint(path)
+    assert resumed.pop.keys() == evo.pop.keys()
+
+    mismatched = Evo()
+    mismatched.add_objective("overallocation", a.overallocation)
+    with pytest.raises(ValueError):
+        mismatched.load_checkpoint(path)
+
+
+def test_rescore_after_problem_change(tmp_path):
+    """
+    Checkpoints carry their metadata, and rescore re-keys the population and best index
+    """
+    a = make_problem()
+    evo = make_evo(a)
+    evo.evolve(n=100)
+    evo.checkpoint_metadata["problem"] = {"version": 1}
+    path = str(tmp_path / "pop.ckpt")
+    evo.save_checkpoint(path)
+
+    resumed = make_evo(a)
+    resumed.pop.clear()
+    assert resumed.load_checkpoint(path) == {"problem": {"version": 1}}
+
+    a.min_ta = a.min_ta + 1  # every section now needs one more TA
+    resumed.rescore()
+    for scores, sol in resumed.pop.items():
+        assert scores == resumed.score(sol), "Rescored keys should match the changed problem"
+    best, _ = resumed.best("undersupport")
+    assert best[2] == min(scores[2] for scores in resumed.pop)
+
+
+def test_rescore_reinserts_by_dominance():
+    """
+    Rescored solutions that collide or become dominated go through the normal insert + prune path
+    """
+    weight = {"x": 1}
+    evo = Evo()
+    evo.add_objective("x", lambda sol: sol[0] * weight["x"])
+    evo.add_objective("y", lambda sol: sol[1])
+    for sol in [(1, 5), (2, 5), (0, 9)]:
+        evo.add_solution(sol)
+    assert evo.size() == 3
+
+    weight["x"] = 0  # (1, 5) and (2, 5) now score the same, and both dominate (0, 9)
+    evo.rescore()
+    assert evo.pop == {(0, 5): (2, 5)}, f"Collisions should resolve as in add_scored, then prune: {evo.pop}"
+    assert evo.best("x") == ((0, 5), (2, 5)) and evo.best("y") == ((0, 5), (2, 5))
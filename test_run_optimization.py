@@ -0,0 +1,171 @@
+"""
+Authors: Cassandra Cinzori and Ian Solberg
+File: test_run_optimization.py
+Description: unit tests for the run_optimization command line (flags, stop conditions, checkpoint resume)
+"""
+import csv
+import os
+import numpy as np
+import pytest
+import run_optimization
+from assignta import AssignTa
+from evo import Evo, AnyOf, Stagnation, Plateau, HardConstraintsMet
+from profiler import Profiler
+
+
+DATA_DIR = os.path.abspath("assignta_data")
+
+
+def load_problem(sections=os.path.join(DATA_DIR, "sections.csv")):
+    """
+    Helper function to load the TA problem without touching the shared problem cache
+    """
+    a = AssignTa()
+    a.load_problem(os.path.join(DATA_DIR, "tas.csv"), sections, cache_dir=None)
+    return a
+
+
+def edit_sections(tmp_path, section, min_ta):
+    """
+    Helper function to copy sections.csv with one section's min_ta changed
+    """
+    with open(os.path.join(DATA_DIR, "sections.csv"), newline="", encoding="utf-8-sig") as f:
+        rows = list(csv.DictReader(f))
+    rows[section]["min_ta"] = str(min_ta)
+    path = tmp_path / "sections.csv"
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    return str(path)
+
+
+# ==== Flag Parsing Tests
+def test_parse_args_defaults():
+    """
+    With no flags the run uses the module defaults, adaptive pruning and no early stopping
+    """
+    args = run_optimization.parse_args([])
+    assert args.tas == run_optimization.TA_FILE and args.sections == run_optimization.LAB_FILE
+    assert args.dom == "auto", "Adaptive pruning should be the default"
+    assert args.time_limit is None, "main picks the time limit (normal or --reoptimize)"
+    assert (args.workers, args.batch_size, args.parallel) == (1, 1, "process")
+    assert not (args.sparse or args.repair or args.reoptimize)
+    assert run_optimization.build_stop_condition(args) is None, "No stop condition without --stall-* flags"
+
+
+def test_parse_args_overrides():
+    """
+    Runtime knobs parse to the right types, and --dom rejects anything but a positive int or 'auto'
+    """
+    args = run_optimization.parse_args([
+        "--time-limit", "2.5", "--iterations", "100", "--workers", "4", "--parallel", "thread",
+        "--batch-size", "16", "--dom", "50", "--seed", "7", "--checkpoint", "pop.ckpt",
+        "--output-dir", "out", "--profile", "off", "--sparse",
+    ])
+    assert (args.time_limit, args.iterations, args.workers, args.batch_size) == (2.5, 100, 4, 16)
+    assert (args.parallel, args.dom, args.seed, args.checkpoint) == ("thread", 50, 7, "pop.ckpt")
+    assert (args.output_dir, args.profile, args.sparse) == ("out", "off", True)
+
+    for bad in (["--dom", "0"], ["--dom", "often"], ["--parallel", "gpu"]):
+        with pytest.raises(SystemExit):
+            run_optimization.parse_args(bad)
+
+
+def test_stop_flags():
+    """
+    --stall-* / --hv-plateau / --feasible-stall build their conditions, combined with |,
+    and stop a stalled run under the default --dom auto
+    """
+    args = run_optimization.parse_args(["--stall-iterations", "50", "--stall-seconds", "5"])
+    stop = run_optimization.build_stop_condition(args)
+    assert isinstance(stop, Stagnation) and (stop.iterations, stop.seconds) == (50, 5.0)
+
+    args = run_optimization.parse_args(["--stall-iterations", "50", "--hv-plateau", "200", "--feasible-stall", "300"])
+    stop = run_optimization.build_stop_condition(args)
+    assert isinstance(stop, AnyOf), "Several stop flags should combine with |"
+    assert repr(stop) == " | ".join(map(repr, [Stagnation(50), Plateau("hypervolume", 200), HardConstraintsMet(iterations=300)]))
+
+    # The CLI default --dom auto must not keep a stalled run going until the iteration budget
+    args = run_optimization.parse_args(["--stall-iterations", "50"])
+    a = load_problem()
+    evo = Evo()
+    evo.add_objectives(AssignTa.SCORE_NAMES, a.score_all)
+    evo.add_agent("identity", lambda sols: sols[0])
+    evo.add_solution(a.zeros())
+    evo.evolve(n=100_000, dom=args.dom, stop=run_optimization.build_stop_condition(args))
+    assert evo.duplicates <= 100, f"--stall-iterations 50 ran {evo.duplicates} iterations with --dom auto"
+
+
+# ==== Checkpoint Resume Tests
+def test_rescore_checkpoint(tmp_path):
+    """
+    A checkpoint saved with its problem is delta-rescored after a CSV edit; one without is
+    trusted unless a full rescore is asked for; a different set of TAs is rejected
+    """
+    a = load_problem()
+    evo = Evo()
+    evo.add_objectives(AssignTa.SCORE_NAMES, a.score_all)
+    for sol in a.seed_population(6):
+        evo.add_solution(sol)
+    evo.checkpoint_metadata["problem"] = {name: np.array(values) for name, values in a.problem_arrays().items()}
+    path = str(tmp_path / "pop.ckpt")
+    evo.save_checkpoint(path)
+
+    edited = load_problem(edit_sections(tmp_path, section=0, min_ta=9))
+    resumed = Evo()
+    resumed.add_objectives(AssignTa.SCORE_NAMES, edited.score_all)
+    metadata = resumed.load_checkpoint(path)
+    old_keys = set(resumed.pop)
+    run_optimization.rescore_checkpoint(resumed, edited, metadata["problem"])
+    assert set(resumed.pop) != old_keys, "Raising a section's min_ta should change the undersupport scores"
+    for scores, sol in resumed.pop.items():
+        assert scores == edited.score_all(sol), "Delta-rescored keys differ from scoring from scratch"
+
+    trusted = Evo()
+    trusted.add_objectives(AssignTa.SCORE_NAMES, edited.score_all)
+    trusted.load_checkpoint(path)
+    run_optimization.rescore_checkpoint(trusted, edited, None)
+    assert set(trusted.pop) == old_keys, "Checkpoints without a problem are trusted unless full is set"
+    run_optimization.rescore_checkpoint(trusted, edited, None, full=True)
+    assert all(scores == edited.score_all(sol) for scores, sol in trusted.pop.items())
+
+    other = {**metadata["problem"], "ta_names": metadata["problem"]["ta_names"][::-1]}
+    with pytest.raises(ValueError):
+        run_optimization.rescore_checkpoint(trusted, edited, other)
+
+
+def test_main_resume(tmp_path, monkeypatch, capsys):
+    """
+    A run with --checkpoint saves the front; --reoptimize after a CSV edit resumes and rescores it
+    """
+    monkeypatch.setattr(Profiler, "enabled", Profiler.enabled)  # main switches it with --profile
+    common = ["--tas", os.path.join(DATA_DIR, "tas.csv"), "--no-cache", "--iterations", "100",
+              "--init-pop", "3", "--status", "0", "--profile", "off", "--seed", "1",
+              "--checkpoint", str(tmp_path / "pop.ckpt"), "--output-dir", str(tmp_path / "out")]
+    run_optimization.main(common + ["--sections", os.path.join(DATA_DIR, "sections.csv")])
+    assert os.path.exists(tmp_path / "pop.ckpt"), "--checkpoint should save the population"
+
+    with pytest.raises(SystemExit):
+        run_optimization.main(["--reoptimize"])  # needs --checkpoint
+
+    capsys.readouterr()
+    run_optimization.main(common + ["--sections", edit_sections(tmp_path, section=2, min_ta=9), "--reoptimize"])
+    out = capsys.readouterr().out
+    assert "Resumed" in out and "delta-rescored" in out, f"Warm start did not rescore the checkpoint:\n{out}"
+
+
+# ==== Agent Registration Tests
+def test_sparse_agents():
+    """
+    Sparse runs register only agents that work on the CSR structure (no dense local search)
+    """
+    sections = os.path.join(DATA_DIR, "sections.csv")
+    for sparse in (False, True):
+        _, evo, _ = run_optimization.optimize_ta_assignment(
+            time_limit=10, ta_file=os.path.join(DATA_DIR, "tas.csv"), lab_file=sections, n=20,
+            status=0, init_pop=2, sparse=sparse, cache_dir=None,
+        )
+        names = [name for name, _, _ in evo.agents]
+        assert ("local_search" in names) != sparse, f"sparse={sparse} registered {names}"
+        assert "row_crossover" in names
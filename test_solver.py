@@ -0,0 +1,50 @@
+"""
+Authors: Cassandra Cinzori and Ian Solberg
+File: test_solver.py
+Description: unit tests for the exact MILP backend
+"""
+import pytest
+from assignta import AssignTa
+from evo import Evo
+
+pytest.importorskip("scipy")
+import solver
+
+
+def make_problem():
+    """
+    Helper function to load the TA problem
+    """
+    a = AssignTa()
+    a.assign_ta_df("assignta_data/tas.csv")
+    a.assign_lab_df("assignta_data/sections.csv")
+    return a
+
+
+def test_weighted_optimum_beats_greedy():
+    """
+    The exact aggregate-weighted solution is at least as good as any greedy seed
+    """
+    a = make_problem()
+    best = solver.solve_weighted(a)
+    assert best is not None, "Solver found no solution"
+    assert a.conflicts(best) == 0 and a.unavailable(best) == 0
+    greedy = min(a.aggregate_objective(sol) for sol in a.seed_population(10))
+    assert a.aggregate_objective(best) <= greedy
+
+
+def test_reference_front_seeds_evo():
+    """
+    The epsilon-constraint sweep returns mutually non-dominated solutions that Evo keeps
+    """
+    a = make_problem()
+    front = solver.reference_front(a)
+    assert len(front) >= 1
+
+    evo = Evo()
+    for name in solver.OBJECTIVES:
+        evo.add_objective(name, getattr(a, name))
+    for sol in front:
+        evo.add_solution(sol)
+    evo.remove_dominated()
+    assert evo.size() == len(front), "Reference front contains dominated solutions"